@@ -1,4 +1,11 @@
-from flask import Flask, jsonify, request, make_response
+import io
+import json
+import shutil
+import tempfile
+import time
+
+import click
+from flask import Flask, Response, jsonify, request, make_response, stream_with_context
 from dotenv import load_dotenv
 
 from config import ProductionConfig
@@ -9,9 +16,30 @@ from config import ProductionConfig
 from weather_app.models.user_model import Users
 from weather_app.models.location_model import Location
 from weather_app.models.favorites_model import FavoritesModel
-from weather_app.utils.api_utils import fetch_air_quality_data, fetch_forecast, fetch_historical_data
+from weather_app.models.observation_model import AirQualityObservation, ForecastSnapshot, HistoricalObservation
+from weather_app.models.backfill_model import BackfillJob, BackfillTask
+from weather_app.utils.api_utils import (
+    configure_grid, configure_quota, configure_shared_cache, fetch_air_quality_data, fetch_forecast,
+    fetch_historical_data, get_cache_stats, get_circuit_stats, get_coalescing_stats, get_quota_stats, grid
+)
+from weather_app.utils.backfill import start_backfill_runner
+from weather_app.utils.circuit_breaker import CircuitOpenError
+from weather_app.utils.refresh_scheduler import start_refresh_scheduler
+from weather_app.utils.spatial_index import find_nearby_locations
 from weather_app.utils.sql_utils import check_database_connection, check_table_exists
-from weather_app.utils.db import db
+from weather_app.utils.dashboard import build_dashboard, fetch_for_locations, is_complete
+from weather_app.utils.db import db, upgrade_schema
+from weather_app.utils.downsample import get_history
+from weather_app.utils.export import EXPORT_FORMATS, export_history
+from weather_app.utils.grid import SpatialGrid
+from weather_app.utils.location_cache import configure_location_cache, location_cache
+from weather_app.utils.location_import import IMPORT_FORMATS, import_locations
+from weather_app.utils.location_search import search_locations
+from weather_app.utils.observation_store import start_observation_store
+from weather_app.utils.record_store import configure_record_store, record_store
+from weather_app.utils.quota import QuotaExceededError
+from weather_app.utils.upstream_client import get_upstream_client
+from weather_app.utils.weather_stats import compute_stats, to_records
 
 # Load environment variables
 load_dotenv()
@@ -23,6 +51,22 @@ def create_app(config_class=ProductionConfig):
     db.init_app(app)  # Initialize db with app
     with app.app_context():
         db.create_all()  # Recreate all tables
+        upgrade_schema()  # Add columns and indexes that tables created by older versions lack
+
+    configure_quota(app.config)
+    configure_grid(app.config)
+    configure_shared_cache(app.config)
+    configure_location_cache(app.config)
+    configure_record_store(app.config)
+
+    if app.config.get('OBSERVATION_STORE_ENABLED'):
+        start_observation_store(app)
+
+    if app.config.get('REFRESH_SCHEDULER_ENABLED'):
+        start_refresh_scheduler(app)
+
+    if app.config.get('BACKFILL_ENABLED'):
+        start_backfill_runner(app)
 
     ####################################################
     #
@@ -38,6 +82,28 @@ def create_app(config_class=ProductionConfig):
         app.logger.info('Health check')
         return make_response(jsonify({'status': 'healthy'}), 200)
 
+    @app.route('/api/upstream-health', methods=['GET'])
+    def upstream_health():
+        """
+        Report the state of the upstream circuit breakers, caches and clients.
+        """
+        circuits = get_circuit_stats()
+        degraded = any(circuit['state'] != 'closed' for circuit in circuits.values())
+        scheduler = app.extensions.get('refresh_scheduler')
+        observation_store = app.extensions.get('observation_store')
+        return make_response(jsonify({
+            'status': 'degraded' if degraded else 'healthy',
+            'circuits': circuits,
+            'caches': get_cache_stats(),
+            'location_cache': location_cache.get_stats(),
+            'record_store': record_store.get_stats(),
+            'coalescing': get_coalescing_stats(),
+            'quota': get_quota_stats(),
+            'upstream': get_upstream_client().get_stats(),
+            'refresh_scheduler': scheduler.get_stats() if scheduler else None,
+            'observation_store': observation_store.get_stats() if observation_store else None,
+        }), 200)
+
     @app.route('/api/db-check', methods=['GET'])
     def db_check():
         """
@@ -123,6 +189,39 @@ def create_app(config_class=ProductionConfig):
             app.logger.error(f"Error creating location: {e}")
             return make_response(jsonify({'error': str(e)}), 500)
 
+    @app.route('/api/import-locations', methods=['POST'])
+    def import_locations_route():
+        """
+        Bulk import locations from a CSV or NDJSON upload.
+
+        The upload is either a multipart ``file`` field or the raw request body;
+        ``format`` (csv or ndjson) defaults to the file extension. CSV needs a
+        header with city, latitude and longitude columns. The response streams an
+        NDJSON report with one line per skipped or rejected row, then a summary.
+        """
+        try:
+            upload = request.files.get('file')
+            filename = upload.filename if upload else ''
+            import_format = request.args.get('format') or filename.rpartition('.')[2].lower() or 'ndjson'
+            stream = request.stream
+            if upload:
+                # Uploaded files are closed once the view returns, before the report is streamed
+                stream = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+                shutil.copyfileobj(upload.stream, stream)
+                stream.seek(0)
+            lines = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+            report = import_locations(lines, import_format)
+            return Response(
+                stream_with_context(json.dumps(entry) + '\n' for entry in report),
+                mimetype='application/x-ndjson',
+            )
+        except ValueError as e:
+            app.logger.error(f"Invalid import request: {e}")
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error(f"Error importing locations: {e}")
+            return make_response(jsonify({'error': str(e)}), 500)
+
     @app.route('/api/get-location/<int:location_id>', methods=['GET'])
     def get_location(location_id):
         """
@@ -135,38 +234,417 @@ def create_app(config_class=ProductionConfig):
             app.logger.error(f"Error retrieving location: {e}")
             return make_response(jsonify({'error': str(e)}), 500)
 
+    @app.route('/api/get-locations', methods=['GET'])
+    def get_locations():
+        """
+        List locations one page at a time, ordered by ID.
+
+        Query parameters: ``cursor`` (the ``next_cursor`` of the previous page),
+        ``limit`` (default 100), ``city_prefix`` and ``bbox``
+        (min_lat,min_lon,max_lat,max_lon).
+        """
+        try:
+            cursor = request.args.get('cursor', type=int)
+            limit = request.args.get('limit', 100, type=int)
+            city_prefix = request.args.get('city_prefix')
+            bbox = request.args.get('bbox')
+            if bbox:
+                bbox = tuple(float(value) for value in bbox.split(','))
+                if len(bbox) != 4:
+                    raise ValueError("Invalid bounding box: expected min_lat,min_lon,max_lat,max_lon.")
+
+            locations, next_cursor = Location.list_locations(cursor, limit, city_prefix, bbox or None)
+            return make_response(jsonify({
+                'status': 'success',
+                'locations': locations,
+                'next_cursor': next_cursor,
+            }), 200)
+        except ValueError as e:
+            app.logger.error(f"Invalid location listing parameters: {e}")
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error(f"Error listing locations: {e}")
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/locations/nearby', methods=['GET'])
+    def get_nearby_locations():
+        """
+        Find the saved locations closest to a position.
+
+        Query parameters ``lat`` and ``lon`` are required; ``k`` (default 10)
+        limits the number of results and ``radius_km`` the distance.
+        """
+        try:
+            latitude = request.args.get('lat', type=float)
+            longitude = request.args.get('lon', type=float)
+            if latitude is None or longitude is None:
+                raise ValueError("Invalid request: lat and lon are required.")
+            k = request.args.get('k', 10, type=int)
+            radius_km = request.args.get('radius_km', type=float)
+            locations = find_nearby_locations(latitude, longitude, k, radius_km)
+            return make_response(jsonify({'status': 'success', 'locations': locations}), 200)
+        except ValueError as e:
+            app.logger.error(f"Invalid nearby parameters: {e}")
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error(f"Error finding nearby locations: {e}")
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/locations/search', methods=['GET'])
+    def search_locations_route():
+        """
+        Type-ahead search over saved location names.
+
+        Query parameters: ``q`` (required) and ``limit`` (default 10). Matches
+        names, or any word within them, starting with ``q``, ignoring case and accents.
+        """
+        try:
+            query = request.args.get('q', '')
+            limit = request.args.get('limit', 10, type=int)
+            locations = search_locations(query, limit)
+            return make_response(jsonify({'status': 'success', 'locations': locations}), 200)
+        except ValueError as e:
+            app.logger.error(f"Invalid search parameters: {e}")
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error(f"Error searching locations: {e}")
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/grid-stats', methods=['GET'])
+    def grid_stats():
+        """
+        Report how many saved locations share each weather grid cell.
+
+        Optional ``mode`` and ``precision`` query parameters preview another grid
+        without changing the one in use.
+        """
+        try:
+            mode = request.args.get('mode', grid.mode)
+            precision = request.args.get('precision', type=float)
+            if precision is None and mode == grid.mode:
+                precision = grid.precision
+            preview = SpatialGrid(mode, precision)
+            stats = preview.summarize(Location.get_all_coordinates())
+            return make_response(jsonify({'status': 'success', 'grid': stats}), 200)
+        except ValueError as e:
+            app.logger.error(f"Invalid grid parameters: {e}")
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error(f"Error computing grid stats: {e}")
+            return make_response(jsonify({'error': str(e)}), 500)
+
     ####################################################
     #
     # Weather and Air Quality
     #
     ####################################################
 
+    def stale_or_unavailable(field, error, grid_cell):
+        """
+        Build the response for an open upstream circuit: the last known good
+        payload flagged as stale if there is one, otherwise a 503.
+        """
+        if error.stale_payload is None:
+            app.logger.error(f"Upstream unavailable and no {field} to fall back on: {error}")
+            return make_response(jsonify({'error': str(error)}), 503)
+        app.logger.warning(f"Serving stale {field} ({error.age:.0f}s old): {error}")
+        return make_response(jsonify({
+            'status': 'success',
+            field: error.stale_payload,
+            'grid_cell': grid_cell,
+            'stale': True,
+            'age': round(error.age),
+        }), 200)
+
     @app.route('/api/get-weather/<int:location_id>', methods=['GET'])
-    def get_weather(location_id):
+    async def get_weather(location_id):
         """
         Get weather forecast for a location.
         """
         try:
-            location = Location.get_location_by_id(location_id)
-            forecast = location.get_weather()
-            return make_response(jsonify({'status': 'success', 'forecast': forecast}), 200)
+            location = Location.get_cached(location_id)
+            grid_cell = location.get_grid_cell()._asdict()
+            forecast = await location.get_weather_async()
+            return make_response(jsonify({'status': 'success', 'forecast': forecast, 'grid_cell': grid_cell}), 200)
+        except CircuitOpenError as e:
+            return stale_or_unavailable('forecast', e, grid_cell)
+        except QuotaExceededError as e:
+            app.logger.warning(f"Quota exhausted fetching forecast: {e}")
+            return make_response(jsonify({'error': str(e)}), 429)
         except Exception as e:
             app.logger.error(f"Error fetching forecast: {e}")
             return make_response(jsonify({'error': str(e)}), 500)
 
     @app.route('/api/get-air-quality/<int:location_id>', methods=['GET'])
-    def get_air_quality(location_id):
+    async def get_air_quality(location_id):
         """
         Get air quality for a location.
         """
         try:
-            location = Location.get_location_by_id(location_id)
-            air_quality = location.get_air_quality()
-            return make_response(jsonify({'status': 'success', 'air_quality': air_quality}), 200)
+            location = Location.get_cached(location_id)
+            grid_cell = location.get_grid_cell()._asdict()
+            air_quality = await location.get_air_quality_async()
+            return make_response(jsonify({'status': 'success', 'air_quality': air_quality, 'grid_cell': grid_cell}), 200)
+        except CircuitOpenError as e:
+            return stale_or_unavailable('air_quality', e, grid_cell)
+        except QuotaExceededError as e:
+            app.logger.warning(f"Quota exhausted fetching air quality: {e}")
+            return make_response(jsonify({'error': str(e)}), 429)
         except Exception as e:
             app.logger.error(f"Error fetching air quality: {e}")
             return make_response(jsonify({'error': str(e)}), 500)
 
+    @app.route('/api/get-dashboard/<int:user_id>', methods=['GET'])
+    async def get_dashboard(user_id):
+        """
+        Get forecast and air quality for all of a user's favorites at once.
+
+        Fetches run concurrently, up to DASHBOARD_CONCURRENCY at a time, and the
+        response is sent once they finish or DASHBOARD_DEADLINE expires. Each
+        item carries its own status, so slow or failing upstream calls only
+        affect their own entries.
+        """
+        try:
+            favorites = FavoritesModel.get_favorite_locations(user_id)
+            items = await build_dashboard(favorites, app.config.get('DASHBOARD_CONCURRENCY', 8),
+                                          app.config.get('DASHBOARD_DEADLINE', 5.0))
+            return make_response(jsonify({'status': 'success', 'complete': is_complete(items), 'items': items}), 200)
+        except ValueError as e:
+            app.logger.error(f"Error retrieving dashboard: {e}")
+            return make_response(jsonify({'error': str(e)}), 404)
+        except Exception as e:
+            app.logger.error(f"Unexpected error retrieving dashboard: {e}")
+            return make_response(jsonify({'error': 'Internal server error'}), 500)
+
+    def batch_locations():
+        """
+        Resolve the locations of a batch request from ``ids`` (comma-separated)
+        or ``bbox`` (min_lat,min_lon,max_lat,max_lon), with one query.
+
+        Returns:
+            tuple: The locations and the requested IDs that do not exist.
+        """
+        max_locations = app.config.get('BATCH_MAX_LOCATIONS', 100)
+        ids = request.args.get('ids')
+        bbox = request.args.get('bbox')
+        if bool(ids) == bool(bbox):
+            raise ValueError("Exactly one of ids or bbox is required.")
+        if ids:
+            location_ids = list(dict.fromkeys(int(location_id) for location_id in ids.split(',')))
+            if len(location_ids) > max_locations:
+                raise ValueError(f"Too many locations: {len(location_ids)}. At most {max_locations} are allowed.")
+            locations = Location.get_locations_by_ids(location_ids)
+            found = {location['id'] for location in locations}
+            return locations, [location_id for location_id in location_ids if location_id not in found]
+        bbox = tuple(float(value) for value in bbox.split(','))
+        if len(bbox) != 4:
+            raise ValueError("Invalid bounding box: expected min_lat,min_lon,max_lat,max_lon.")
+        locations, next_cursor = Location.list_locations(limit=max_locations, bbox=bbox)
+        if next_cursor is not None:
+            raise ValueError(f"Too many locations in bounding box. At most {max_locations} are allowed.")
+        return locations, []
+
+    async def batch_response(field):
+        """
+        Fetch one field for every location of a batch request, keyed by location ID.
+        """
+        try:
+            locations, missing = batch_locations()
+            items = await fetch_for_locations(locations, (field,), app.config.get('DASHBOARD_CONCURRENCY', 8),
+                                              app.config.get('DASHBOARD_DEADLINE', 5.0))
+            return make_response(jsonify({
+                'status': 'success',
+                'complete': is_complete(items),
+                'results': {str(item['location']['id']): item for item in items},
+                'missing': missing,
+            }), 200)
+        except ValueError as e:
+            app.logger.error(f"Invalid batch request: {e}")
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error(f"Error fetching batch {field}: {e}")
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/get-weather-batch', methods=['GET'])
+    async def get_weather_batch():
+        """
+        Get weather forecasts for up to BATCH_MAX_LOCATIONS locations given by
+        ``ids`` or ``bbox``. Locations sharing a grid cell share one fetch.
+        """
+        return await batch_response('forecast')
+
+    @app.route('/api/get-air-quality-batch', methods=['GET'])
+    async def get_air_quality_batch():
+        """
+        Get air quality for up to BATCH_MAX_LOCATIONS locations given by
+        ``ids`` or ``bbox``. Locations sharing a grid cell share one fetch.
+        """
+        return await batch_response('air_quality')
+
+    @app.route('/api/get-stats/<int:location_id>', methods=['GET'])
+    def get_stats(location_id):
+        """
+        Get temperature, precipitation and AQI statistics from stored history.
+
+        Query parameters: ``start`` and ``end`` (Unix seconds, default the last
+        30 days), ``granularity`` (hour, day or week, default day) and
+        ``percentiles`` (comma-separated, default 50,90).
+        """
+        try:
+            end = request.args.get('end', type=int) or int(time.time())
+            start = request.args.get('start', type=int) or end - 30 * 86400
+            granularity = request.args.get('granularity', 'day')
+            percentiles = request.args.get('percentiles')
+            percentiles = [float(q) for q in percentiles.split(',')] if percentiles else (50, 90)
+
+            Location.get_cached(location_id)
+            result = compute_stats([location_id], start, end, granularity, percentiles)
+            return make_response(jsonify({
+                'status': 'success',
+                'location_id': location_id,
+                'granularity': granularity,
+                'stats': to_records(result['buckets'], result['locations'][location_id]),
+            }), 200)
+        except ValueError as e:
+            app.logger.error(f"Error computing stats: {e}")
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error(f"Unexpected error computing stats: {e}")
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/get-history/<int:location_id>', methods=['GET'])
+    def get_history_route(location_id):
+        """
+        Get a location's stored hourly history for charting, downsampled server-side.
+
+        Query parameters: ``start`` and ``end`` (Unix seconds, default the last
+        7 days), ``max_points`` (default 500), ``field`` (default temp) and
+        ``method`` (bucket or lttb, default bucket).
+        """
+        try:
+            end = request.args.get('end', type=int) or int(time.time())
+            start = request.args.get('start', type=int) or end - 7 * 86400
+            max_points = request.args.get('max_points', 500, type=int)
+            field = request.args.get('field', 'temp')
+            method = request.args.get('method', 'bucket')
+
+            Location.get_cached(location_id)
+            history = get_history(location_id, field, start, end, max_points, method)
+            return make_response(jsonify({
+                'status': 'success',
+                'location_id': location_id,
+                'field': field,
+                'method': method,
+                **history,
+            }), 200)
+        except ValueError as e:
+            app.logger.error(f"Error retrieving history: {e}")
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error(f"Unexpected error retrieving history: {e}")
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/export-history', methods=['GET'])
+    def export_history_route():
+        """
+        Stream stored hourly history as NDJSON or CSV.
+
+        Query parameters: ``format`` (ndjson or csv, default ndjson),
+        ``location_ids`` (comma-separated, default all), ``start`` and ``end``
+        (Unix seconds). Rows are streamed as they are read, ordered by location and time.
+        """
+        try:
+            export_format = request.args.get('format', 'ndjson')
+            location_ids = request.args.get('location_ids')
+            location_ids = [int(location_id) for location_id in location_ids.split(',')] if location_ids else None
+            start = request.args.get('start', type=int)
+            end = request.args.get('end', type=int)
+
+            chunks = export_history(export_format, location_ids, start, end)
+            filename = f"history.{export_format}"
+            return Response(
+                stream_with_context(chunks),
+                mimetype=EXPORT_FORMATS[export_format],
+                headers={'Content-Disposition': f'attachment; filename={filename}'},
+            )
+        except ValueError as e:
+            app.logger.error(f"Invalid export request: {e}")
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error(f"Error exporting history: {e}")
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    ####################################################
+    #
+    # Historical Backfill
+    #
+    ####################################################
+
+    def backfill_runner():
+        runner = app.extensions.get('backfill_runner')
+        if runner is None:
+            raise RuntimeError('Backfill is disabled')
+        return runner
+
+    @app.route('/api/submit-backfill', methods=['POST'])
+    def submit_backfill():
+        """
+        Start loading hourly history for a list of locations over a time range.
+        """
+        try:
+            data = request.get_json()
+            location_ids = data.get('location_ids')
+            start = data.get('start')
+            end = data.get('end')
+
+            if not location_ids or start is None or end is None:
+                return make_response(jsonify({'error': 'Location IDs, start, and end are required'}), 400)
+
+            job = backfill_runner().submit([int(location_id) for location_id in location_ids], int(start), int(end))
+            app.logger.info(f"Backfill job {job.id} submitted for {len(location_ids)} locations")
+            return make_response(jsonify({'status': 'success', 'job': backfill_runner().get_status(job.id)}), 202)
+        except ValueError as e:
+            app.logger.error(f"Error submitting backfill: {e}")
+            return make_response(jsonify({'error': str(e)}), 400)
+        except RuntimeError as e:
+            return make_response(jsonify({'error': str(e)}), 503)
+        except Exception as e:
+            app.logger.error(f"Unexpected error submitting backfill: {e}")
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/get-backfill/<int:job_id>', methods=['GET'])
+    def get_backfill(job_id):
+        """
+        Get the status, progress, throughput and ETA of a backfill job.
+        """
+        try:
+            return make_response(jsonify({'status': 'success', 'job': backfill_runner().get_status(job_id)}), 200)
+        except ValueError as e:
+            app.logger.error(f"Error retrieving backfill: {e}")
+            return make_response(jsonify({'error': str(e)}), 404)
+        except RuntimeError as e:
+            return make_response(jsonify({'error': str(e)}), 503)
+        except Exception as e:
+            app.logger.error(f"Unexpected error retrieving backfill: {e}")
+            return make_response(jsonify({'error': str(e)}), 500)
+
+    @app.route('/api/cancel-backfill/<int:job_id>', methods=['POST'])
+    def cancel_backfill(job_id):
+        """
+        Cancel a backfill job. History already written is kept.
+        """
+        try:
+            backfill_runner().cancel(job_id)
+            return make_response(jsonify({'status': 'success', 'message': 'Backfill cancelled'}), 200)
+        except ValueError as e:
+            app.logger.error(f"Error cancelling backfill: {e}")
+            return make_response(jsonify({'error': str(e)}), 400)
+        except RuntimeError as e:
+            return make_response(jsonify({'error': str(e)}), 503)
+        except Exception as e:
+            app.logger.error(f"Unexpected error cancelling backfill: {e}")
+            return make_response(jsonify({'error': str(e)}), 500)
+
     ####################################################
     #
     # Favorites Management
@@ -197,21 +675,55 @@ def create_app(config_class=ProductionConfig):
             return make_response(jsonify({'error': 'Internal server error'}), 500)
 
 
+    def bulk_favorites(operation):
+        """
+        Apply a bulk favorites operation to the ``user_id`` and ``location_ids`` of a JSON body.
+        """
+        try:
+            data = request.get_json()
+            user_id = data.get('user_id')
+            location_ids = data.get('location_ids')
+
+            if not user_id or not isinstance(location_ids, list):
+                return make_response(jsonify({'error': 'User ID and a list of location IDs are required'}), 400)
+
+            result = operation(int(user_id), [int(location_id) for location_id in location_ids])
+            return make_response(jsonify({'status': 'success', **result}), 200)
+        except ValueError as e:
+            app.logger.error(f"Error changing favorites: {e}")
+            return make_response(jsonify({'error': str(e)}), 400)
+        except Exception as e:
+            app.logger.error(f"Unexpected error changing favorites: {e}")
+            return make_response(jsonify({'error': 'Internal server error'}), 500)
+
+    @app.route('/api/add-favorites', methods=['POST'])
+    def add_favorites():
+        """
+        Add many locations to a user's favorites in one transaction.
+        """
+        return bulk_favorites(FavoritesModel.add_favorites)
+
+    @app.route('/api/remove-favorites', methods=['POST'])
+    def remove_favorites():
+        """
+        Remove many locations from a user's favorites in one transaction.
+        """
+        return bulk_favorites(FavoritesModel.remove_favorites)
+
+    @app.route('/api/replace-favorites', methods=['PUT'])
+    def replace_favorites():
+        """
+        Replace a user's favorites with the given locations in one transaction.
+        """
+        return bulk_favorites(FavoritesModel.replace_favorites)
+
     @app.route('/api/get-favorites/<int:user_id>', methods=['GET']) 
     def get_favorites(user_id):
         """
         Get all favorite locations for a user.
         """
         try:
-            # Fetch the favorite location IDs
-            favorite_location_ids = FavoritesModel.get_favorites_by_user_id(user_id)
-
-            # Retrieve location details for each favorite (optional)
-            favorite_locations = [
-                Location.get_location_by_id(location_id).to_dict()
-                for location_id in favorite_location_ids
-            ]
-
+            favorite_locations = FavoritesModel.get_favorite_locations(user_id)
             return make_response(jsonify({'status': 'success', 'favorites': favorite_locations}), 200)
         except ValueError as e:
             app.logger.error(f"Error retrieving favorites: {e}")
@@ -234,7 +746,32 @@ def create_app(config_class=ProductionConfig):
         except Exception as e:
             app.logger.error(f"Unexpected error removing favorite: {e}")
             return make_response(jsonify({'error': 'Internal server error'}), 500)
-        
+
+    ####################################################
+    #
+    # Command Line
+    #
+    ####################################################
+
+    @app.cli.command('import-locations')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'import_format', type=click.Choice(IMPORT_FORMATS),
+                  help='Input format; defaults to the file extension.')
+    @click.option('--batch-size', type=int, default=None, help='Rows inserted per transaction.')
+    def import_locations_command(path, import_format, batch_size):
+        """
+        Bulk import locations from a CSV or NDJSON file, printing an NDJSON report.
+        """
+        import_format = import_format or path.rpartition('.')[2].lower()
+        with open(path, encoding='utf-8-sig', newline='') as lines:
+            options = {'batch_size': batch_size} if batch_size else {}
+            try:
+                report = import_locations(lines, import_format, **options)
+            except ValueError as e:
+                raise click.BadParameter(str(e))
+            for entry in report:
+                click.echo(json.dumps(entry))
+
     return app
 
 if __name__ == '__main__':
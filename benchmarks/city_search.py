@@ -0,0 +1,80 @@
+"""
+Latency benchmark for /api/locations/search.
+
+Loads a synthetic catalogue into an in-memory database, then times type-ahead
+queries of 1 to 6 characters through the full Flask request path. Exits with
+status 1 if the p99 latency is above the budget.
+
+Usage (from the repository root):
+    python -m benchmarks.city_search [--rows 100000] [--queries 5000] [--budget-ms 10]
+"""
+import argparse
+import random
+import sys
+import time
+
+from sqlalchemy import insert
+
+from app import create_app
+from config import TestConfig
+from weather_app.models.location_model import Location
+from weather_app.utils.db import db
+from weather_app.utils.location_search import get_city_index
+
+SYLLABLES = ["ba", "bel", "ber", "ca", "chi", "do", "el", "fa", "ga", "han", "ka", "la", "lon", "ma", "mo", "na",
+             "new", "or", "pa", "por", "ri", "sa", "san", "se", "ta", "to", "vi", "wa", "yo", "zu"]
+
+
+def city_name(rng: random.Random) -> str:
+    words = [
+        "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))).capitalize()
+        for _ in range(rng.choice((1, 1, 1, 2, 2, 3)))
+    ]
+    return " ".join(words)
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--budget-ms", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    app = create_app(TestConfig)
+    with app.app_context():
+        names = [city_name(rng) for _ in range(args.rows)]
+        db.session.execute(insert(Location), [
+            {"city": name, "latitude": rng.uniform(-90, 90), "longitude": rng.uniform(-180, 180)} for name in names
+        ])
+        db.session.commit()
+
+        started = time.perf_counter()
+        get_city_index()
+        print(f"Indexed {args.rows} locations in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        client = app.test_client()
+        latencies = []
+        for _ in range(args.queries):
+            query = rng.choice(names)[:rng.randint(1, 6)]
+            started = time.perf_counter()
+            response = client.get("/api/locations/search", query_string={"q": query, "limit": 10})
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.get_data(as_text=True)
+
+    p50, p99 = percentile(latencies, 50), percentile(latencies, 99)
+    print(f"{args.queries} queries: p50 {p50:.2f} ms, p99 {p99:.2f} ms, max {max(latencies):.2f} ms")
+    if p99 > args.budget_ms:
+        print(f"p99 exceeds the {args.budget_ms:g} ms budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
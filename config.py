@@ -8,8 +8,71 @@ class ProductionConfig():
                                            # write-throughs
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', "sqlite:///app.db")  # Production database URI from environment
 
+    # Background refresh of forecasts and air quality for favorited locations
+    REFRESH_SCHEDULER_ENABLED = os.getenv('REFRESH_SCHEDULER_ENABLED', 'false').lower() == 'true'
+    REFRESH_WORKERS = int(os.getenv('REFRESH_WORKERS', '4'))
+    REFRESH_POLL_INTERVAL = float(os.getenv('REFRESH_POLL_INTERVAL', '60'))
+
+    # Historical backfill jobs; unfinished jobs are resumed at startup. Each job runs in one worker
+    # at a time: a worker holds a job's lease while running it, renewing it every third of
+    # BACKFILL_LEASE_SECONDS, and others take over jobs whose lease has expired
+    BACKFILL_ENABLED = os.getenv('BACKFILL_ENABLED', 'false').lower() == 'true'
+    BACKFILL_WORKERS = int(os.getenv('BACKFILL_WORKERS', '4'))
+    BACKFILL_BATCH_HOURS = int(os.getenv('BACKFILL_BATCH_HOURS', '24'))
+    BACKFILL_LEASE_SECONDS = int(os.getenv('BACKFILL_LEASE_SECONDS', '60'))
+
+    # Grid that nearby locations are snapped to before fetching: 'degrees' (GRID_PRECISION is the
+    # cell size in degrees) or 'geohash' (GRID_PRECISION is the geohash length)
+    GRID_MODE = os.getenv('GRID_MODE', 'degrees')
+    GRID_PRECISION = float(os.getenv('GRID_PRECISION')) if os.getenv('GRID_PRECISION') else None  # None: mode default
+
+    # Shared tier of the forecast and air quality caches, so workers fetch each grid cell once:
+    # a Redis URL or sqlite:///path/to/file on local disk; unset keeps the caches per process
+    WEATHER_CACHE_SHARED_URL = os.getenv('WEATHER_CACHE_SHARED_URL')
+
+    # Read-through cache of location records; a Redis URL broadcasts invalidations to other workers
+    LOCATION_CACHE_SIZE = int(os.getenv('LOCATION_CACHE_SIZE', '10000'))
+    LOCATION_CACHE_TTL = float(os.getenv('LOCATION_CACHE_TTL', '3600'))
+    LOCATION_CACHE_REDIS_URL = os.getenv('LOCATION_CACHE_REDIS_URL')
+
+    # Cache of users, locations and favorites shared by every worker, filled on read and cleared by commits;
+    # unset disables it. Credentials are never cached
+    RECORD_STORE_REDIS_URL = os.getenv('RECORD_STORE_REDIS_URL')
+    RECORD_STORE_PREFIX = os.getenv('RECORD_STORE_PREFIX', 'weather_app')
+    RECORD_STORE_TTL = int(os.getenv('RECORD_STORE_TTL', '3600'))
+
+    # Dashboard and batch weather requests: upstream fetches in flight per request and seconds before
+    # answering with partial results
+    DASHBOARD_CONCURRENCY = int(os.getenv('DASHBOARD_CONCURRENCY', '8'))
+    DASHBOARD_DEADLINE = float(os.getenv('DASHBOARD_DEADLINE', '5'))
+
+    # Most locations a batch weather or air quality request may cover
+    BATCH_MAX_LOCATIONS = int(os.getenv('BATCH_MAX_LOCATIONS', '100'))
+
+    # Cell size in degrees of the in-memory index behind /api/locations/nearby; must divide 360
+    LOCATION_INDEX_CELL_DEGREES = float(os.getenv('LOCATION_INDEX_CELL_DEGREES', '1'))
+
+    # OpenWeather plan quota, counted once per upstream attempt (retries included) in fixed calendar
+    # minutes and UTC days. Counted across all workers in QUOTA_SHARED_URL (a Redis URL or
+    # sqlite:///path; defaults to WEATHER_CACHE_SHARED_URL), otherwise per process
+    QUOTA_SHARED_URL = os.getenv('QUOTA_SHARED_URL')
+    OPENWEATHER_CALLS_PER_MINUTE = int(os.getenv('OPENWEATHER_CALLS_PER_MINUTE', '60'))
+    OPENWEATHER_CALLS_PER_DAY = int(os.getenv('OPENWEATHER_CALLS_PER_DAY', '1000'))
+    QUOTA_INTERACTIVE_DEADLINE = float(os.getenv('QUOTA_INTERACTIVE_DEADLINE', '2'))  # seconds a route waits for quota
+    QUOTA_BACKGROUND_DEADLINE = float(os.getenv('QUOTA_BACKGROUND_DEADLINE', '30'))  # seconds a background job waits
+
+    # Persist every fetched forecast, air quality and historical payload
+    OBSERVATION_STORE_ENABLED = os.getenv('OBSERVATION_STORE_ENABLED', 'true').lower() == 'true'
+    OBSERVATION_BATCH_SIZE = int(os.getenv('OBSERVATION_BATCH_SIZE', '500'))
+    OBSERVATION_FLUSH_INTERVAL = float(os.getenv('OBSERVATION_FLUSH_INTERVAL', '2'))
+
 class TestConfig():
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'  # Use in-memory database for tests
\ No newline at end of file
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'  # Use in-memory database for tests
+    REFRESH_SCHEDULER_ENABLED = False
+    OPENWEATHER_CALLS_PER_MINUTE = 100000
+    OPENWEATHER_CALLS_PER_DAY = 1000000
+    OBSERVATION_STORE_ENABLED = False
+    BACKFILL_ENABLED = False
\ No newline at end of file
@@ -1,11 +1,30 @@
 import pytest
 from unittest.mock import Mock
-from weather_app.utils.api_utils import fetch_air_quality_data, fetch_historical_data, fetch_forecast
+from weather_app.utils.api_utils import (
+    fetch_air_quality_data, fetch_historical_data, fetch_forecast, get_cache_stats, get_coalescing_stats,
+    invalidate_weather_cache, circuit_breakers, forecast_cache, quota_governor
+)
+from weather_app.utils.forecast_frame import ForecastFrame
+from weather_app.utils.circuit_breaker import CircuitOpenError
+
+@pytest.fixture(autouse=True)
+def clear_weather_cache():
+    """Ensures every test starts with empty weather caches, closed circuits and ample quota."""
+    invalidate_weather_cache()
+    quota_governor.configure(per_minute=100000, per_day=1000000)
+    for breaker in circuit_breakers.values():
+        breaker.reset()
+    yield
+    invalidate_weather_cache()
+    quota_governor.configure(per_minute=100000, per_day=1000000)
+    for breaker in circuit_breakers.values():
+        breaker.reset()
 
 @pytest.fixture
 def mock_requests_get(mocker):
-    """Mocks the requests.get response."""
+    """Mocks the response of the pooled upstream session."""
     mock_response = Mock()
+    mock_response.status_code = 200
     mock_response.json.return_value = {
         "list": [
             {
@@ -14,7 +33,7 @@ def mock_requests_get(mocker):
             }
         ]
     }
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch("requests.Session.get", return_value=mock_response)
     return mock_response
 
 def test_fetch_air_quality_data(mock_requests_get):
@@ -32,3 +51,141 @@ def test_fetch_forecast(mock_requests_get):
     """Test fetching forecast data."""
     data = fetch_forecast(40.7128, -74.0060)
     assert "list" in data
+
+def test_fetch_forecast_is_cached(mock_requests_get, mocker):
+    """Test that nearby coordinates are served from the cache."""
+    mock_get = mocker.patch("requests.Session.get", return_value=mock_requests_get)
+    first = fetch_forecast(40.7128, -74.0060)
+    second = fetch_forecast(40.7131, -74.0058)
+    assert first == second
+    assert mock_get.call_count == 1
+
+def test_fetch_forecast_cached_as_frame(mock_requests_get):
+    """Test that forecasts are cached in compact form and served in the original shape."""
+    data = fetch_forecast(40.7128, -74.0060)
+    (cached,) = [forecast_cache.peek(key) for key in list(forecast_cache._entries)]
+    assert isinstance(cached, ForecastFrame)
+    assert fetch_forecast(40.7128, -74.0060) == data == mock_requests_get.json.return_value
+
+def test_fetch_forecast_cache_keyed_by_exclude(mock_requests_get, mocker):
+    """Test that different exclude lists are cached separately, regardless of order."""
+    mock_get = mocker.patch("requests.Session.get", return_value=mock_requests_get)
+    fetch_forecast(40.7128, -74.0060, exclude="hourly,current")
+    fetch_forecast(40.7128, -74.0060, exclude="current,hourly")
+    fetch_forecast(40.7128, -74.0060, exclude="current")
+    assert mock_get.call_count == 2
+
+def test_invalidate_weather_cache_for_location(mock_requests_get, mocker):
+    """Test that invalidating a location forces a fresh upstream call."""
+    mock_get = mocker.patch("requests.Session.get", return_value=mock_requests_get)
+    misses_before = get_cache_stats()["air_quality"]["misses"]
+    fetch_air_quality_data(40.7128, -74.0060)
+    assert invalidate_weather_cache(40.7128, -74.0060) == 1
+    fetch_air_quality_data(40.7128, -74.0060)
+    assert mock_get.call_count == 2
+
+    stats = get_cache_stats()["air_quality"]
+    assert stats["misses"] - misses_before == 2
+    assert stats["size"] == 1
+
+def test_concurrent_fetch_forecast_coalesced(mock_requests_get, mocker):
+    """Test that concurrent cache misses issue a single upstream request."""
+    import threading
+    import time
+
+    def slow_get(*args, **kwargs):
+        time.sleep(0.1)
+        return mock_requests_get
+
+    mock_get = mocker.patch("requests.Session.get", side_effect=slow_get)
+    coalesced_before = get_coalescing_stats()["coalesced"]
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fetch_forecast(51.5074, -0.1278))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert mock_get.call_count == 1
+    assert len(results) == 8
+    assert get_coalescing_stats()["coalesced"] - coalesced_before == 7
+
+def test_stale_forecast_served_while_refresh_in_flight(mock_requests_get, mocker):
+    """Test that an expired forecast is served while another caller refreshes it."""
+    import threading
+    import time
+    from weather_app.utils.api_utils import forecast_cache, refresh_forecast
+
+    mocker.patch("requests.Session.get", return_value=mock_requests_get)
+    original = fetch_forecast(34.0522, -118.2437)
+    key = next(iter(forecast_cache._entries))
+    value, stored_at, _ = forecast_cache._entries[key]
+    forecast_cache._entries[key] = (value, stored_at - 7200, stored_at - 1)
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_get(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return mock_requests_get
+
+    mock_get = mocker.patch("requests.Session.get", side_effect=slow_get)
+    refresher = threading.Thread(target=refresh_forecast, args=(34.0522, -118.2437))
+    refresher.start()
+    started.wait(5)
+
+    start = time.monotonic()
+    assert fetch_forecast(34.0522, -118.2437) == original
+    assert time.monotonic() - start < 1
+    release.set()
+    refresher.join()
+    assert mock_get.call_count == 1
+
+def test_open_circuit_serves_last_known_good(mock_requests_get, mocker):
+    """Test that an open circuit fails fast and carries the stale payload."""
+    import requests
+    from weather_app.utils.api_utils import air_quality_cache
+
+    mocker.patch("requests.Session.get", return_value=mock_requests_get)
+    original = fetch_air_quality_data(40.7128, -74.0060)
+    key = next(iter(air_quality_cache._entries))
+    value, stored_at, _ = air_quality_cache._entries[key]
+    air_quality_cache._entries[key] = (value, stored_at - 1000, stored_at - 1)
+
+    breaker = circuit_breakers["air_quality"]
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    mock_get = mocker.patch("requests.Session.get", side_effect=requests.ConnectionError("down"))
+    with pytest.raises(CircuitOpenError) as excinfo:
+        fetch_air_quality_data(40.7128, -74.0060)
+    assert excinfo.value.stale_payload == original
+    assert excinfo.value.age >= 1000
+    assert mock_get.call_count == 0
+
+def test_upstream_errors_open_circuit(mocker):
+    """Test that repeated upstream failures open the circuit."""
+    import requests
+
+    mocker.patch("weather_app.utils.upstream_client.time.sleep")
+    mocker.patch("requests.Session.get", side_effect=requests.ConnectionError("down"))
+    for _ in range(circuit_breakers["historical"].failure_threshold):
+        with pytest.raises(Exception, match="Failed to fetch historical weather data."):
+            fetch_historical_data(40.7128, -74.0060)
+    with pytest.raises(CircuitOpenError) as excinfo:
+        fetch_historical_data(40.7128, -74.0060)
+    assert excinfo.value.stale_payload is None
+
+def test_quota_exhaustion_fails_fast(mock_requests_get, mocker):
+    """Test that fetches fail without calling upstream once the quota is spent."""
+    from weather_app.utils.quota import QuotaExceededError
+
+    mock_get = mocker.patch("requests.Session.get", return_value=mock_requests_get)
+    quota_governor.configure(per_minute=1, per_day=100, interactive_deadline=0.05)
+    fetch_forecast(40.7128, -74.0060)
+    with pytest.raises(QuotaExceededError):
+        fetch_forecast(10.0, 10.0)
+    assert mock_get.call_count == 1
+    assert quota_governor.get_stats()["rejected"]["interactive"] == 1
+    assert circuit_breakers["forecast"].state == "closed"
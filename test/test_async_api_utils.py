@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import pytest
+from weather_app.utils.api_utils import (
+    fetch_air_quality_data_async, fetch_forecast, fetch_forecast_async, fetch_historical_data_async,
+    invalidate_weather_cache, quota_governor
+)
+from weather_app.utils.async_upstream_client import AsyncUpstreamClient, get_async_upstream_client, reset_async_upstream_client
+from weather_app.utils.quota import INTERACTIVE
+
+AIR_QUALITY_PAYLOAD = {
+    "list": [
+        {
+            "main": {"aqi": 2},
+            "components": {"pm10": 10, "pm2_5": 5},
+        }
+    ]
+}
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    """Starts each test with an empty cache, ample quota and a new async client."""
+    invalidate_weather_cache()
+    quota_governor.configure(per_minute=100000, per_day=1000000)
+    reset_async_upstream_client()
+    yield
+    invalidate_weather_cache()
+    reset_async_upstream_client()
+
+@pytest.fixture
+def mock_fetch_once(mocker):
+    """Replaces the single-request primitive of the async client."""
+    calls = []
+
+    async def fetch_once(self, url):
+        calls.append(url)
+        await asyncio.sleep(0.05)
+        return 200, {}, AIR_QUALITY_PAYLOAD
+
+    mocker.patch.object(AsyncUpstreamClient, "_fetch_once", fetch_once)
+    return calls
+
+def test_fetch_air_quality_data_async(mock_fetch_once):
+    """Test fetching air quality data asynchronously."""
+    data = asyncio.run(fetch_air_quality_data_async(40.7128, -74.0060))
+    assert data["aqi"] == 2
+    assert data["pollutants"]["pm10"] == 10
+
+def test_fetch_historical_data_async(mock_fetch_once):
+    """Test fetching historical weather data asynchronously."""
+    data = asyncio.run(fetch_historical_data_async(40.7128, -74.0060))
+    assert "list" in data
+
+def test_fetch_forecast_async_shares_sync_cache(mock_fetch_once):
+    """Test that async fetches fill the cache used by the sync fetcher."""
+    data = asyncio.run(fetch_forecast_async(40.7128, -74.0060))
+    assert fetch_forecast(40.7128, -74.0060) == data
+    assert len(mock_fetch_once) == 1
+
+def test_concurrent_async_fetches_coalesced(mock_fetch_once):
+    """Test that concurrent async fetches across event loops share one upstream call."""
+    async def many():
+        return await asyncio.gather(*(fetch_forecast_async(48.8566, 2.3522) for _ in range(20)))
+
+    results = asyncio.run(many())
+    assert len(mock_fetch_once) == 1
+    assert all(result is results[0] for result in results)
+    assert get_async_upstream_client().get_stats()["coalescing"]["coalesced"] == 19
+
+def test_async_fetch_retries_then_fails(mocker):
+    """Test that persistent 5xx responses surface as a fetch error after retries."""
+    calls = []
+
+    async def fetch_once(self, url):
+        calls.append(url)
+        return 503, {}, None
+
+    mocker.patch.object(AsyncUpstreamClient, "_fetch_once", fetch_once)
+    mocker.patch("weather_app.utils.async_upstream_client.backoff_delay", return_value=0)
+    with pytest.raises(Exception, match="Failed to fetch weather forecast data."):
+        asyncio.run(fetch_forecast_async(40.7128, -74.0060))
+    assert len(calls) == 3
+
+def test_cancelled_waiter_does_not_cancel_shared_call(mock_fetch_once):
+    """Test that a caller giving up on a coalesced fetch leaves the call running for the others."""
+    async def impatient_and_patient():
+        impatient = asyncio.ensure_future(fetch_forecast_async(51.5074, -0.1278))
+        patient = asyncio.ensure_future(fetch_forecast_async(51.5074, -0.1278))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        return await patient
+
+    assert "list" in asyncio.run(impatient_and_patient())
+    assert len(mock_fetch_once) == 1
+
+def test_async_quota_waits_on_dedicated_threads(mock_fetch_once, mocker):
+    """Test that async fetches wait for quota on the bounded quota threads, within the caller's deadline."""
+    waits = []
+
+    def acquire(priority, deadline):
+        waits.append((threading.current_thread().name, deadline))
+
+    mocker.patch.object(quota_governor, "acquire", side_effect=acquire)
+    asyncio.run(fetch_forecast_async(40.7128, -74.0060))
+    [(thread, deadline)] = waits
+    assert thread.startswith("quota-wait")
+    assert 0 < deadline <= quota_governor.deadlines[INTERACTIVE]
@@ -0,0 +1,207 @@
+import threading
+import pytest
+from app import create_app
+from config import TestConfig
+from weather_app.models.backfill_model import BackfillJob, BackfillTask
+from weather_app.models.location_model import Location
+from weather_app.models.observation_model import HistoricalObservation
+from weather_app.utils.backfill import BackfillRunner
+from weather_app.utils.db import db
+from weather_app.utils.quota import QuotaExceededError
+
+HOUR = 3600
+START = 1_700_000_000 - 1_700_000_000 % HOUR
+
+@pytest.fixture
+def app(tmp_path):
+    """Flask app on a file database (shared by the worker threads) with two locations."""
+    class BackfillConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'backfill.db'}"
+
+    app = create_app(BackfillConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Location(city="Boston", latitude=42.3601, longitude=-71.0589),
+            Location(city="New York", latitude=40.7128, longitude=-74.0060),
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def timemachine(dt):
+    return {"data": [{"dt": dt, "temp": 10.0}]}
+
+@pytest.fixture
+def mock_history(mocker):
+    """Mocks the upstream timemachine call, answering for the requested hour."""
+    return mocker.patch(
+        "weather_app.utils.backfill.fetch_historical_data",
+        side_effect=lambda lat, lon, dt: timemachine(dt),
+    )
+
+def test_backfill_loads_every_hour(app, mock_history):
+    """Test that a job fetches each missing hour once per location and completes."""
+    runner = BackfillRunner(app, workers=2, batch_hours=4)
+    HistoricalObservation.bulk_insert(HistoricalObservation.rows_from_timemachine(1, timemachine(START)))
+
+    job = runner.submit([1, 2], START, START + 10 * HOUR)
+    assert runner.wait(job.id, timeout=10)
+
+    status = runner.get_status(job.id)
+    assert status["status"] == "completed"
+    assert status["hours_total"] == status["hours_done"] == 20
+    assert status["percent_done"] == 100.0
+    assert status["hours_per_second"] > 0
+    assert mock_history.call_count == 19  # the stored hour is skipped
+    assert HistoricalObservation.query.count() == 20
+    runner.shutdown()
+
+def test_backfill_resumes_from_cursor(app, mock_history):
+    """Test that a restarted runner continues a job from its last written batch."""
+    job = BackfillJob.create_job([1], START, START + 6 * HOUR)
+    task = BackfillTask.query.one()
+    task.cursor = START + 4 * HOUR
+    job.status = "running"
+    db.session.commit()
+
+    runner = BackfillRunner(app, workers=1)
+    assert runner.resume() == 1
+    assert runner.wait(job.id, timeout=10)
+    assert sorted(call.args[2] for call in mock_history.call_args_list) == [START + 4 * HOUR, START + 5 * HOUR]
+    runner.shutdown()
+
+def test_backfill_claims_each_job_once(app, mock_history):
+    """Test that of two runners on one database only the lease holder runs a job, until its lease expires."""
+    job = BackfillJob.create_job([1], START, START + 2 * HOUR)
+    holder, other = BackfillRunner(app, workers=1), BackfillRunner(app, workers=1)
+    assert BackfillJob.claim(job.id, holder.owner, 60)
+    assert other.resume() == 0
+    assert not BackfillJob.claim(job.id, other.owner, 60)
+
+    BackfillJob.query.filter_by(id=job.id).update({"lease_until": 0})
+    db.session.commit()
+    assert other.resume() == 1
+    assert other.wait(job.id, timeout=10)
+    assert BackfillJob.get_job(job.id).status == "completed"
+    assert mock_history.call_count == 2
+    other.shutdown()
+    holder.shutdown()
+    assert BackfillJob.get_job(job.id).owner is None
+
+def test_upgrade_schema_adds_lease_columns(app):
+    """Test that a jobs table created before leases existed gains the lease columns at startup."""
+    from weather_app.utils.db import upgrade_schema
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE backfill_tasks")
+        connection.exec_driver_sql("DROP TABLE backfill_jobs")
+        connection.exec_driver_sql(
+            "CREATE TABLE backfill_jobs (id INTEGER PRIMARY KEY, status VARCHAR(16) NOT NULL, start_ts INTEGER NOT NULL, "
+            "end_ts INTEGER NOT NULL, created_at INTEGER NOT NULL, finished_at INTEGER, error TEXT)"
+        )
+    upgrade_schema()
+    db.create_all()
+    job = BackfillJob.create_job([1], START, START + HOUR)
+    assert BackfillJob.claim(job.id, "worker", 60)
+
+def test_backfill_waits_out_quota(app, mocker):
+    """Test that quota exhaustion delays a task instead of failing it."""
+    responses = iter([QuotaExceededError("no quota"), timemachine(START)])
+
+    def fetch(lat, lon, dt):
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    mocker.patch("weather_app.utils.backfill.fetch_historical_data", side_effect=fetch)
+    runner = BackfillRunner(app, workers=1, retry_wait=0.01)
+    job = runner.submit([1], START, START + HOUR)
+    assert runner.wait(job.id, timeout=10)
+    assert runner.get_status(job.id)["status"] == "completed"
+    runner.shutdown()
+
+def test_backfill_cancel(app, mocker):
+    """Test that cancelling stops running tasks and keeps written batches."""
+    release = threading.Event()
+
+    def slow_fetch(lat, lon, dt):
+        if dt >= START + 2 * HOUR:
+            release.wait(5)
+        return timemachine(dt)
+
+    mocker.patch("weather_app.utils.backfill.fetch_historical_data", side_effect=slow_fetch)
+    runner = BackfillRunner(app, workers=1, batch_hours=1)
+    job = runner.submit([1], START, START + 24 * HOUR)
+    runner.cancel(job.id)
+    release.set()
+    assert runner.wait(job.id, timeout=10)
+
+    status = runner.get_status(job.id)
+    assert status["status"] == "cancelled"
+    assert status["hours_done"] < 24
+    with pytest.raises(ValueError, match="already cancelled"):
+        runner.cancel(job.id)
+    runner.shutdown()
+
+def test_backfill_cancel_from_another_runner(app, mocker):
+    """Test that a cancel recorded by another process stops the running tasks after their batch."""
+    release = threading.Event()
+
+    def slow_fetch(lat, lon, dt):
+        if dt >= START + 2 * HOUR:
+            release.wait(5)
+        return timemachine(dt)
+
+    mocker.patch("weather_app.utils.backfill.fetch_historical_data", side_effect=slow_fetch)
+    runner, other = BackfillRunner(app, workers=1, batch_hours=1), BackfillRunner(app, workers=1)
+    job = runner.submit([1], START, START + 24 * HOUR)
+    other.cancel(job.id)
+    release.set()
+    assert runner.wait(job.id, timeout=10)
+
+    status = runner.get_status(job.id)
+    assert status["status"] == "cancelled"
+    assert status["hours_done"] < 24
+    runner.shutdown()
+    other.shutdown()
+
+def test_backfill_finish_keeps_cancel(app, mocker):
+    """Test that a job whose tasks all complete after a cancel from elsewhere stays cancelled."""
+    release = threading.Event()
+    mocker.patch("weather_app.utils.backfill.fetch_historical_data",
+                 side_effect=lambda lat, lon, dt: release.wait(5) and timemachine(dt))
+    runner = BackfillRunner(app, workers=1, batch_hours=24)
+    job = runner.submit([1], START, START + 2 * HOUR)
+    BackfillRunner(app, workers=1).cancel(job.id)
+    release.set()
+    assert runner.wait(job.id, timeout=10)
+    assert BackfillJob.get_job(job.id).status == "cancelled"
+    runner.shutdown()
+
+def test_backfill_rejects_unknown_locations(app):
+    """Test validation of submitted jobs."""
+    runner = BackfillRunner(app, workers=1)
+    with pytest.raises(ValueError, match="not found"):
+        runner.submit([1, 99], START, START + HOUR)
+    with pytest.raises(ValueError, match="Invalid time range"):
+        runner.submit([1], START, START)
+    runner.shutdown()
+
+def test_backfill_routes(app, mock_history):
+    """Test submitting and polling a job over HTTP."""
+    runner = BackfillRunner(app, workers=1)
+    app.extensions["backfill_runner"] = runner
+    client = app.test_client()
+
+    response = client.post("/api/submit-backfill", json={"location_ids": [1], "start": START, "end": START + 2 * HOUR})
+    assert response.status_code == 202
+    job_id = response.get_json()["job"]["id"]
+    assert runner.wait(job_id, timeout=10)
+
+    response = client.get(f"/api/get-backfill/{job_id}")
+    assert response.get_json()["job"]["status"] == "completed"
+    assert client.post(f"/api/cancel-backfill/{job_id}").status_code == 400
+    assert client.post("/api/submit-backfill", json={"location_ids": []}).status_code == 400
+    runner.shutdown()
@@ -0,0 +1,88 @@
+import pytest
+import threading
+from weather_app.utils.cache import TTLCache
+
+@pytest.fixture
+def clock(mocker):
+    """Controls the monotonic clock used by the cache."""
+    now = [1000.0]
+    mocker.patch("weather_app.utils.cache.time.monotonic", side_effect=lambda: now[0])
+    return now
+
+def test_get_and_set():
+    """Test storing and retrieving a value."""
+    cache = TTLCache("test", ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("missing") is None
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+def test_entries_expire(clock):
+    """Test that entries are dropped after their TTL."""
+    cache = TTLCache("test", ttl=60)
+    cache.set("a", 1)
+    clock[0] += 59
+    assert cache.get("a") == 1
+    clock[0] += 2
+    assert cache.get("a") is None
+    assert cache.get_stats()["expirations"] == 1
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted when full."""
+    cache = TTLCache("test", ttl=60, max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.get_stats()["evictions"] == 1
+
+def test_invalidate():
+    """Test removing single entries and entries matching a predicate."""
+    cache = TTLCache("test", ttl=60)
+    cache.set(("x", 1), 1)
+    cache.set(("x", 2), 2)
+    cache.set(("y", 1), 3)
+    assert cache.invalidate(("y", 1)) is True
+    assert cache.invalidate(("y", 1)) is False
+    assert cache.invalidate_where(lambda key: key[0] == "x") == 2
+    assert len(cache) == 0
+
+def test_invalid_size():
+    """Test that a non-positive size is rejected."""
+    with pytest.raises(ValueError, match="Invalid cache size: 0. Must be positive."):
+        TTLCache("test", ttl=60, max_size=0)
+
+def test_concurrent_access():
+    """Test that concurrent writers never exceed the size bound."""
+    cache = TTLCache("test", ttl=60, max_size=50)
+
+    def worker(offset):
+        for i in range(500):
+            cache.set(offset + i, i)
+            cache.get(offset + i // 2)
+
+    threads = [threading.Thread(target=worker, args=(n * 1000,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(cache) == 50
+    assert cache.get_stats()["evictions"] == 8 * 500 - 50
+
+def test_stale_entries(clock):
+    """Test that expired entries remain available as stale within the stale window."""
+    cache = TTLCache("test", ttl=60, stale_ttl=30)
+    cache.set("a", 1)
+    clock[0] += 70
+    assert cache.get("a") is None
+    assert cache.get_stale("a") == (1, 70)
+    clock[0] += 30
+    assert cache.get_stale("a") is None
+    assert cache.get("a") is None
+    assert cache.get_stats()["expirations"] == 1
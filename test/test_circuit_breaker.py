@@ -0,0 +1,82 @@
+import pytest
+from weather_app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+@pytest.fixture
+def clock(mocker):
+    """Controls the monotonic clock used by the breaker."""
+    now = [1000.0]
+    mocker.patch("weather_app.utils.circuit_breaker.time.monotonic", side_effect=lambda: now[0])
+    return now
+
+def fail():
+    raise ConnectionError("upstream down")
+
+def trip(breaker):
+    """Records enough failures to open the breaker."""
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+
+def test_opens_after_threshold(clock):
+    """Test that consecutive failures open the circuit and calls then fail fast."""
+    breaker = CircuitBreaker("forecast", failure_threshold=3, recovery_timeout=30)
+    trip(breaker)
+    assert breaker.state == OPEN
+
+    calls = []
+    with pytest.raises(CircuitOpenError, match="Upstream forecast is unavailable"):
+        breaker.call(lambda: calls.append(1))
+    assert calls == []
+    assert breaker.get_stats()["total_rejections"] == 1
+
+def test_success_resets_failure_count(clock):
+    """Test that a success between failures keeps the circuit closed."""
+    breaker = CircuitBreaker("forecast", failure_threshold=2)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.call(lambda: "ok") == "ok"
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == CLOSED
+
+def test_half_open_probe_closes_on_success(clock):
+    """Test that a successful probe after the recovery timeout closes the circuit."""
+    breaker = CircuitBreaker("forecast", failure_threshold=1, recovery_timeout=30)
+    trip(breaker)
+    clock[0] += 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+
+def test_half_open_probe_reopens_on_failure(clock):
+    """Test that a failed probe re-opens the circuit for another recovery period."""
+    breaker = CircuitBreaker("forecast", failure_threshold=1, recovery_timeout=30)
+    trip(breaker)
+    clock[0] += 30
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+    assert breaker.get_stats()["retry_after"] == 30
+
+def test_half_open_allows_single_probe(clock):
+    """Test that only one probe is let through while half-open."""
+    breaker = CircuitBreaker("forecast", failure_threshold=1, recovery_timeout=30)
+    trip(breaker)
+    clock[0] += 30
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+def test_non_failures_do_not_trip(clock):
+    """Test that exceptions classified as healthy responses do not open the circuit."""
+    breaker = CircuitBreaker("forecast", failure_threshold=1)
+    with pytest.raises(ValueError):
+        breaker.call(lambda: (_ for _ in ()).throw(ValueError("bad request")), is_failure=lambda e: False)
+    assert breaker.state == CLOSED
+
+def test_reset(clock):
+    """Test that reset closes an open circuit."""
+    breaker = CircuitBreaker("forecast", failure_threshold=1)
+    trip(breaker)
+    breaker.reset()
+    assert breaker.state == CLOSED
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from app import create_app
+from config import TestConfig
+from weather_app.models.favorites_model import FavoritesModel
+from weather_app.models.location_model import Location
+from weather_app.utils.circuit_breaker import CircuitOpenError
+from weather_app.utils.dashboard import build_dashboard, is_complete
+from weather_app.utils.db import db
+from weather_app.utils.quota import QuotaExceededError
+
+LOCATIONS = [
+    {"id": 1, "city": "Boston", "latitude": 42.3601, "longitude": -71.0589},
+    {"id": 2, "city": "New York", "latitude": 40.7128, "longitude": -74.0060},
+    {"id": 3, "city": "London", "latitude": 51.5074, "longitude": -0.1278},
+]
+
+@pytest.fixture
+def app():
+    """Flask app with a user favoriting three locations."""
+    app = create_app(TestConfig)
+    app.config['DASHBOARD_DEADLINE'] = 0.3
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Location(city=l["city"], latitude=l["latitude"], longitude=l["longitude"])
+                            for l in LOCATIONS])
+        db.session.commit()
+        db.session.add_all([FavoritesModel(user_id=1, location_id=l["id"]) for l in LOCATIONS])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def upstream(mocker):
+    """Async fetchers whose behaviour depends on the city's latitude."""
+    stale = CircuitOpenError("air_quality", 30)
+    stale.stale_payload, stale.age = {"aqi": 3}, 12.4
+
+    async def forecast(latitude, longitude):
+        if latitude > 50:
+            await asyncio.sleep(5)
+        return {"lat": latitude}
+
+    async def air_quality(latitude, longitude):
+        if latitude < 41:
+            raise stale
+        if latitude > 50:
+            raise QuotaExceededError("no quota")
+        return {"aqi": 1}
+
+    mocker.patch("weather_app.utils.dashboard.fetch_forecast_async", side_effect=forecast)
+    mocker.patch("weather_app.utils.dashboard.fetch_air_quality_data_async", side_effect=air_quality)
+
+def test_build_dashboard_partial_results(upstream):
+    """Test that each part reports its own outcome and slow fetches time out at the deadline."""
+    items = asyncio.run(build_dashboard(LOCATIONS, concurrency=4, deadline=0.2))
+    assert [item["location"]["id"] for item in items] == [1, 2, 3]
+    assert items[0]["forecast"] == {"status": "ok", "data": {"lat": 42.3601}}
+    assert items[0]["air_quality"] == {"status": "ok", "data": {"aqi": 1}}
+    assert items[1]["air_quality"] == {"status": "stale", "data": {"aqi": 3}, "age": 12}
+    assert items[2]["forecast"] == {"status": "timeout"}
+    assert items[2]["air_quality"]["status"] == "rate_limited"
+    assert "id" in items[0]["grid_cell"]
+    assert not is_complete(items)
+    assert is_complete(items[:2])
+
+def test_build_dashboard_bounded_concurrency(mocker):
+    """Test that no more than ``concurrency`` fetches are in flight at once."""
+    running, peak = 0, 0
+
+    async def fetch(latitude, longitude):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {}
+
+    mocker.patch("weather_app.utils.dashboard.fetch_forecast_async", side_effect=fetch)
+    mocker.patch("weather_app.utils.dashboard.fetch_air_quality_data_async", side_effect=fetch)
+    locations = [dict(LOCATIONS[0], id=n, longitude=n * 5.0) for n in range(10)]
+    items = asyncio.run(build_dashboard(locations, concurrency=3, deadline=5))
+    assert peak == 3
+    assert is_complete(items)
+
+def test_build_dashboard_invalid_arguments():
+    """Test that invalid settings are rejected."""
+    with pytest.raises(ValueError):
+        asyncio.run(build_dashboard(LOCATIONS, concurrency=0))
+    with pytest.raises(ValueError):
+        asyncio.run(build_dashboard(LOCATIONS, deadline=0))
+
+def test_dashboard_route(client, upstream):
+    """Test the dashboard endpoint returns partial results within the deadline."""
+    response = client.get('/api/get-dashboard/1')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["complete"] is False
+    assert [item["location"]["city"] for item in data["items"]] == ["Boston", "New York", "London"]
+    assert data["items"][2]["forecast"]["status"] == "timeout"
+
+def test_dashboard_route_no_favorites(client):
+    """Test that a user without favorites gets a 404."""
+    assert client.get('/api/get-dashboard/2').status_code == 404
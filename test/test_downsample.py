@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from app import create_app
+from config import TestConfig
+from weather_app.models.location_model import Location
+from weather_app.models.observation_model import HistoricalObservation
+from weather_app.utils.db import db
+from weather_app.utils.downsample import get_history, lttb
+
+START = 1_700_000_000 - 1_700_000_000 % 3600
+HOURS = 1000
+
+@pytest.fixture
+def app():
+    """Flask app with 1000 hours of history containing one sharp spike."""
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Location(city="Boston", latitude=42.3601, longitude=-71.0589))
+        db.session.commit()
+        temps = 280 + 5 * np.sin(np.arange(HOURS) / 24)
+        temps[500] = 320.0
+        HistoricalObservation.bulk_insert([
+            {"location_id": 1, "ts": START + 3600 * n, "temp": float(temps[n]), "payload": "{}"}
+            for n in range(HOURS)
+        ])
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_lttb_keeps_endpoints_and_peaks():
+    """Test that LTTB keeps the first, last and extreme points within budget."""
+    x = np.arange(1000)
+    y = np.sin(x / 50.0)
+    y[321] = 10.0
+    kept = lttb(x, y, 50)
+    assert len(kept) == 50
+    assert kept[0] == 0 and kept[-1] == 999
+    assert np.all(np.diff(kept) > 0)
+    assert 321 in kept
+
+def test_lttb_small_series_unchanged():
+    """Test that series within the budget are returned whole."""
+    assert lttb(np.arange(5), np.arange(5), 10).tolist() == [0, 1, 2, 3, 4]
+
+def test_bucket_history(app):
+    """Test database-side bucket aggregation."""
+    result = get_history(1, "temp", START, START + 3600 * HOURS, 100, "bucket")
+    assert len(result["points"]) == 100
+    assert result["source_points"] == HOURS
+    assert all(point["count"] == 10 for point in result["points"])
+    assert max(point["max"] for point in result["points"]) == 320.0
+
+def test_lttb_history(app):
+    """Test shape-preserving selection from storage."""
+    result = get_history(1, "temp", START, START + 3600 * HOURS, 60, "lttb")
+    assert len(result["points"]) == 60
+    assert {"ts": START + 3600 * 500, "value": 320.0} in result["points"]
+
+def test_invalid_arguments(app):
+    """Test validation of method, field and budget."""
+    with pytest.raises(ValueError, match="method"):
+        get_history(1, "temp", START, START + 3600, 10, "median")
+    with pytest.raises(ValueError, match="field"):
+        get_history(1, "payload", START, START + 3600, 10)
+    with pytest.raises(ValueError, match="max_points"):
+        get_history(1, "temp", START, START + 3600, 2)
+
+def test_get_history_route(app):
+    """Test the history endpoint."""
+    client = app.test_client()
+    response = client.get(f"/api/get-history/1?start={START}&end={START + 3600 * HOURS}&max_points=50&method=lttb")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert len(body["points"]) == 50 and body["source_points"] == HOURS
+    assert client.get(f"/api/get-history/1?start={START}&end={START}").status_code == 400
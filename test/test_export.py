@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+import pytest
+from app import create_app
+from config import TestConfig
+from weather_app.models.location_model import Location
+from weather_app.models.observation_model import HistoricalObservation
+from weather_app.utils.db import db
+from weather_app.utils.export import EXPORT_COLUMNS, export_history, iter_history
+
+START = 1_700_000_000 - 1_700_000_000 % 3600
+
+@pytest.fixture
+def app():
+    """Flask app with ten hours of history for each of two locations."""
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Location(city="Boston", latitude=42.3601, longitude=-71.0589),
+            Location(city="New York", latitude=40.7128, longitude=-74.0060),
+        ])
+        db.session.commit()
+        HistoricalObservation.bulk_insert([
+            {"location_id": location_id, "ts": START + 3600 * n, "temp": 270.0 + n, "payload": "{}"}
+            for location_id in (1, 2) for n in range(10)
+        ])
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_iter_history_batches_in_order(app, mocker):
+    """Test that keyset batches return every row exactly once, in order."""
+    spy = mocker.spy(db.session, "rollback")
+    rows = list(iter_history(None, None, None, batch_size=3))
+    assert [(row[0], row[1]) for row in rows] == [
+        (location_id, START + 3600 * n) for location_id in (1, 2) for n in range(10)
+    ]
+    assert spy.call_count == 7  # ceil(20 / 3) batches
+
+def test_export_is_lazy(app, mocker):
+    """Test that nothing is queried until the export is consumed."""
+    spy = mocker.spy(db.session, "query")
+    chunks = export_history("ndjson", batch_size=2)
+    assert spy.call_count == 0
+    first = json.loads(next(chunks))
+    assert first["location_id"] == 1 and first["ts"] == START
+    assert spy.call_count == 1
+
+def test_export_filters(app):
+    """Test location and range filters."""
+    rows = list(iter_history([2], START + 3600 * 8, START + 3600 * 20))
+    assert [(row[0], row[1]) for row in rows] == [(2, START + 3600 * 8), (2, START + 3600 * 9)]
+
+def test_export_route_csv(app):
+    """Test streaming a CSV export over HTTP."""
+    response = app.test_client().get(f"/api/export-history?format=csv&location_ids=1&start={START}")
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    assert response.is_streamed
+    reader = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert reader[0] == list(EXPORT_COLUMNS)
+    assert len(reader) == 11
+    assert reader[1][:3] == ["1", str(START), "270.0"]
+
+def test_export_route_ndjson_and_errors(app):
+    """Test NDJSON export, empty exports and invalid requests."""
+    client = app.test_client()
+    lines = client.get("/api/export-history?location_ids=2").get_data(as_text=True).splitlines()
+    assert len(lines) == 10 and all(json.loads(line)["location_id"] == 2 for line in lines)
+
+    empty = client.get("/api/export-history?format=csv&location_ids=99").get_data(as_text=True)
+    assert empty.strip() == ",".join(EXPORT_COLUMNS)
+
+    assert client.get("/api/export-history?format=xml").status_code == 400
+    assert client.get("/api/export-history?location_ids=a,b").status_code == 400
+
+def test_export_route_unexpected_error(app, mocker):
+    """Test that an unexpected failure setting up an export is reported as a 500."""
+    mocker.patch("app.export_history", side_effect=RuntimeError("database is locked"))
+    response = app.test_client().get("/api/export-history")
+    assert response.status_code == 500
+    assert response.get_json() == {"error": "database is locked"}
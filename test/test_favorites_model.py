@@ -1,4 +1,6 @@
 import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
 from app import create_app
 from weather_app.models.favorites_model import FavoritesModel
 from weather_app.models.location_model import Location
@@ -101,6 +103,137 @@ def test_get_favorites_empty(app):
         with pytest.raises(ValueError, match="Favorites list is empty"):
             FavoritesModel.get_favorites_by_user_id(user_id=1)
 
+def test_get_favorite_locations_single_query(app, setup_data):
+    """
+    Test that favorite locations are retrieved with one query however many there are.
+    """
+    with app.app_context():
+        db.session.add_all([Location(city=f"City {n}", latitude=0.0, longitude=n / 2) for n in range(200)])
+        db.session.commit()
+        location_ids = [location.id for location in Location.query.order_by(Location.id)]
+        db.session.add_all([FavoritesModel(user_id=1, location_id=location_id) for location_id in location_ids])
+        db.session.commit()
+
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            favorites = FavoritesModel.get_favorite_locations(user_id=1)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        assert len(statements) == 1
+        assert [favorite["id"] for favorite in favorites] == location_ids
+        assert favorites[0] == {"id": location_ids[0], "city": "Boston", "latitude": 42.3601, "longitude": -71.0589}
+
+def test_get_favorite_locations_empty(app):
+    """
+    Test retrieving favorite locations for a user with no favorites raises an error.
+    """
+    with app.app_context():
+        with pytest.raises(ValueError, match="Favorites list is empty"):
+            FavoritesModel.get_favorite_locations(user_id=1)
+
+def test_favorites_unique_constraint(app, setup_data):
+    """
+    Test that the database rejects a duplicate favorite that bypasses add_favorite.
+    """
+    with app.app_context():
+        location1 = setup_data["location1"]
+        FavoritesModel.add_favorite(user_id=1, location_id=location1.id)
+        db.session.add(FavoritesModel(user_id=1, location_id=location1.id))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+def test_unique_index_added_to_existing_database(app, setup_data):
+    """
+    Test that a favorites table created without the unique index gains it, with duplicates removed.
+    """
+    from weather_app.utils.db import upgrade_schema
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql("DROP TABLE favorites")
+            connection.exec_driver_sql(
+                "CREATE TABLE favorites (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, location_id INTEGER NOT NULL)"
+            )
+            connection.exec_driver_sql("INSERT INTO favorites (user_id, location_id) VALUES (1, 1), (1, 2), (1, 1)")
+        upgrade_schema()
+        assert [(f.id, f.location_id) for f in FavoritesModel.query.order_by(FavoritesModel.id)] == [(1, 1), (2, 2)]
+        with pytest.raises(ValueError, match="Favorite already exists"):
+            FavoritesModel.add_favorite(user_id=1, location_id=1)
+
+######################################################
+#    Bulk Favorites
+######################################################
+
+def test_add_favorites_bulk(app, setup_data):
+    """
+    Test adding many favorites at once skips existing ones and uses a fixed number of statements.
+    """
+    with app.app_context():
+        db.session.add_all([Location(city=f"City {n}", latitude=0.0, longitude=n / 2) for n in range(100)])
+        db.session.commit()
+        FavoritesModel.add_favorite(user_id=1, location_id=1)
+
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            result = FavoritesModel.add_favorites(user_id=1, location_ids=list(range(1, 103)) + [5])
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        assert result["added"] == list(range(2, 103))
+        assert result["removed"] == []
+        assert result["favorites"] == list(range(1, 103))
+        assert len(statements) <= 3
+        assert len(FavoritesModel.get_favorites_by_user_id(user_id=1)) == 102
+
+def test_add_favorites_missing_location(app, setup_data):
+    """
+    Test that a bulk add naming an unknown location changes nothing.
+    """
+    with app.app_context():
+        with pytest.raises(ValueError, match=r"Locations not found: \[999\]"):
+            FavoritesModel.add_favorites(user_id=1, location_ids=[1, 999])
+        with pytest.raises(ValueError, match="Favorites list is empty"):
+            FavoritesModel.get_favorites_by_user_id(user_id=1)
+
+def test_remove_and_replace_favorites(app, setup_data):
+    """
+    Test bulk removal and replacement touch only the difference.
+    """
+    with app.app_context():
+        db.session.add(Location(city="London", latitude=51.5074, longitude=-0.1278))
+        db.session.commit()
+        FavoritesModel.add_favorites(user_id=1, location_ids=[1, 2])
+
+        result = FavoritesModel.replace_favorites(user_id=1, location_ids=[3, 2])
+        assert result == {"added": [3], "removed": [1], "favorites": [2, 3]}
+
+        result = FavoritesModel.remove_favorites(user_id=1, location_ids=[2, 1])
+        assert result == {"added": [], "removed": [2], "favorites": [3]}
+        assert FavoritesModel.get_favorites_by_user_id(user_id=1) == [3]
+
+def test_bulk_favorites_routes(app, setup_data):
+    """
+    Test the bulk favorites endpoints.
+    """
+    client = app.test_client()
+    response = client.post('/api/add-favorites', json={'user_id': 1, 'location_ids': [1, 2]})
+    assert response.status_code == 200
+    assert response.get_json()["favorites"] == [1, 2]
+
+    response = client.put('/api/replace-favorites', json={'user_id': 1, 'location_ids': [2]})
+    assert response.get_json()["removed"] == [1]
+
+    response = client.post('/api/remove-favorites', json={'user_id': 1, 'location_ids': [2]})
+    assert response.get_json()["favorites"] == []
+
+    assert client.post('/api/add-favorites', json={'user_id': 1, 'location_ids': [999]}).status_code == 400
+    assert client.post('/api/add-favorites', json={'user_id': 1}).status_code == 400
+
 ######################################################
 #    Remove Favorites
 ######################################################
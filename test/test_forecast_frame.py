@@ -0,0 +1,94 @@
+import json
+import math
+import pytest
+from weather_app.utils.forecast_frame import MISSING_INT, ForecastFrame
+
+CLEAR = [{"id": 800, "main": "Clear", "description": "clear sky", "icon": "01d"}]
+RAIN = [{"id": 500, "main": "Rain", "description": "light rain", "icon": "10d"}]
+
+def onecall_payload():
+    """A OneCall response covering every section, with a few irregular fields."""
+    return {
+        "lat": 42.36,
+        "lon": -71.06,
+        "timezone": "America/New_York",
+        "timezone_offset": -14400,
+        "current": {
+            "dt": 1700000000, "sunrise": 1699990000, "sunset": 1700030000, "temp": 280.5, "feels_like": 278.1,
+            "pressure": 1012, "humidity": 80, "dew_point": 277.0, "uvi": 0, "clouds": 75, "visibility": 10000,
+            "wind_speed": 4.1, "wind_deg": 250, "weather": CLEAR,
+        },
+        "minutely": [{"dt": 1700000000 + 60 * n, "precipitation": 0} for n in range(3)],
+        "hourly": [
+            {
+                "dt": 1700000000 + 3600 * n, "temp": 280.0 + n, "feels_like": 279.0, "pressure": 1012,
+                "humidity": 80, "dew_point": 277.0, "uvi": 0.2, "clouds": 75, "visibility": 10000,
+                "wind_speed": 4.1, "wind_deg": 250, "wind_gust": 7.5, "pop": 0.4,
+                "weather": RAIN if n % 2 else CLEAR,
+                **({"rain": {"1h": 0.3}} if n % 2 else {}),
+            }
+            for n in range(4)
+        ],
+        "daily": [
+            {
+                "dt": 1700020000, "sunrise": 1699990000, "sunset": 1700030000, "moonrise": 0, "moonset": 0,
+                "moon_phase": 0.5, "summary": "Expect a day of partly cloudy with rain",
+                "temp": {"day": 281.0, "min": 275.0, "max": 283.0, "night": 276.0, "eve": 279.0, "morn": 275.5},
+                "feels_like": {"day": 279.0, "night": 274.0, "eve": 277.0, "morn": 273.0},
+                "pressure": 1012, "humidity": 70, "dew_point": 275.0, "wind_speed": 5.0, "wind_deg": 240,
+                "clouds": 60, "pop": 1, "rain": 2.5, "uvi": 1.2, "weather": RAIN,
+            }
+        ],
+        "alerts": [{"sender_name": "NWS", "event": "Wind Advisory", "start": 1700000000, "end": 1700040000}],
+    }
+
+def test_round_trip():
+    """Test that the frame serializes back to the original payload."""
+    payload = onecall_payload()
+    original = json.dumps(payload, sort_keys=True)
+    frame = ForecastFrame.from_payload(payload)
+    assert frame.to_dict() == payload
+    # Parsing does not modify the payload it was given
+    assert json.dumps(payload, sort_keys=True) == original
+
+def test_columns_are_typed_arrays():
+    """Test access to sections as contiguous columns."""
+    frame = ForecastFrame.from_payload(onecall_payload())
+    assert frame.sections() == ["current", "hourly", "minutely", "daily"]
+    assert len(frame) == 1 + 4 + 3 + 1
+    temps = frame.column("hourly", "temp")
+    assert temps.typecode == "d"
+    assert list(temps) == [280.0, 281.0, 282.0, 283.0]
+    assert frame.column("daily", "temp.max")[0] == 283.0
+    rain = frame.column("hourly", "rain.1h")
+    assert math.isnan(rain[0]) and rain[1] == 0.3
+    assert all(math.isnan(value) for value in frame.column("hourly", "snow.1h"))
+    assert frame.column("current", "wind_gust").typecode == "d"
+    with pytest.raises(KeyError):
+        frame.column("hourly", "unknown")
+
+def test_irregular_values_round_trip():
+    """Test that values a column cannot hold exactly are preserved."""
+    payload = {
+        "lat": 1.0, "lon": 2.0,
+        "hourly": [
+            {"dt": 1, "humidity": 50.5, "pressure": MISSING_INT, "rain": {"1h": 1.0, "3h": 2.0}, "extra": True},
+            {"dt": 2, "humidity": None, "temp": 10, "weather": []},
+        ],
+    }
+    assert ForecastFrame.from_payload(payload).to_dict() == payload
+
+def test_ints_in_float_columns_keep_their_type():
+    """Test that JSON integers stored in float columns come back as integers, not floats."""
+    payload = {"hourly": [{"dt": 1, "uvi": 0, "temp": 280.5}, {"dt": 2, "uvi": 0.4, "temp": 281}]}
+    rebuilt = ForecastFrame.from_payload(payload).to_dict()
+    assert json.dumps(rebuilt, sort_keys=True) == json.dumps(payload, sort_keys=True)
+
+def test_frame_is_smaller_than_payload():
+    """Test that repeated weather conditions are interned and the stored data is compact."""
+    payload = onecall_payload()
+    payload["hourly"] = payload["hourly"] * 12
+    frame = ForecastFrame.from_payload(payload)
+    assert len(frame._conditions) == 2
+    assert frame.nbytes < len(json.dumps(payload)) / 2
+    assert not hasattr(frame, "__dict__")
@@ -0,0 +1,120 @@
+import pytest
+from app import create_app
+from config import TestConfig
+from weather_app.models.location_model import Location
+from weather_app.utils.api_utils import configure_grid, fetch_forecast, forecast_cache, grid, invalidate_weather_cache
+from weather_app.utils.db import db
+from weather_app.utils.grid import SpatialGrid, geohash_bounds, geohash_encode
+
+@pytest.fixture(autouse=True)
+def default_grid():
+    """Restores the default grid after each test."""
+    yield
+    configure_grid({})
+    invalidate_weather_cache()
+
+@pytest.fixture
+def app():
+    """Flask app with three Boston-area locations and one in New York."""
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Location(city="Boston", latitude=42.3601, longitude=-71.0589),
+            Location(city="Boston Common", latitude=42.3550, longitude=-71.0656),
+            Location(city="Logan Airport", latitude=42.3656, longitude=-71.0096),
+            Location(city="New York", latitude=40.7128, longitude=-74.0060),
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_geohash_round_trip():
+    """Test geohash encoding against a known value and its bounding box."""
+    assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    min_lat, min_lon, max_lat, max_lon = geohash_bounds("u4pruy")
+    assert min_lat <= 57.64911 <= max_lat and min_lon <= 10.40744 <= max_lon
+
+def test_degree_cells():
+    """Test that points in the same bucket share a cell centred in it."""
+    grid = SpatialGrid("degrees", 0.1)
+    cell = grid.cell(42.3601, -71.0589)
+    assert cell == grid.cell(42.3550, -71.0656)
+    assert cell.latitude == 42.35 and cell.longitude == -71.05
+    assert grid.bounds(cell.id) == pytest.approx((42.3, -71.1, 42.4, -71.0))
+    assert grid.cell(42.36, -71.0) != cell
+
+def test_degree_cells_at_edges():
+    """Test that cells on the poles and the antimeridian have centres inside the valid ranges."""
+    grid = SpatialGrid("degrees", 0.01)
+    assert grid.cell(90.0, 0.0).latitude == 90.0
+    assert grid.cell(-90.0, 0.0).latitude == -89.995
+    assert grid.cell(0.0, 180.0) == grid.cell(0.0, -180.0)
+    assert grid.cell(0.0, 179.999).longitude == 179.995
+    assert SpatialGrid("degrees", 8).cell(0.0, 179.0).longitude == -180.0
+
+def test_invalid_grid():
+    """Test that invalid modes and precisions are rejected."""
+    with pytest.raises(ValueError):
+        SpatialGrid("hexagons")
+    with pytest.raises(ValueError):
+        SpatialGrid("geohash", 2.5)
+    with pytest.raises(ValueError):
+        SpatialGrid("degrees", 0)
+
+def test_summarize():
+    """Test the locations-per-cell statistics."""
+    coordinates = [(42.3601, -71.0589), (42.3550, -71.0656), (42.3656, -71.0096), (40.7128, -74.0060)]
+    stats = SpatialGrid("degrees", 0.1).summarize(coordinates)
+    assert stats["locations"] == 4
+    assert stats["cells"] == 2
+    assert stats["upstream_calls_saved"] == 2
+    assert stats["locations_per_cell"] == {1: 1, 3: 1}
+    assert stats["busiest_cells"][0]["locations"] == 3
+    assert 0 < stats["max_offset_km"] < 10
+
+def test_fetch_uses_cell_centre(mocker):
+    """Test that nearby coordinates share one fetch, made for the cell centre."""
+    configure_grid({"GRID_MODE": "degrees", "GRID_PRECISION": 0.1})
+    mock_get = mocker.patch("weather_app.utils.api_utils._upstream_json", return_value={"daily": []})
+    fetch_forecast(42.3601, -71.0589)
+    fetch_forecast(42.3550, -71.0656)
+    assert mock_get.call_count == 1
+    assert "lat=42.35&lon=-71.05" in mock_get.call_args.args[0]
+    assert len(forecast_cache) == 1
+
+def test_configure_grid_clears_cache(mocker):
+    """Test that changing the grid drops entries keyed by the old cells."""
+    mocker.patch("weather_app.utils.api_utils._upstream_json", return_value={"daily": []})
+    fetch_forecast(42.3601, -71.0589)
+    configure_grid({"GRID_MODE": "geohash", "GRID_PRECISION": 5})
+    assert grid.mode == "geohash"
+    assert len(forecast_cache) == 0
+
+def test_locations_in_cell(app):
+    """Test resolving a cell back to the saved locations inside it."""
+    coarse = SpatialGrid("degrees", 0.1)
+    cell_id = coarse.cell(42.3601, -71.0589).id
+    assert sorted(Location.get_ids_in_cell(coarse, cell_id)) == [1, 2, 3]
+
+def test_cell_lookup_index_added_to_existing_databases(app):
+    """Test that a locations table created without the coordinate index gains it."""
+    from sqlalchemy import inspect
+    from weather_app.utils.db import upgrade_schema
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql("DROP INDEX ix_locations_lat_lon")
+        upgrade_schema()
+        indexes = {index["name"]: index["column_names"] for index in inspect(db.engine).get_indexes("locations")}
+        assert indexes["ix_locations_lat_lon"] == ["latitude", "longitude"]
+
+def test_grid_stats_route(app):
+    """Test the grid statistics endpoint, including a preview of another grid."""
+    client = app.test_client()
+    response = client.get("/api/grid-stats?mode=degrees&precision=0.1")
+    assert response.status_code == 200
+    assert response.get_json()["grid"]["cells"] == 2
+
+    response = client.get("/api/grid-stats?mode=geohash&precision=20")
+    assert response.status_code == 400
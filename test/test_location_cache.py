@@ -0,0 +1,101 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from app import create_app
+from config import TestConfig
+from weather_app.models.location_model import Location
+from weather_app.utils.db import db
+from weather_app.utils.location_cache import LocalInvalidationChannel, LocationCache, location_cache
+
+@pytest.fixture
+def app():
+    """Flask app with one saved location."""
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Location(city="Boston", latitude=42.3601, longitude=-71.0589))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def statements(app):
+    """Records the SQL statements executed."""
+    executed = []
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(db.engine, "before_cursor_execute", record)
+
+def test_get_cached_reads_through_once(app, statements):
+    """Test that repeated lookups hit the database only once and return detached copies."""
+    first = Location.get_cached(1)
+    second = Location.get_cached(1)
+    assert first is second
+    assert first.to_dict() == {"id": 1, "city": "Boston", "latitude": 42.3601, "longitude": -71.0589}
+    assert object_session(first) is None
+    assert len(statements) == 1
+
+def test_get_cached_missing_is_not_cached(app, statements):
+    """Test that missing locations raise and are looked up again next time."""
+    for _ in range(2):
+        with pytest.raises(ValueError, match="Location 999 not found."):
+            Location.get_cached(999)
+    assert len(statements) == 2
+
+def test_delete_invalidates(app):
+    """Test that deleting a location drops its cached copy."""
+    Location.get_cached(1)
+    Location.delete_location(1)
+    with pytest.raises(ValueError):
+        Location.get_cached(1)
+
+def test_invalidation_channel_reaches_other_workers():
+    """Test that an invalidation published by one cache evicts the entry in another."""
+    channel = LocalInvalidationChannel()
+    worker_a, worker_b = LocationCache(), LocationCache()
+    worker_a.attach_channel(channel)
+    worker_b.attach_channel(channel)
+    worker_a.get(1, lambda location_id: "a")
+    worker_b.get(1, lambda location_id: "b")
+
+    worker_a.invalidate(1)
+    assert worker_b.get(1, lambda location_id: "reloaded") == "reloaded"
+    channel.publish("*")
+    assert worker_a.get(1, lambda location_id: "cleared") == "cleared"
+
+def test_change_log_for_indexes():
+    """Test that received invalidations can be caught up on until the log overflows or everything is cleared."""
+    channel = LocalInvalidationChannel()
+    cache = LocationCache(log_size=2)
+    cache.attach_channel(channel)
+    cache.invalidate_many([1, 2])
+    channel.publish("3")
+    assert cache.changes_since(0) == (2, {1, 2, 3})
+    channel.publish("4")
+    assert cache.changes_since(0) == (3, None)
+    assert cache.changes_since(2) == (3, {4})
+    channel.publish("*")
+    assert cache.changes_since(3) == (4, None)
+
+def test_cache_is_bounded():
+    """Test that the cache evicts beyond its size."""
+    cache = LocationCache(max_size=2)
+    for location_id in range(3):
+        cache.get(location_id, str)
+    assert cache.get_stats()["size"] == 2
+
+def test_routes_use_cache(client, mocker):
+    """Test that the weather route reads locations through the cache."""
+    mocker.patch("weather_app.models.location_model.fetch_forecast_async",
+                 new_callable=mocker.AsyncMock, return_value={"daily": []})
+    for _ in range(2):
+        assert client.get('/api/get-weather/1').status_code == 200
+    stats = location_cache.get_stats()
+    assert stats["misses"] == 1 and stats["hits"] == 1
@@ -0,0 +1,103 @@
+import io
+import json
+
+import pytest
+from app import create_app
+from config import TestConfig
+from weather_app.models.location_model import Location
+from weather_app.utils.db import db
+from weather_app.utils.location_import import import_locations
+from weather_app.utils.spatial_index import get_location_index
+
+CSV = """city,latitude,longitude,country
+Boston,42.3601,-71.0589,US
+London,51.5074,-0.1278,GB
+Boston,42.3601,-71.0589,US
+Nowhere,95,0,XX
+,10,10,XX
+Paris,48.8566,abc,FR
+Paris,48.8566,2.3522,FR
+"""
+
+@pytest.fixture
+def app():
+    """Flask app with one stored location."""
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Location(city="London", latitude=51.5074, longitude=-0.1278))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def test_import_csv_reports_and_dedupes(app):
+    """Test that CSV rows are validated, deduplicated and inserted."""
+    report = list(import_locations(io.StringIO(CSV), "csv", batch_size=2))
+    rows = {entry["row"]: entry for entry in report if "row" in entry}
+    assert rows[3]["status"] == "duplicate"   # already stored
+    assert rows[4]["status"] == "duplicate"   # repeated in the upload
+    assert "latitude" in rows[5]["error"]
+    assert "City" in rows[6]["error"]
+    assert "longitude" in rows[7]["error"]
+    assert report[-1] == {"summary": {"rows": 7, "imported": 2, "duplicates": 2, "errors": 3}}
+    assert sorted(location["city"] for location in Location.get_all_locations()) == ["Boston", "London", "Paris"]
+
+def test_import_ndjson(app):
+    """Test NDJSON import including malformed lines."""
+    lines = [
+        '{"city": "Tokyo", "latitude": 35.6762, "longitude": 139.6503}\n',
+        "\n",
+        "not json\n",
+        '["Tokyo"]\n',
+        '{"city": "Sydney", "latitude": -33.8688, "longitude": 151.2093}\n',
+    ]
+    report = list(import_locations(lines, "ndjson"))
+    assert [entry["row"] for entry in report[:-1]] == [3, 4]
+    assert report[-1]["summary"]["imported"] == 2
+
+def test_import_updates_spatial_index(app):
+    """Test that bulk inserted locations become visible to nearby lookups."""
+    index = get_location_index()
+    list(import_locations(io.StringIO(CSV), "csv"))
+    assert len(index) == 3
+    paris = Location.query.filter_by(city="Paris").one()
+    assert index.nearest(48.85, 2.35, k=1)[0][0] == paris.id
+
+def test_import_missing_columns(app):
+    """Test that a CSV without the required columns is rejected."""
+    report = list(import_locations(io.StringIO("name,lat\nBoston,42\n"), "csv"))
+    assert report[0]["status"] == "error" and "latitude" in report[0]["error"]
+
+def test_import_invalid_format(app):
+    """Test that unknown formats are rejected."""
+    with pytest.raises(ValueError):
+        import_locations([], "xml")
+
+def test_import_route_streams_report(client):
+    """Test the import endpoint with a multipart upload."""
+    response = client.post('/api/import-locations',
+                           data={'file': (io.BytesIO(CSV.encode()), 'cities.csv')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[-1]["summary"]["imported"] == 2
+
+def test_import_route_raw_body(client):
+    """Test the import endpoint with a raw NDJSON body."""
+    body = '{"city": "Tokyo", "latitude": 35.6762, "longitude": 139.6503}\n'
+    response = client.post('/api/import-locations?format=ndjson', data=body)
+    assert json.loads(response.get_data(as_text=True).splitlines()[-1])["summary"]["imported"] == 1
+    assert client.post('/api/import-locations?format=xml', data=body).status_code == 400
+
+def test_import_cli(app, tmp_path):
+    """Test the import-locations command."""
+    path = tmp_path / "cities.csv"
+    path.write_text(CSV)
+    result = app.test_cli_runner().invoke(args=["import-locations", str(path)])
+    assert result.exit_code == 0
+    assert json.loads(result.output.splitlines()[-1])["summary"]["imported"] == 2
@@ -0,0 +1,93 @@
+import pytest
+from app import create_app
+from config import TestConfig
+from weather_app.models.location_model import Location
+from weather_app.utils.db import db
+
+CITIES = [
+    ("Boston", 42.3601, -71.0589),
+    ("Boulder", 40.0150, -105.2705),
+    ("Bo_ston", 10.0, 10.0),
+    ("London", 51.5074, -0.1278),
+    ("Suva", -18.1248, 178.4501),
+    ("Apia", -13.8507, -171.7514),
+    ("Tokyo", 35.6762, 139.6503),
+]
+
+@pytest.fixture
+def app():
+    """Flask app with a handful of saved locations."""
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Location(city=city, latitude=lat, longitude=lon) for city, lat, lon in CITIES])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def test_list_locations_pages_through_everything(app):
+    """Test that following cursors visits every location exactly once, in ID order."""
+    seen, cursor = [], None
+    while True:
+        page, cursor = Location.list_locations(cursor, limit=3)
+        seen.extend(location["id"] for location in page)
+        if cursor is None:
+            break
+    assert seen == list(range(1, len(CITIES) + 1))
+
+def test_list_locations_exact_last_page(app):
+    """Test that a page ending on the last row reports no next cursor."""
+    page, cursor = Location.list_locations(None, limit=len(CITIES))
+    assert len(page) == len(CITIES) and cursor is None
+
+def test_list_locations_city_prefix(app):
+    """Test prefix filtering, with LIKE wildcards matched literally."""
+    page, _ = Location.list_locations(city_prefix="Bo")
+    assert [location["city"] for location in page] == ["Boston", "Boulder", "Bo_ston"]
+    page, _ = Location.list_locations(city_prefix="Bo_")
+    assert [location["city"] for location in page] == ["Bo_ston"]
+
+def test_list_locations_bbox(app):
+    """Test bounding box filtering, including a box across the antimeridian."""
+    page, _ = Location.list_locations(bbox=(35, -110, 55, 0))
+    assert [location["city"] for location in page] == ["Boston", "Boulder", "London"]
+    page, _ = Location.list_locations(bbox=(-20, 170, -10, -170))
+    assert [location["city"] for location in page] == ["Suva", "Apia"]
+
+def test_list_locations_invalid(app):
+    """Test that invalid limits and boxes are rejected."""
+    with pytest.raises(ValueError):
+        Location.list_locations(limit=0)
+    with pytest.raises(ValueError):
+        Location.list_locations(bbox=(50, 0, 40, 10))
+    with pytest.raises(ValueError):
+        Location.list_locations(bbox=(0, 0, 100, 10))
+
+def test_iter_locations_chunks(app):
+    """Test that the generator yields every matching row across chunk boundaries."""
+    assert [row.id for row in Location.iter_locations(chunk_size=2)] == list(range(1, len(CITIES) + 1))
+    assert [row.city for row in Location.iter_locations(chunk_size=1, city_prefix="Bou")] == ["Boulder"]
+
+def test_get_locations_route(client):
+    """Test the paginated listing endpoint."""
+    response = client.get('/api/get-locations?limit=4')
+    data = response.get_json()
+    assert response.status_code == 200
+    assert len(data["locations"]) == 4 and data["next_cursor"] == 4
+
+    data = client.get(f'/api/get-locations?limit=4&cursor={data["next_cursor"]}').get_json()
+    assert [location["city"] for location in data["locations"]] == ["Suva", "Apia", "Tokyo"]
+    assert data["next_cursor"] is None
+
+    data = client.get('/api/get-locations?bbox=35,-110,55,0&city_prefix=B').get_json()
+    assert [location["city"] for location in data["locations"]] == ["Boston", "Boulder"]
+
+def test_get_locations_route_invalid(client):
+    """Test that malformed parameters are rejected."""
+    assert client.get('/api/get-locations?bbox=1,2,3').status_code == 400
+    assert client.get('/api/get-locations?limit=5000').status_code == 400
@@ -0,0 +1,95 @@
+import io
+
+import pytest
+from app import create_app
+from config import TestConfig
+from weather_app.models.location_model import Location
+from weather_app.utils.db import db
+from weather_app.utils.location_cache import LocalInvalidationChannel, location_cache
+from weather_app.utils.location_import import import_locations
+from weather_app.utils.location_search import CityIndex, get_city_index, normalize, search_locations
+
+@pytest.fixture
+def app():
+    """Flask app with a few saved locations."""
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Location(city="New York", latitude=40.7128, longitude=-74.0060),
+            Location(city="Newark", latitude=40.7357, longitude=-74.1724),
+            Location(city="York", latitude=53.9600, longitude=-1.0873),
+            Location(city="Saint-Étienne", latitude=45.4397, longitude=4.3872),
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def test_normalize():
+    """Test that accents, case and punctuation are folded."""
+    assert normalize("  Saint-Étienne ") == "saint etienne"
+    assert normalize("SÃO  paulo") == "sao paulo"
+
+def test_search_ranks_names_before_words():
+    """Test that whole-name prefixes rank before word prefixes, without duplicates."""
+    index = CityIndex()
+    index.build([(1, "New York", 0, 0), (2, "York", 0, 0), (3, "New York Mills", 0, 0), (4, "Yorkton", 0, 0)])
+    assert [result["id"] for result in index.search("york")] == [2, 4, 1, 3]
+    assert [result["id"] for result in index.search("new york")] == [1, 3]
+    assert [result["id"] for result in index.search("york", limit=2)] == [2, 4]
+    assert index.search("  ") == []
+
+def test_add_and_remove():
+    """Test incremental updates, including renames."""
+    index = CityIndex()
+    index.add(1, "Boston", 0, 0)
+    index.add(1, "Bozeman", 0, 0)
+    assert [result["city"] for result in index.search("bo")] == ["Bozeman"]
+    index.remove(1)
+    index.remove(1)
+    assert index.search("bo") == [] and len(index) == 0
+
+def test_index_follows_commits(app):
+    """Test that created, imported and deleted locations are reflected in search."""
+    get_city_index()
+    location = Location.create_location("Yonkers", 40.9312, -73.8988)
+    list(import_locations(io.StringIO("city,latitude,longitude\nYokohama,35.4437,139.6380\n"), "csv"))
+    assert [result["city"] for result in search_locations("yo")] == ["Yokohama", "Yonkers", "York", "New York"]
+    Location.delete_location(location.id)
+    assert [result["city"] for result in search_locations("yo")] == ["Yokohama", "York", "New York"]
+
+def test_index_follows_other_workers(app):
+    """Test that changes committed by another worker are searched once announced on the invalidation channel."""
+    channel = LocalInvalidationChannel()
+    location_cache.attach_channel(channel)
+    try:
+        get_city_index()
+        with db.engine.begin() as connection:  # committed elsewhere: no events in this process
+            connection.exec_driver_sql("INSERT INTO locations (id, city, latitude, longitude) "
+                                       "VALUES (10, 'Yonkers', 40.9312, -73.8988)")
+            connection.exec_driver_sql("DELETE FROM locations WHERE id = 3")
+        assert [result["city"] for result in search_locations("yo")] == ["York", "New York"]
+        channel.publish("10,3")
+        assert [result["city"] for result in search_locations("yo")] == ["Yonkers", "New York"]
+    finally:
+        location_cache.attach_channel(None)
+
+def test_search_route(client):
+    """Test the search endpoint."""
+    response = client.get('/api/locations/search?q=saint%20e')
+    assert response.status_code == 200
+    assert [location["city"] for location in response.get_json()["locations"]] == ["Saint-Étienne"]
+
+    data = client.get('/api/locations/search?q=new&limit=1').get_json()
+    assert [location["city"] for location in data["locations"]] == ["New York"]
+
+def test_search_route_invalid(client):
+    """Test that empty queries and bad limits are rejected."""
+    assert client.get('/api/locations/search').status_code == 400
+    assert client.get('/api/locations/search?q=--').status_code == 400
+    assert client.get('/api/locations/search?q=new&limit=0').status_code == 400
@@ -0,0 +1,150 @@
+import pytest
+from sqlalchemy import event
+from app import create_app
+from config import TestConfig
+from weather_app.models.location_model import Location
+from weather_app.models.observation_model import AirQualityObservation, ForecastSnapshot, HistoricalObservation
+from weather_app.utils.api_utils import get_grid_cell
+from weather_app.utils.db import db
+from weather_app.utils.observation_store import ObservationStore
+
+HOUR = 3600
+NOW = 1_700_000_000 - 1_700_000_000 % HOUR
+
+@pytest.fixture
+def app():
+    """Flask app with one saved location."""
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Location(city="Boston", latitude=42.3601, longitude=-71.0589))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def location(app):
+    return Location.query.one()
+
+@pytest.fixture
+def statements(app):
+    """Records the SQL statements executed."""
+    executed = []
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(db.engine, "before_cursor_execute", record)
+
+def timemachine(dt, temp=10.0):
+    return {"lat": 42.36, "lon": -71.06, "data": [{"dt": dt, "temp": temp, "rain": {"1h": 0.5}}]}
+
+@pytest.fixture
+def mock_history(mocker):
+    """Mocks the upstream timemachine call, answering for the requested hour."""
+    mocker.patch("weather_app.models.location_model.time.time", return_value=NOW + 10)
+    return mocker.patch(
+        "weather_app.models.location_model.fetch_historical_data",
+        side_effect=lambda lat, lon, dt: timemachine(dt),
+    )
+
+def test_bulk_insert_skips_duplicates(location):
+    """Test that rows for an existing (location, ts) are ignored."""
+    rows = HistoricalObservation.rows_from_timemachine(location.id, timemachine(NOW))
+    HistoricalObservation.bulk_insert(rows)
+    HistoricalObservation.bulk_insert(rows)
+    stored = HistoricalObservation.query.all()
+    assert len(stored) == 1
+    assert stored[0].precipitation == 0.5
+    assert stored[0].get_payload()["temp"] == 10.0
+
+def test_get_historical_fetches_only_missing_hours(location, mock_history):
+    """Test that stored hours are served locally and only gaps are fetched."""
+    HistoricalObservation.bulk_insert(
+        HistoricalObservation.rows_from_timemachine(location.id, timemachine(NOW - 2 * HOUR, temp=1.0))
+    )
+
+    points = location.get_historical(NOW - 3 * HOUR, NOW + HOUR)
+
+    assert [point["dt"] for point in points] == [NOW - 3 * HOUR, NOW - 2 * HOUR, NOW - HOUR, NOW]
+    assert points[1]["temp"] == 1.0
+    assert sorted(call.args[2] for call in mock_history.call_args_list) == [NOW - 3 * HOUR, NOW - HOUR, NOW]
+
+    # A second lookup is served entirely from storage
+    mock_history.reset_mock()
+    assert len(location.get_historical(NOW - 3 * HOUR, NOW + HOUR)) == 4
+    mock_history.assert_not_called()
+
+def test_get_historical_rejects_large_gaps(location, mock_history, mocker):
+    """Test that a lookup needing too many upstream calls is refused."""
+    mocker.patch("weather_app.models.location_model.MAX_HISTORICAL_FETCH_HOURS", 2)
+    with pytest.raises(ValueError, match="at most 2"):
+        location.get_historical(NOW - 5 * HOUR, NOW)
+    mock_history.assert_not_called()
+
+def test_get_historical_invalid_range(location, mock_history):
+    """Test that an empty or future-only range is rejected."""
+    with pytest.raises(ValueError, match="Invalid time range"):
+        location.get_historical(NOW + 5 * HOUR, NOW + 6 * HOUR)
+
+def test_observation_store_writes_batches(app, location, statements):
+    """Test that buffered payloads are written per grid cell, with or without saved locations, without lookups."""
+    store = ObservationStore(app, batch_size=10)
+    store.record("forecast", 42.36, -71.06, {"current": {"temp": 12}})
+    store.record("air_quality", 42.36, -71.06, {"aqi": 2, "pollutants": {}})
+    store.record("forecast", 10.0, 10.0, {"current": {}})  # no saved location here
+
+    assert store.flush() == 3
+    assert not any("FROM locations" in statement for statement in statements)
+    cell_id = get_grid_cell(location.latitude, location.longitude).id
+    assert ForecastSnapshot.get_latest(cell_id).get_payload() == {"current": {"temp": 12}}
+    assert AirQualityObservation.get_latest(cell_id).aqi == 2
+    assert ForecastSnapshot.get_latest(get_grid_cell(10.0, 10.0).id) is not None
+    assert store.get_stats() == {"pending": 0, "written": 3, "dropped": 0, "errors": 0}
+
+def test_observation_store_leaves_history_to_its_location(app, location, mock_history):
+    """Test that historical payloads are stored once, under the location that fetched them."""
+    Location.create_location("Boston Common", 42.3605, -71.0591)
+    store = ObservationStore(app)
+    store.record("historical", 42.36, -71.06, timemachine(NOW))
+    location.get_historical(NOW, NOW + HOUR)
+    assert store.flush() == 0
+    assert [row.location_id for row in HistoricalObservation.query.all()] == [location.id]
+
+def test_observation_store_drops_oldest_when_full(app):
+    """Test that the buffer is bounded."""
+    store = ObservationStore(app, max_pending=2)
+    for n in range(3):
+        store.record("forecast", 0.0, float(n), {})
+    stats = store.get_stats()
+    assert stats["pending"] == 2
+    assert stats["dropped"] == 1
+
+def test_observation_store_writes_cell_data_once(app, location):
+    """Test that forecasts are stored once per grid cell, however many locations share it."""
+    Location.create_location("Boston Common", 42.3605, -71.0591)
+    store = ObservationStore(app)
+    store.record("forecast", 42.36, -71.06, {"current": {"temp": 12}})
+    assert store.flush() == 1
+    assert ForecastSnapshot.query.count() == 1
+
+def test_observation_store_retries_failed_writes(app, location, mocker):
+    """Test that a failed batch is put back and retried, and dropped only after max_attempts."""
+    store = ObservationStore(app, max_attempts=2)
+    insert = mocker.patch.object(ForecastSnapshot, "bulk_insert", side_effect=Exception("database is locked"))
+    store.record("forecast", 42.36, -71.06, {"current": {"temp": 12}})
+    store.record("forecast", 42.36, -71.06, {"current": {"temp": 13}})
+    assert store.flush() == 0
+    assert store.get_stats() == {"pending": 2, "written": 0, "dropped": 0, "errors": 1}
+
+    insert.side_effect = None
+    mocker.stopall()
+    assert store.flush() == 2
+    assert store.get_stats()["pending"] == 0
+
+    mocker.patch.object(ForecastSnapshot, "bulk_insert", side_effect=Exception("database is locked"))
+    store.record("forecast", 42.36, -71.06, {})
+    store.flush()
+    store.flush()
+    assert store.get_stats() == {"pending": 0, "written": 2, "dropped": 1, "errors": 3}
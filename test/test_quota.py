@@ -0,0 +1,136 @@
+import fakeredis
+import pytest
+import threading
+import time
+from weather_app.utils.quota import (
+    BACKGROUND, DAY, INTERACTIVE, QuotaExceededError, QuotaGovernor, SharedQuotaCounters, background_priority,
+    current_priority
+)
+from weather_app.utils.shared_cache import RedisSharedStore, SQLiteSharedStore
+
+START_OF_MINUTE = time.time() // 60 * 60
+
+def running_clock(seconds_left_in_minute):
+    """A clock running in real time from the given number of seconds before a minute ends."""
+    started, origin = time.monotonic(), START_OF_MINUTE + 60 - seconds_left_in_minute
+    return lambda: origin + time.monotonic() - started
+
+def fixed_clock(now=START_OF_MINUTE):
+    return lambda: now
+
+def test_acquire_within_quota():
+    """Test that calls within the quota are granted immediately."""
+    governor = QuotaGovernor(per_minute=3, per_day=10, clock=fixed_clock())
+    for _ in range(3):
+        governor.acquire()
+    stats = governor.get_stats()
+    assert stats["remaining_minute"] == 0
+    assert stats["remaining_day"] == 7
+    assert stats["granted"]["interactive"] == 3
+
+def test_fail_fast_when_token_cannot_arrive_before_deadline():
+    """Test that a caller is rejected at once if the full window ends after its deadline."""
+    governor = QuotaGovernor(per_minute=1, per_day=10, clock=fixed_clock())
+    governor.acquire()
+    start = time.monotonic()
+    with pytest.raises(QuotaExceededError, match="Upstream call quota exhausted"):
+        governor.acquire(deadline=5)
+    assert time.monotonic() - start < 1
+    assert governor.get_stats()["rejected"]["interactive"] == 1
+
+def test_daily_quota_enforced():
+    """Test that the per-day window limits calls independently of the per-minute one."""
+    governor = QuotaGovernor(per_minute=100, per_day=2, clock=fixed_clock())
+    governor.acquire()
+    governor.acquire()
+    with pytest.raises(QuotaExceededError):
+        governor.acquire(deadline=0.1)
+
+def test_daily_quota_is_a_calendar_day():
+    """Test that the daily quota does not refill during the day and is reset at UTC midnight."""
+    now = [19_000 * DAY - 10.0]
+    governor = QuotaGovernor(per_minute=100, per_day=2, clock=lambda: now[0])
+    governor.acquire()
+    now[0] -= 40_000  # calls made earlier the same day still count
+    governor.acquire()
+    with pytest.raises(QuotaExceededError):
+        governor.acquire(deadline=5)
+    now[0] += 40_011
+    governor.acquire()
+    assert governor.get_stats()["remaining_day"] == 1
+
+def test_waits_for_next_window():
+    """Test that a caller waits for a window that starts before its deadline."""
+    governor = QuotaGovernor(per_minute=2, per_day=1000, clock=running_clock(0.2))
+    governor.acquire()
+    governor.acquire()
+    start = time.monotonic()
+    governor.acquire(deadline=1)
+    assert 0.1 < time.monotonic() - start < 1
+
+def test_interactive_served_before_background():
+    """Test that a waiting interactive caller is counted before an earlier background caller."""
+    governor = QuotaGovernor(per_minute=1, per_day=1000, clock=running_clock(0.3))
+    governor.acquire()
+    order = []
+
+    def background():
+        try:
+            governor.acquire(priority=BACKGROUND, deadline=5)
+            order.append("background")
+        except QuotaExceededError:
+            order.append("background rejected")
+
+    def interactive():
+        governor.acquire(priority=INTERACTIVE, deadline=5)
+        order.append("interactive")
+
+    first = threading.Thread(target=background)
+    first.start()
+    while governor.get_stats()["queued"]["background"] == 0:
+        time.sleep(0.001)
+    second = threading.Thread(target=interactive)
+    second.start()
+    first.join()
+    second.join()
+    assert order == ["interactive", "background rejected"]
+
+@pytest.mark.parametrize("kind", ["redis", "sqlite"])
+def test_shared_counters_span_workers(kind, tmp_path):
+    """Test that governors of different workers share one quota through the shared store."""
+    if kind == "redis":
+        server = fakeredis.FakeServer()
+        stores = [RedisSharedStore(fakeredis.FakeRedis(server=server)) for _ in range(2)]
+    else:
+        stores = [SQLiteSharedStore(str(tmp_path / "cache.db")) for _ in range(2)]
+    workers = [QuotaGovernor(per_minute=3, per_day=10, clock=fixed_clock()) for _ in stores]
+    for governor, store in zip(workers, stores):
+        governor.configure(3, 10, counters=SharedQuotaCounters(store))
+    workers[0].acquire()
+    workers[1].acquire()
+    workers[0].acquire()
+    with pytest.raises(QuotaExceededError):
+        workers[1].acquire(deadline=1)
+    assert workers[1].get_stats()["remaining_day"] == 7
+
+def test_unreachable_shared_counters_count_locally():
+    """Test that calls are still limited, in this process, when the shared store is down."""
+    server = fakeredis.FakeServer()
+    server.connected = False
+    governor = QuotaGovernor(per_minute=1, per_day=10, clock=fixed_clock())
+    governor.configure(1, 10, counters=SharedQuotaCounters(RedisSharedStore(fakeredis.FakeRedis(server=server))))
+    governor.acquire()
+    with pytest.raises(QuotaExceededError):
+        governor.acquire(deadline=1)
+
+def test_background_priority_context():
+    """Test that the priority context manager marks calls as background."""
+    assert current_priority() == INTERACTIVE
+    with background_priority():
+        assert current_priority() == BACKGROUND
+    assert current_priority() == INTERACTIVE
+
+def test_invalid_quota():
+    """Test that a non-positive quota is rejected."""
+    with pytest.raises(ValueError, match="Invalid quota: 0. Must be positive."):
+        QuotaGovernor(per_minute=0)
@@ -0,0 +1,183 @@
+import json
+
+import fakeredis
+import pytest
+from sqlalchemy import event
+from app import create_app
+from config import TestConfig
+from weather_app.models.favorites_model import FavoritesModel
+from weather_app.models.location_model import Location
+from weather_app.models.user_model import Users
+from weather_app.utils.db import db
+from weather_app.utils.location_cache import location_cache
+from weather_app.utils.record_store import RecordStore, record_store
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeRedis()
+
+@pytest.fixture
+def app(redis):
+    """Flask app writing through to a fake Redis, with one user and two locations."""
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        record_store.configure(redis, "test", 60)
+        Users.create_user("alice", "secret")
+        db.session.add_all([
+            Location(city="Boston", latitude=42.3601, longitude=-71.0589),
+            Location(city="Denver", latitude=39.7392, longitude=-104.9903),
+        ])
+        db.session.commit()
+        yield app
+        record_store.configure(None, "weather_app", 60)
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def statements(app):
+    """Records the SQL statements executed."""
+    executed = []
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(db.engine, "before_cursor_execute", record)
+
+def test_commits_invalidate(app, redis):
+    """Test that committed changes delete stored records instead of writing them."""
+    assert not redis.exists("test:user:alice") and not redis.exists("test:location:1")
+    Users.get_id_by_username("alice")
+    Location.get_locations_by_ids([1, 2])
+    assert redis.exists("test:user:alice") and redis.exists("test:location:1")
+    Users.update_password("alice", "changed")
+    location = db.session.get(Location, 1)
+    location.city = "Cambridge"
+    db.session.commit()
+    assert not redis.exists("test:user:alice") and not redis.exists("test:location:1")
+    assert redis.exists("test:location:2")
+    assert Location.get_locations_by_ids([1])[0]["city"] == "Cambridge"
+
+def test_reads_served_from_store(app, statements):
+    """Test that stored records are read without touching the database."""
+    Users.get_id_by_username("alice")
+    Location.get_locations_by_ids([1, 2])
+    location_cache.clear()
+    statements.clear()
+    assert Users.get_id_by_username("alice") == 1
+    assert Location.get_cached(2).city == "Denver"
+    assert [location["city"] for location in Location.get_locations_by_ids([2, 1])] == ["Denver", "Boston"]
+    assert statements == []
+
+def test_credentials_not_stored(app, redis, statements):
+    """Test that salts and password hashes never reach the store and passwords are checked against the database."""
+    Users.get_id_by_username("alice")
+    assert json.loads(redis.get("test:user:alice")) == {"id": 1, "username": "alice"}
+    statements.clear()
+    assert Users.check_password("alice", "secret")
+    assert statements
+    Users.update_password("alice", "changed")
+    assert Users.check_password("alice", "changed")
+    assert not Users.check_password("alice", "secret")
+
+def test_fill_does_not_overwrite_newer_record(app, redis):
+    """Test that a record stored by another worker while one was loading is kept."""
+    def slow_loader(username):
+        redis.set("test:user:bob", json.dumps({"id": 2, "username": "bob"}))
+        return {"id": 1, "username": "bob"}
+
+    assert record_store.get("user", "bob", slow_loader) == {"id": 1, "username": "bob"}
+    assert json.loads(redis.get("test:user:bob")) == {"id": 2, "username": "bob"}
+
+def test_deletes_invalidate(app, redis):
+    """Test that deleted users and locations are removed from the store."""
+    Users.get_id_by_username("alice")
+    Location.get_locations_by_ids([1])
+    Users.delete_user("alice")
+    Location.delete_location(1)
+    assert not redis.exists("test:user:alice") and not redis.exists("test:location:1")
+    with pytest.raises(ValueError, match="User alice not found"):
+        Users.get_id_by_username("alice")
+
+def test_rollback_invalidates_nothing(app, redis):
+    """Test that rolled back changes leave stored records in place."""
+    Location.get_locations_by_ids([1])
+    db.session.get(Location, 1).city = "Discarded"
+    db.session.flush()
+    db.session.rollback()
+    db.session.commit()
+    assert redis.exists("test:location:1")
+
+def test_misses_fall_back_to_database(app, redis, statements):
+    """Test that missing records are loaded from the database once and stored."""
+    redis.flushall()
+    for _ in range(2):
+        assert Users.get_id_by_username("alice") == 1
+        assert [location["id"] for location in Location.get_locations_by_ids([1, 2])] == [1, 2]
+    assert len(statements) == 2
+    assert record_store.get_stats()["hits"] >= 3
+
+def test_favorites_follow_single_and_bulk_changes(app, redis, statements):
+    """Test that ORM and bulk changes to favorites drop the stored list."""
+    FavoritesModel.add_favorite(1, 1)
+    assert FavoritesModel.get_favorites_by_user_id(1) == [1]  # loaded, then stored
+    assert json.loads(redis.get("test:favorites:1")) == [1]
+    FavoritesModel.add_favorite(1, 2)
+    assert not redis.exists("test:favorites:1")
+    assert FavoritesModel.get_favorites_by_user_id(1) == [1, 2]
+    FavoritesModel.replace_favorites(1, [2])
+    assert not redis.exists("test:favorites:1")
+    FavoritesModel.get_favorite_locations(1)  # stores the list and the location
+    statements.clear()
+    assert [location["city"] for location in FavoritesModel.get_favorite_locations(1)] == ["Denver"]
+    assert statements == []
+    FavoritesModel.remove_favorites(1, [2])
+    assert not redis.exists("test:favorites:1")
+    with pytest.raises(ValueError, match="Favorites list is empty"):
+        FavoritesModel.get_favorite_locations(1)
+
+def test_unavailable_store_falls_back(app):
+    """Test that store errors are counted and reads and writes still succeed."""
+    server = fakeredis.FakeServer()
+    server.connected = False
+    record_store.configure(fakeredis.FakeRedis(server=server), "test", 60)
+    assert Users.get_id_by_username("alice") == 1
+    Location.create_location("Austin", 30.2672, -97.7431)
+    assert record_store.get_stats()["errors"] >= 2
+
+def test_disabled_store_loads_every_time():
+    """Test that without a client every read goes to the loader."""
+    store = RecordStore()
+    calls = []
+    loader = lambda key: calls.append(key) or {"key": key}
+    assert store.get("user", "bob", loader) == {"key": "bob"}
+    assert store.get("user", "bob", loader) == {"key": "bob"}
+    assert calls == ["bob", "bob"] and not store.get_stats()["enabled"]
+
+def test_fill_loaded_before_commit_is_discarded(app, redis):
+    """Test that a record loaded before a commit is not stored after the commit invalidated it."""
+    def loader(location_id):
+        record = Location._load_record(location_id)
+        db.session.get(Location, location_id).city = "Cambridge"  # another worker commits meanwhile
+        db.session.commit()
+        return record
+
+    discarded = record_store.get_stats()["discarded_fills"]
+    assert record_store.get("location", 1, loader)["city"] == "Boston"
+    assert not redis.exists("test:location:1")
+    assert record_store.get_stats()["discarded_fills"] == discarded + 1
+    assert Location.get_locations_by_ids([1])[0]["city"] == "Cambridge"
+    assert json.loads(redis.get("test:location:1"))["city"] == "Cambridge"
+
+def test_bulk_fill_loaded_before_commit_is_discarded(app, redis):
+    """Test that a bulk fill stores only the records that did not change while loading."""
+    def loader(location_ids):
+        records = Location._load_records(location_ids)
+        db.session.get(Location, 2).city = "Boulder"
+        db.session.commit()
+        return records
+
+    found = record_store.get_many("location", [1, 2], loader)
+    assert found[2]["city"] == "Denver"
+    assert redis.exists("test:location:1") and not redis.exists("test:location:2")
+    assert [location["city"] for location in Location.get_locations_by_ids([1, 2])] == ["Boston", "Boulder"]
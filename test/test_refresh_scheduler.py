@@ -0,0 +1,125 @@
+import pytest
+from app import create_app
+from config import TestConfig
+from weather_app.models.favorites_model import FavoritesModel
+from weather_app.models.lease_model import ServiceLease
+from weather_app.models.location_model import Location
+from weather_app.utils.api_utils import get_grid_cell
+from weather_app.utils.db import db
+from weather_app.utils.refresh_scheduler import REFRESH_JOBS, RefreshScheduler
+
+@pytest.fixture
+def app():
+    """Flask app with two locations, the second favorited by more users."""
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        boston = Location(city="Boston", latitude=42.3601, longitude=-71.0589)
+        new_york = Location(city="New York", latitude=40.7128, longitude=-74.0060)
+        db.session.add_all([boston, new_york])
+        db.session.commit()
+        FavoritesModel.add_favorite(user_id=1, location_id=boston.id)
+        FavoritesModel.add_favorite(user_id=1, location_id=new_york.id)
+        FavoritesModel.add_favorite(user_id=2, location_id=new_york.id)
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def refreshes(mocker):
+    """Replaces the refresh functions with recorders."""
+    calls = []
+    mocker.patch.dict(REFRESH_JOBS, {
+        "forecast": (lambda lat, lon: calls.append(("forecast", lat, lon)), 1800),
+        "air_quality": (lambda lat, lon: calls.append(("air_quality", lat, lon)), 900),
+    })
+    return calls
+
+def drain(scheduler):
+    """Runs every queued job in priority order on the calling thread."""
+    order = []
+    while not scheduler._queue.empty():
+        _, _, kind, cell_id, latitude, longitude = scheduler._queue.get()
+        order.append((kind, cell_id))
+        scheduler._run_job(kind, cell_id, latitude, longitude)
+    return order
+
+def test_location_popularity(app):
+    """Test that favorited locations are ranked by number of users."""
+    assert FavoritesModel.get_location_popularity() == [(2, 2), (1, 1)]
+
+def test_plan_orders_by_popularity(app, refreshes):
+    """Test that the most favorited location is refreshed first."""
+    scheduler = RefreshScheduler(app, workers=1)
+    assert scheduler.plan() == 4
+    order = drain(scheduler)
+    new_york = get_grid_cell(40.7128, -74.0060).id
+    assert order[:2] == [("forecast", new_york), ("air_quality", new_york)]
+    assert len(refreshes) == 4
+    assert scheduler.get_stats()["refreshed"] == 4
+
+def test_plan_refreshes_each_cell_once(app, refreshes):
+    """Test that favorited locations sharing a grid cell are refreshed once, ranked by their combined favorites."""
+    with app.app_context():
+        nearby = Location.create_location("Boston Common", 42.3605, -71.0591)
+        FavoritesModel.add_favorite(user_id=2, location_id=nearby.id)
+        FavoritesModel.add_favorite(user_id=3, location_id=nearby.id)
+    assert get_grid_cell(42.3605, -71.0591) == get_grid_cell(42.3601, -71.0589)
+    scheduler = RefreshScheduler(app, workers=1)
+    assert scheduler.plan() == 4
+    order = drain(scheduler)
+    boston = get_grid_cell(42.3601, -71.0589).id
+    assert order[:2] == [("forecast", boston), ("air_quality", boston)]
+
+def test_plan_skips_entries_not_yet_due(app, refreshes):
+    """Test that refreshed entries are not queued again before their refresh time."""
+    scheduler = RefreshScheduler(app, workers=1)
+    scheduler.plan()
+    drain(scheduler)
+    assert scheduler.plan() == 0
+
+def test_plan_does_not_queue_twice(app, refreshes):
+    """Test that a job already waiting in the queue is not queued again."""
+    scheduler = RefreshScheduler(app, workers=1)
+    assert scheduler.plan() == 4
+    assert scheduler.plan() == 0
+
+def test_failed_refresh_is_retried(app, mocker):
+    """Test that failures are counted and rescheduled for the next planning pass."""
+    def failing(lat, lon):
+        raise Exception("upstream down")
+
+    mocker.patch.dict(REFRESH_JOBS, {"forecast": (failing, 1800), "air_quality": (failing, 900)})
+    scheduler = RefreshScheduler(app, workers=1, poll_interval=0)
+    scheduler.plan()
+    drain(scheduler)
+    assert scheduler.get_stats()["failed"] == 4
+    assert scheduler.plan() == 4
+
+def test_start_and_stop(app, refreshes):
+    """Test that worker threads start and stop cleanly."""
+    scheduler = RefreshScheduler(app, workers=2, poll_interval=0.01)
+    scheduler.start()
+    assert scheduler.get_stats()["running"] is True
+    scheduler.stop()
+    assert scheduler.get_stats()["running"] is False
+
+def test_only_lease_holder_plans(app, refreshes):
+    """Test that of several schedulers sharing the database only the planner lease holder queues refreshes."""
+    first, second = RefreshScheduler(app, workers=1), RefreshScheduler(app, workers=1)
+    assert first.plan_if_leader() == 4
+    assert second.plan_if_leader() == 0
+    assert first.get_stats()["leader"] and not second.get_stats()["leader"]
+    first.stop()
+    assert second.plan_if_leader() == 4
+    assert first.plan_if_leader() == 0
+
+def test_expired_planner_lease_taken_over(app, refreshes):
+    """Test that a scheduler takes over the planner lease once its holder stops renewing it."""
+    first, second = RefreshScheduler(app, workers=1), RefreshScheduler(app, workers=1)
+    assert first.plan_if_leader() == 4
+    with app.app_context():
+        ServiceLease.query.update({ServiceLease.lease_until: 0})
+        db.session.commit()
+    assert second.plan_if_leader() == 4
+    assert first.plan_if_leader() == 0 and not first.get_stats()["leader"]
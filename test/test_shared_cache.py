@@ -0,0 +1,114 @@
+import fakeredis
+import pytest
+from weather_app.utils.api_utils import configure_shared_cache, fetch_forecast, forecast_cache, invalidate_weather_cache
+from weather_app.utils.cache import TieredCache, TTLCache
+from weather_app.utils.forecast_frame import ForecastFrame
+from weather_app.utils.shared_cache import RedisSharedStore, SQLiteSharedStore, open_shared_store
+
+@pytest.fixture
+def clock(mocker):
+    """Controls the monotonic and wall clocks used by the caches."""
+    now = [1000.0]
+    mocker.patch("weather_app.utils.cache.time.monotonic", side_effect=lambda: now[0])
+    mocker.patch("weather_app.utils.cache.time.time", side_effect=lambda: now[0])
+    return now
+
+@pytest.fixture(params=["redis", "sqlite"])
+def store(request, tmp_path):
+    """A shared store of each kind."""
+    if request.param == "redis":
+        return RedisSharedStore(fakeredis.FakeRedis())
+    return SQLiteSharedStore(str(tmp_path / "cache.db"))
+
+def worker(store, **kwargs) -> TieredCache:
+    """A cache as one worker process would hold it."""
+    cache = TieredCache("test", ttl=60, stale_ttl=30, **kwargs)
+    cache.attach_shared(store)
+    return cache
+
+def test_l1_filled_from_l2(store):
+    """Test that a value cached by one worker is served to another and then from its L1."""
+    first, second = worker(store), worker(store)
+    first.set(("cell", "x"), {"temp": 1})
+    assert second.get(("cell", "x")) == {"temp": 1}
+    assert second.get(("cell", "x")) == {"temp": 1}
+    stats = second.get_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["shared"]["hits"] == 1 and stats["shared"]["hit_ratio"] == 1.0
+    assert second.get("missing") is None
+    assert second.get_stats()["shared"]["misses"] == 1
+
+def test_ttls_coherent_across_tiers(store, clock):
+    """Test that a copy in L1 expires when the shared entry does and keeps its age."""
+    first, second = worker(store), worker(store)
+    first.set("a", 1)
+    clock[0] += 50
+    assert second.get("a") == 1
+    clock[0] += 11
+    assert first.get("a") is None and second.get("a") is None
+    assert second.get_stale("a") == (1, 61)
+
+def test_stale_served_from_l2(store, clock):
+    """Test that expired shared entries remain available for stale fallback, then go."""
+    worker(store).set("a", 1)
+    clock[0] += 80
+    assert worker(store).get_stale("a") == (1, 80)
+    clock[0] += 20
+    assert worker(store).get_stale("a") is None
+
+def test_invalidation_reaches_both_tiers(store):
+    """Test that invalidations and clears remove shared entries too."""
+    first, second = worker(store), worker(store)
+    first.set(("c1", "x"), 1)
+    first.set(("c1", "y"), 2)
+    first.set(("c2", "x"), 3)
+    second.get(("c1", "x"))
+    assert second.invalidate_where(lambda key: key[0] == "c1") == 2
+    assert first.peek(("c1", "y")) == 2  # still in the first worker's L1
+    assert worker(store).get(("c1", "y")) is None
+    assert worker(store).get(("c2", "x")) == 3
+    first.clear()
+    assert worker(store).get(("c2", "x")) is None
+
+def test_codec_round_trip(store):
+    """Test that values are encoded for the shared tier and rebuilt on the way back."""
+    first = worker(store, encode=lambda value: sorted(value), decode=set)
+    second = worker(store, encode=lambda value: sorted(value), decode=set)
+    first.set("a", {2, 1})
+    assert second.get("a") == {1, 2}
+
+def test_shared_errors_fall_back_to_l1():
+    """Test that an unreachable shared store is counted and leaves L1 working."""
+    server = fakeredis.FakeServer()
+    server.connected = False
+    cache = worker(RedisSharedStore(fakeredis.FakeRedis(server=server)))
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get_stats()["shared"]["errors"] == 2
+
+def test_open_shared_store(tmp_path):
+    """Test choosing the store from a URL."""
+    assert isinstance(open_shared_store(f"sqlite:///{tmp_path}/cache.db"), SQLiteSharedStore)
+    assert isinstance(open_shared_store("redis://localhost:6379/0"), RedisSharedStore)
+    with pytest.raises(ValueError, match="Invalid shared cache URL"):
+        open_shared_store("memcached://localhost")
+
+def test_workers_share_forecasts(mocker, tmp_path):
+    """Test that a forecast fetched by one worker is not fetched again by another."""
+    response = mocker.Mock(status_code=200)
+    response.json.return_value = {"lat": 40.7, "lon": -74.0, "timezone": "UTC", "timezone_offset": 0,
+                                  "daily": [{"dt": 1, "temp": {"day": 20.5}}]}
+    mock_get = mocker.patch("requests.Session.get", return_value=response)
+    configure_shared_cache({"WEATHER_CACHE_SHARED_URL": f"sqlite:///{tmp_path}/cache.db"})
+    try:
+        invalidate_weather_cache()
+        first = fetch_forecast(40.7128, -74.0060)
+        TTLCache.clear(forecast_cache)  # another worker: empty L1, same L2
+        assert fetch_forecast(40.7128, -74.0060) == first
+        assert mock_get.call_count == 1
+        assert isinstance(forecast_cache.peek(next(iter(forecast_cache._entries))), ForecastFrame)
+        assert forecast_cache.get_stats()["shared"]["hits"] == 1
+    finally:
+        invalidate_weather_cache()
+        configure_shared_cache({})
@@ -0,0 +1,82 @@
+import pytest
+import threading
+import time
+from weather_app.utils.single_flight import SingleFlight
+
+def run_concurrently(count, target):
+    """Starts ``count`` threads running ``target`` and waits for them."""
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def test_do_returns_result():
+    """Test that a lone call runs the function."""
+    flights = SingleFlight("test")
+    assert flights.do("key", lambda: 42) == 42
+    assert flights.get_stats()["executions"] == 1
+    assert flights.get_stats()["in_flight"] == 0
+
+def test_concurrent_calls_are_coalesced():
+    """Test that concurrent callers share a single execution."""
+    flights = SingleFlight("test")
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "value"
+
+    def caller():
+        results.append(flights.do("key", slow))
+
+    leader = threading.Thread(target=caller)
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=caller) for _ in range(9)]
+    for follower in followers:
+        follower.start()
+    while flights.get_stats()["coalesced"] < 9:
+        time.sleep(0.001)
+    assert flights.in_flight("key")
+    release.set()
+    leader.join()
+    for follower in followers:
+        follower.join()
+
+    assert len(calls) == 1
+    assert results == ["value"] * 10
+    assert flights.get_stats()["coalesced"] == 9
+
+def test_concurrent_callers_share_exception():
+    """Test that waiting callers receive the leader's exception."""
+    flights = SingleFlight("test")
+    errors = []
+    barrier = threading.Barrier(5)
+
+    def failing():
+        time.sleep(0.05)
+        raise RuntimeError("upstream down")
+
+    def caller():
+        barrier.wait()
+        try:
+            flights.do("key", failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    run_concurrently(5, caller)
+    assert errors == ["upstream down"] * 5
+    assert flights.get_stats()["errors"] == flights.get_stats()["executions"]
+
+def test_different_keys_run_independently():
+    """Test that distinct keys are never coalesced."""
+    flights = SingleFlight("test")
+    assert flights.do("a", lambda: 1) == 1
+    assert flights.do("b", lambda: 2) == 2
+    assert flights.get_stats()["coalesced"] == 0
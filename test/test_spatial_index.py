@@ -0,0 +1,138 @@
+import random
+
+import pytest
+from app import create_app
+from config import TestConfig
+from weather_app.models.location_model import Location
+from weather_app.utils.db import db
+from weather_app.utils.grid import distance_km
+from weather_app.utils.location_cache import LocalInvalidationChannel, location_cache
+from weather_app.utils.spatial_index import SpatialIndex, find_nearby_locations, get_location_index
+
+@pytest.fixture
+def app():
+    """Flask app with a few saved locations."""
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Location(city="Boston", latitude=42.3601, longitude=-71.0589),
+            Location(city="Cambridge", latitude=42.3736, longitude=-71.1097),
+            Location(city="New York", latitude=40.7128, longitude=-74.0060),
+            Location(city="London", latitude=51.5074, longitude=-0.1278),
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def brute_force(points, latitude, longitude, k, radius_km=None):
+    distances = sorted(
+        (distance_km(latitude, longitude, lat, lon), point_id) for point_id, (lat, lon) in points.items()
+    )
+    return [(point_id, d) for d, point_id in distances if radius_km is None or d <= radius_km][:k]
+
+@pytest.mark.parametrize("cell_degrees", [0.5, 1.0, 10.0])
+def test_nearest_matches_brute_force(cell_degrees):
+    """Test that k-nearest results match a full scan, including near the poles and the antimeridian."""
+    rng = random.Random(7)
+    points = {n: (rng.uniform(-90, 90), rng.uniform(-180, 180)) for n in range(500)}
+    points.update({500: (89.9, 10.0), 501: (89.8, -170.0), 502: (0.0, 179.9), 503: (0.0, -179.9)})
+    index = SpatialIndex(cell_degrees)
+    for point_id, (lat, lon) in points.items():
+        index.add(point_id, lat, lon)
+
+    queries = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(50)]
+    queries += [(89.95, 100.0), (0.0, 180.0), (0.0, -180.0), (-90.0, 0.0)]
+    for lat, lon in queries:
+        for k, radius in ((1, None), (5, None), (20, 2000.0)):
+            expected = brute_force(points, lat, lon, k, radius)
+            result = index.nearest(lat, lon, k, radius)
+            assert [round(d, 6) for _, d in result] == [round(d, 6) for _, d in expected]
+
+def test_nearest_with_fewer_points_than_k():
+    """Test that a sparse index returns every point."""
+    index = SpatialIndex()
+    index.add(1, 10.0, 10.0)
+    index.add(2, -60.0, 170.0)
+    assert [point_id for point_id, _ in index.nearest(0.0, 0.0, k=10)] == [1, 2]
+    assert SpatialIndex().nearest(0.0, 0.0) == []
+
+def test_add_moves_and_remove():
+    """Test that re-adding an ID moves it and removing drops it."""
+    index = SpatialIndex()
+    index.add(1, 0.0, 0.0)
+    index.add(1, 45.0, 45.0)
+    assert len(index) == 1
+    assert index.nearest(45.0, 45.0, k=1)[0] == (1, 0.0)
+    index.remove(1)
+    index.remove(1)
+    assert len(index) == 0
+
+def test_invalid_cell_size():
+    """Test that cell sizes that do not tile the globe are rejected."""
+    with pytest.raises(ValueError):
+        SpatialIndex(0.7)
+    with pytest.raises(ValueError):
+        SpatialIndex(0)
+
+def test_index_is_built_and_kept_up_to_date(app):
+    """Test that the index follows committed creates and deletes and ignores rollbacks."""
+    index = get_location_index()
+    assert len(index) == 4
+
+    location = Location.create_location("Somerville", 42.3876, -71.0995)
+    assert location.id in {point_id for point_id, _ in index.nearest(42.3876, -71.0995, k=1)}
+
+    db.session.add(Location(city="Discarded", latitude=42.38, longitude=-71.1))
+    db.session.flush()
+    db.session.rollback()
+    assert len(index) == 5
+
+    Location.delete_location(location.id)
+    assert len(index) == 4
+    assert get_location_index() is index
+
+def test_find_nearby_locations(app):
+    """Test that nearby locations come back nearest first with distances."""
+    locations = find_nearby_locations(42.36, -71.06, k=3)
+    assert [location["city"] for location in locations] == ["Boston", "Cambridge", "New York"]
+    assert locations[0]["distance_km"] < 1
+    assert [location["city"] for location in find_nearby_locations(42.36, -71.06, k=3, radius_km=50)] == \
+        ["Boston", "Cambridge"]
+
+def test_nearby_follows_other_workers(app):
+    """Test that locations moved or created by another worker are found once announced on the invalidation channel."""
+    channel = LocalInvalidationChannel()
+    location_cache.attach_channel(channel)
+    try:
+        get_location_index()
+        with db.engine.begin() as connection:  # committed elsewhere: no events in this process
+            connection.exec_driver_sql("UPDATE locations SET latitude = 48.8566, longitude = 2.3522 WHERE id = 1")
+            connection.exec_driver_sql("INSERT INTO locations (id, city, latitude, longitude) "
+                                       "VALUES (10, 'Somerville', 42.3876, -71.0995)")
+        channel.publish("1,10")
+        assert [location["city"] for location in find_nearby_locations(42.36, -71.06, k=2)] == \
+            ["Cambridge", "Somerville"]
+        assert find_nearby_locations(48.85, 2.35, k=1)[0]["city"] == "Boston"
+    finally:
+        location_cache.attach_channel(None)
+
+def test_nearby_route(client):
+    """Test the nearby locations endpoint."""
+    response = client.get('/api/locations/nearby?lat=51.5&lon=-0.12&k=1')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["locations"][0]["city"] == "London"
+    assert data["locations"][0]["distance_km"] < 2
+
+def test_nearby_route_invalid(client):
+    """Test that missing or invalid parameters are rejected."""
+    assert client.get('/api/locations/nearby?lat=51.5').status_code == 400
+    assert client.get('/api/locations/nearby?lat=91&lon=0').status_code == 400
+    assert client.get('/api/locations/nearby?lat=0&lon=0&k=0').status_code == 400
+    assert client.get('/api/locations/nearby?lat=0&lon=0&radius_km=-1').status_code == 400
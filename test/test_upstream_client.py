@@ -0,0 +1,81 @@
+import pytest
+import requests
+from unittest.mock import Mock
+from weather_app.utils.upstream_client import UpstreamClient, get_upstream_client, reset_upstream_client
+
+def make_response(status_code, payload=None):
+    """Builds a mock response with the given status code and JSON payload."""
+    response = Mock()
+    response.status_code = status_code
+    response.headers = {}
+    response.json.return_value = payload or {}
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(f"{status_code} error")
+    return response
+
+@pytest.fixture
+def client(mocker):
+    """Upstream client with sleeping disabled."""
+    mocker.patch("weather_app.utils.upstream_client.time.sleep")
+    return UpstreamClient(pool_size=4, max_retries=2)
+
+def test_get_json_success(client, mocker):
+    """Test a successful call returns the JSON body and records timing."""
+    mock_get = mocker.patch.object(client._session, "get", return_value=make_response(200, {"ok": True}))
+    assert client.get_json("http://example.com", endpoint="forecast") == {"ok": True}
+    mock_get.assert_called_once_with("http://example.com", timeout=client.timeout)
+
+    stats = client.get_stats()["forecast"]
+    assert stats["calls"] == 1
+    assert stats["errors"] == 0
+    assert stats["retries"] == 0
+
+def test_get_json_retries_on_5xx(client, mocker):
+    """Test that 5xx responses are retried until success."""
+    mocker.patch.object(client._session, "get", side_effect=[make_response(503), make_response(200, {"ok": True})])
+    assert client.get_json("http://example.com", endpoint="forecast") == {"ok": True}
+    assert client.get_stats()["forecast"]["retries"] == 1
+
+def test_get_json_gives_up_after_max_retries(client, mocker):
+    """Test that retries are bounded and the final error is raised."""
+    mock_get = mocker.patch.object(client._session, "get", return_value=make_response(429))
+    with pytest.raises(requests.HTTPError):
+        client.get_json("http://example.com", endpoint="forecast")
+    assert mock_get.call_count == 3
+    assert client.get_stats()["forecast"]["errors"] == 1
+
+def test_get_json_does_not_retry_4xx(client, mocker):
+    """Test that client errors other than 429 fail immediately."""
+    mock_get = mocker.patch.object(client._session, "get", return_value=make_response(401))
+    with pytest.raises(requests.HTTPError):
+        client.get_json("http://example.com")
+    assert mock_get.call_count == 1
+
+def test_get_json_retries_connection_errors(client, mocker):
+    """Test that connection errors are retried."""
+    mocker.patch.object(client._session, "get", side_effect=[requests.ConnectionError("reset"), make_response(200, {"ok": True})])
+    assert client.get_json("http://example.com") == {"ok": True}
+
+def test_on_attempt_called_for_every_attempt(client, mocker):
+    """Test that the attempt hook runs before the first try and each retry, and can stop the call."""
+    mocker.patch.object(client._session, "get", side_effect=[make_response(503), make_response(200, {"ok": True})])
+    attempts = []
+    assert client.get_json("http://example.com", on_attempt=lambda: attempts.append(1)) == {"ok": True}
+    assert len(attempts) == 2
+
+    mock_get = mocker.patch.object(client._session, "get", return_value=make_response(503))
+    def budget():
+        attempts.append(1)
+        if len(attempts) > 3:
+            raise RuntimeError("out of quota")
+    with pytest.raises(RuntimeError, match="out of quota"):
+        client.get_json("http://example.com", on_attempt=budget)
+    assert mock_get.call_count == 1
+
+def test_shared_client_is_singleton():
+    """Test that the shared client is reused until reset."""
+    reset_upstream_client()
+    client = get_upstream_client()
+    assert get_upstream_client() is client
+    reset_upstream_client()
+    assert get_upstream_client() is not client
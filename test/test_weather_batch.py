@@ -0,0 +1,75 @@
+import pytest
+from app import create_app
+from config import TestConfig
+from weather_app.models.location_model import Location
+from weather_app.utils.db import db
+
+@pytest.fixture
+def app():
+    """Flask app with locations, two of them in the same grid cell."""
+    app = create_app(TestConfig)
+    app.config['BATCH_MAX_LOCATIONS'] = 3
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Location(city="Boston", latitude=42.3601, longitude=-71.0589),
+            Location(city="North End", latitude=42.3650, longitude=-71.0550),
+            Location(city="New York", latitude=40.7128, longitude=-74.0060),
+            Location(city="London", latitude=51.5074, longitude=-0.1278),
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def upstream(mocker):
+    calls = []
+
+    async def fetch(latitude, longitude):
+        calls.append((latitude, longitude))
+        return {"lat": latitude}
+
+    mocker.patch("weather_app.utils.dashboard.fetch_forecast_async", side_effect=fetch)
+    mocker.patch("weather_app.utils.dashboard.fetch_air_quality_data_async", side_effect=fetch)
+    return calls
+
+def test_get_locations_by_ids(app):
+    """Test that many locations resolve in request order, skipping unknown IDs."""
+    locations = Location.get_locations_by_ids([3, 99, 1, 3])
+    assert [location["city"] for location in locations] == ["New York", "Boston"]
+
+def test_weather_batch_by_ids(client, upstream):
+    """Test that a batch is keyed by location ID and fetched once per grid cell."""
+    response = client.get('/api/get-weather-batch?ids=1,2,3')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert set(data["results"]) == {"1", "2", "3"}
+    assert data["missing"] == []
+    assert data["complete"] is True
+    assert data["results"]["1"]["forecast"]["status"] == "ok"
+    assert data["results"]["1"]["grid_cell"] == data["results"]["2"]["grid_cell"]
+    assert "air_quality" not in data["results"]["1"]
+    assert len(upstream) == 2
+
+    data = client.get('/api/get-weather-batch?ids=4,42').get_json()
+    assert set(data["results"]) == {"4"} and data["missing"] == [42]
+
+def test_air_quality_batch_by_bbox(client, upstream):
+    """Test that a bounding box selects the batch."""
+    data = client.get('/api/get-air-quality-batch?bbox=40,-75,43,-70').get_json()
+    assert set(data["results"]) == {"1", "2", "3"}
+    assert data["results"]["3"]["air_quality"] == {"status": "ok", "data": {"lat": 40.7128}}
+
+def test_batch_limits(client, upstream):
+    """Test that oversized or malformed batches are rejected."""
+    assert client.get('/api/get-weather-batch?ids=1,2,3,4').status_code == 400
+    assert client.get('/api/get-weather-batch?bbox=-90,-180,90,180').status_code == 400
+    assert client.get('/api/get-weather-batch').status_code == 400
+    assert client.get('/api/get-weather-batch?ids=1&bbox=0,0,1,1').status_code == 400
+    assert client.get('/api/get-weather-batch?ids=a').status_code == 400
+    assert upstream == []
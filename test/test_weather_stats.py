@@ -0,0 +1,96 @@
+import math
+import numpy as np
+import pytest
+from app import create_app
+from config import TestConfig
+from weather_app.models.location_model import Location
+from weather_app.models.observation_model import AirQualityObservation, HistoricalObservation
+from weather_app.utils.api_utils import get_grid_cell
+from weather_app.utils.db import db
+from weather_app.utils.weather_stats import compute_stats, to_records
+
+DAY = 86400
+START = 1_699_920_000  # 2023-11-14 00:00 UTC
+
+@pytest.fixture
+def app():
+    """Flask app with two locations and three days of hourly history for the first."""
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Location(city="Boston", latitude=42.3601, longitude=-71.0589),
+            Location(city="New York", latitude=40.7128, longitude=-74.0060),
+        ])
+        db.session.commit()
+        rng = np.random.default_rng(0)
+        temps = rng.normal(280, 5, 72)
+        HistoricalObservation.bulk_insert([
+            {"location_id": 1, "ts": START + 3600 * n, "temp": float(temps[n]), "precipitation": 0.5,
+             "payload": "{}"}
+            for n in range(72)
+        ] + [{"location_id": 2, "ts": START, "temp": 270.0, "precipitation": None, "payload": "{}"}])
+        AirQualityObservation.bulk_insert([
+            AirQualityObservation.row(get_grid_cell(42.3601, -71.0589).id, START + DAY * day + 600, {"aqi": aqi})
+            for day, aqi in enumerate([1, 3, 5])
+        ])
+        app.temps = temps
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_daily_stats_match_numpy(app):
+    """Test daily aggregates against direct NumPy computations."""
+    result = compute_stats([1], START, START + 3 * DAY, "day", percentiles=(50, 90))
+    assert result["buckets"].tolist() == [START, START + DAY, START + 2 * DAY]
+
+    stats = result["locations"][1]
+    for day in range(3):
+        temps = app.temps[24 * day:24 * (day + 1)]
+        assert stats["observations"][day] == 24
+        assert stats["temp_min"][day] == pytest.approx(temps.min())
+        assert stats["temp_max"][day] == pytest.approx(temps.max())
+        assert stats["temp_mean"][day] == pytest.approx(temps.mean())
+        assert stats["temp_p50"][day] == pytest.approx(np.percentile(temps, 50))
+        assert stats["temp_p90"][day] == pytest.approx(np.percentile(temps, 90))
+        assert stats["precipitation_total"][day] == pytest.approx(12.0)
+    assert stats["aqi_mean"].tolist() == [1, 3, 5]
+    assert stats["aqi_rolling_mean"].tolist() == [1, 2, 3]
+
+def test_batch_of_locations(app):
+    """Test that many locations are aggregated in one call, with empty buckets as NaN."""
+    result = compute_stats([1, 2], START, START + 3 * DAY, "week", aqi_window=1)
+    assert len(result["buckets"]) == 1
+    second = result["locations"][2]
+    assert second["observations"][0] == 1
+    assert second["temp_mean"][0] == 270.0
+    assert math.isnan(second["precipitation_total"][0])
+    assert math.isnan(second["aqi_mean"][0])
+    assert result["locations"][1]["observations"][0] == 72
+
+def test_invalid_arguments(app):
+    """Test validation of granularity, range and percentiles."""
+    with pytest.raises(ValueError, match="granularity"):
+        compute_stats([1], START, START + DAY, "month")
+    with pytest.raises(ValueError, match="time range"):
+        compute_stats([1], START, START)
+    with pytest.raises(ValueError, match="percentiles"):
+        compute_stats([1], START, START + DAY, percentiles=(150,))
+
+def test_to_records_replaces_nan(app):
+    """Test conversion to JSON-ready rows."""
+    result = compute_stats([2], START, START + 2 * DAY)
+    records = to_records(result["buckets"], result["locations"][2])
+    assert records[0]["start"] == START and records[0]["temp_min"] == 270.0
+    assert records[1]["temp_min"] is None and records[1]["observations"] == 0
+
+def test_get_stats_route(app):
+    """Test the stats endpoint."""
+    client = app.test_client()
+    response = client.get(f"/api/get-stats/1?start={START}&end={START + 3 * DAY}&granularity=day&percentiles=25,75")
+    assert response.status_code == 200
+    stats = response.get_json()["stats"]
+    assert len(stats) == 3 and "temp_p25" in stats[0]
+
+    assert client.get(f"/api/get-stats/1?start={START}&end={START + DAY}&granularity=year").status_code == 400
+    assert client.get("/api/get-stats/99").status_code == 400
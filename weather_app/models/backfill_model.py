@@ -0,0 +1,299 @@
+import logging
+import time
+
+from sqlalchemy import func, or_
+from sqlalchemy.exc import SQLAlchemyError
+
+from weather_app.models.location_model import Location
+from weather_app.utils.db import db
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+ACTIVE_STATUSES = (PENDING, RUNNING)
+
+HOUR = 3600
+
+
+class BackfillJob(db.Model):
+    """
+    A request to load hourly history for a set of locations over a time range.
+
+    Progress is tracked per location in ``BackfillTask`` rows, so a job can be
+    resumed where it stopped after a restart. A runner executes a job only
+    while it holds the job's lease (``owner`` until ``lease_until``), so that
+    workers sharing the database never run the same job twice.
+    """
+
+    __tablename__ = 'backfill_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(16), nullable=False, default=PENDING, index=True)
+    start_ts = db.Column(db.Integer, nullable=False)  # inclusive, aligned to the hour
+    end_ts = db.Column(db.Integer, nullable=False)    # exclusive, aligned to the hour
+    created_at = db.Column(db.Integer, nullable=False)
+    finished_at = db.Column(db.Integer)
+    error = db.Column(db.Text)
+    owner = db.Column(db.String(64))      # runner holding the lease
+    lease_until = db.Column(db.Integer)   # Unix seconds; another runner may claim the job after this
+
+    tasks = db.relationship('BackfillTask', backref='job', lazy='dynamic', cascade='all, delete-orphan')
+
+    @property
+    def hours_per_location(self) -> int:
+        return (self.end_ts - self.start_ts) // HOUR
+
+    @classmethod
+    def create_job(cls, location_ids: list[int], start: int, end: int) -> 'BackfillJob':
+        """
+        Creates a job with one pending task per location.
+
+        Args:
+            location_ids (list[int]): The locations to backfill.
+            start (int): Inclusive start, Unix seconds. Rounded down to the hour.
+            end (int): Exclusive end, Unix seconds. Clamped to the current time and rounded up to the hour.
+
+        Returns:
+            BackfillJob: The new job.
+
+        Raises:
+            ValueError: If no locations are given, a location does not exist or the range is empty.
+        """
+        location_ids = list(dict.fromkeys(location_ids))
+        if not location_ids:
+            raise ValueError("At least one location ID is required.")
+        start -= start % HOUR
+        end = min(end, int(time.time()))
+        end += -end % HOUR
+        if start >= end:
+            raise ValueError(f"Invalid time range: start {start} must be before end {end}.")
+
+        existing = {row.id for row in db.session.query(Location.id).filter(Location.id.in_(location_ids)).all()}
+        missing = [location_id for location_id in location_ids if location_id not in existing]
+        if missing:
+            raise ValueError(f"Locations not found: {missing}")
+
+        try:
+            job = cls(status=PENDING, start_ts=start, end_ts=end, created_at=int(time.time()))
+            db.session.add(job)
+            db.session.flush()
+            db.session.add_all([
+                BackfillTask(job_id=job.id, location_id=location_id, cursor=start, status=PENDING)
+                for location_id in location_ids
+            ])
+            db.session.commit()
+            logger.info("Created backfill job %d for %d locations, %d hours each",
+                        job.id, len(location_ids), job.hours_per_location)
+            return job
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error("Database error while creating backfill job: %s", str(e))
+            raise
+
+    @classmethod
+    def get_job(cls, job_id: int) -> 'BackfillJob':
+        """
+        Retrieves a job by ID.
+
+        Raises:
+            ValueError: If the job does not exist.
+        """
+        job = db.session.get(cls, job_id, populate_existing=True)  # status is updated by worker threads
+        if job is None:
+            raise ValueError(f"Backfill job {job_id} not found.")
+        return job
+
+    @classmethod
+    def get_active_job_ids(cls) -> list[int]:
+        """
+        Retrieves the IDs of jobs that are pending or were running, oldest first.
+        """
+        return [row.id for row in db.session.query(cls.id).filter(cls.status.in_(ACTIVE_STATUSES)).order_by(cls.id)]
+
+    @classmethod
+    def claim(cls, job_id: int, owner: str, lease_seconds: int) -> bool:
+        """
+        Takes the lease on a pending or running job and marks it running.
+
+        The lease is taken in a single conditional UPDATE, so of several
+        runners claiming the same job only one succeeds. A runner can claim a
+        job it already holds, or one whose lease has expired.
+
+        Returns:
+            bool: True if the lease is now held by ``owner``.
+        """
+        now = int(time.time())
+        try:
+            claimed = cls.query.filter(
+                cls.id == job_id,
+                cls.status.in_(ACTIVE_STATUSES),
+                or_(cls.owner.is_(None), cls.owner == owner, cls.lease_until < now),
+            ).update({cls.status: RUNNING, cls.owner: owner, cls.lease_until: now + lease_seconds},
+                     synchronize_session=False)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error("Database error while claiming backfill job %d: %s", job_id, str(e))
+            raise
+        if claimed:
+            logger.info("Backfill job %d claimed by %s", job_id, owner)
+        return claimed == 1
+
+    @classmethod
+    def renew_leases(cls, job_ids: list[int], owner: str, lease_seconds: int) -> set[int]:
+        """
+        Extends the leases ``owner`` holds on running jobs.
+
+        Returns:
+            set[int]: The jobs of ``job_ids`` still running under ``owner``'s lease.
+        """
+        if not job_ids:
+            return set()
+        held = cls.query.filter(cls.id.in_(job_ids), cls.owner == owner, cls.status == RUNNING)
+        try:
+            held.update({cls.lease_until: int(time.time()) + lease_seconds}, synchronize_session=False)
+            job_ids = {row.id for row in held.with_entities(cls.id)}
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error("Database error while renewing backfill leases: %s", str(e))
+            raise
+        return job_ids
+
+    @classmethod
+    def release_leases(cls, owner: str) -> None:
+        """
+        Gives up the leases ``owner`` holds, so other runners can resume its jobs at once.
+        """
+        try:
+            cls.query.filter(cls.owner == owner).update({cls.owner: None, cls.lease_until: None},
+                                                        synchronize_session=False)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error("Database error while releasing backfill leases: %s", str(e))
+            raise
+
+    @classmethod
+    def get_status(cls, job_id: int) -> str | None:
+        """
+        Reads a job's current status from the database, e.g. to notice a cancel made by another process.
+
+        Returns:
+            str | None: The status, or None if the job does not exist.
+        """
+        return db.session.query(cls.status).filter(cls.id == job_id).scalar()
+
+    @classmethod
+    def transition(cls, job_id: int, status: str, from_statuses: tuple[str, ...], error: str | None = None,
+                   owner: str | None = None) -> bool:
+        """
+        Moves a job to a status if it is in one of ``from_statuses``, recording the finish time for final states.
+
+        The check and the update are a single conditional UPDATE, so a status
+        written concurrently by another process (e.g. a cancel) is never overwritten.
+
+        Args:
+            job_id (int): The job.
+            status (str): The new status.
+            from_statuses (tuple[str, ...]): The statuses the job may be moved from.
+            error (str | None): An error or note to record.
+            owner (str | None): If given, the job is only moved while this runner holds its lease.
+
+        Returns:
+            bool: True if the job was moved.
+        """
+        values = {cls.status: status}
+        if error is not None:
+            values[cls.error] = error
+        if status not in ACTIVE_STATUSES:
+            values[cls.finished_at] = int(time.time())
+        query = cls.query.filter(cls.id == job_id, cls.status.in_(from_statuses))
+        if owner is not None:
+            query = query.filter(cls.owner == owner)
+        try:
+            moved = query.update(values, synchronize_session=False)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error("Database error while updating backfill job %d: %s", job_id, str(e))
+            raise
+        if moved:
+            logger.info("Backfill job %d is %s", job_id, status)
+        return moved == 1
+
+    def get_progress(self) -> dict:
+        """
+        Summarizes task progress from the database.
+
+        Returns:
+            dict: Total and completed hours, and task counts per status.
+        """
+        hours_done, = (
+            db.session.query(func.coalesce(func.sum(BackfillTask.cursor - self.start_ts), 0))
+            .filter(BackfillTask.job_id == self.id)
+            .one()
+        )
+        counts = dict(
+            db.session.query(BackfillTask.status, func.count(BackfillTask.id))
+            .filter(BackfillTask.job_id == self.id)
+            .group_by(BackfillTask.status)
+            .all()
+        )
+        tasks = sum(counts.values())
+        return {
+            "locations": tasks,
+            "hours_total": tasks * self.hours_per_location,
+            "hours_done": int(hours_done) // HOUR,
+            "tasks": {status: counts.get(status, 0) for status in (PENDING, RUNNING, COMPLETED, FAILED)},
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "start": self.start_ts,
+            "end": self.end_ts,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "owner": self.owner,
+        }
+
+
+class BackfillTask(db.Model):
+    """
+    The backfill of one location within a job.
+
+    ``cursor`` is the first hour not yet written; it only advances in the same
+    transaction that stores the rows before it.
+    """
+
+    __tablename__ = 'backfill_tasks'
+    __table_args__ = (
+        db.Index('ix_backfill_tasks_job_location', 'job_id', 'location_id', unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('backfill_jobs.id', ondelete='CASCADE'), nullable=False)
+    location_id = db.Column(db.Integer, db.ForeignKey('locations.id', ondelete='CASCADE'), nullable=False)
+    cursor = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(16), nullable=False, default=PENDING)
+    fetched = db.Column(db.Integer, nullable=False, default=0)  # upstream calls made
+    error = db.Column(db.Text)
+
+    @classmethod
+    def get_unfinished(cls, job_id: int) -> list['BackfillTask']:
+        """
+        Retrieves a job's tasks that still have hours left to load.
+        """
+        return cls.query.filter(cls.job_id == job_id, cls.status.in_(ACTIVE_STATUSES)).order_by(cls.id).all()
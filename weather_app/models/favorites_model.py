@@ -1,11 +1,22 @@
+from weather_app.models.location_model import Location
 from weather_app.utils.db import db
-from sqlalchemy.exc import SQLAlchemyError
+from weather_app.utils.record_store import record_store, register_write_through, track_invalidation
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Most location IDs a single bulk favorites operation may take
+MAX_BULK_FAVORITES = 1000
+
 class FavoritesModel(db.Model):
     __tablename__ = 'favorites'
+    # Also serves lookups by user_id, as its leading column. An index rather than a table constraint so that
+    # upgrade_schema adds it to databases created without it, dropping duplicate favorites first
+    __table_args__ = (
+        db.Index('uq_favorites_user_location', 'user_id', 'location_id', unique=True, info={'deduplicate': True}),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -31,19 +42,82 @@ class FavoritesModel(db.Model):
         """
         try:
             logger.info("Fetching favorites for user ID %d", user_id)
-            favorites = cls.query.filter_by(user_id=user_id).all()
+            favorite_ids = record_store.get("favorites", user_id, cls._load_favorite_ids)
 
-            if not favorites:
+            if not favorite_ids:
                 logger.warning("No favorites found for user ID %d", user_id)
                 raise ValueError("Favorites list is empty")
 
-            favorite_ids = [favorite.location_id for favorite in favorites]
             logger.info("Favorites retrieved: %s", favorite_ids)
             return favorite_ids
         except SQLAlchemyError as e:
             logger.error("Database error while retrieving favorites: %s", str(e))
             raise
 
+    @classmethod
+    def _load_favorite_ids(cls, user_id: int) -> list[int]:
+        return [row.location_id for row in
+                db.session.query(cls.location_id).filter(cls.user_id == user_id).order_by(cls.id)]
+
+    @classmethod
+    def get_favorite_locations(cls, user_id: int) -> list[dict]:
+        """
+        Retrieves a user's favorite locations with a single joined query, or
+        from the record store when it is enabled.
+
+        Args:
+            user_id (int): The ID of the user whose favorites are being retrieved.
+
+        Raises:
+            ValueError: If no favorites are found for the user.
+
+        Returns:
+            list: The favorite locations as dictionaries, in the order they were added.
+        """
+        try:
+            logger.info("Fetching favorite locations for user ID %d", user_id)
+            if record_store.enabled:
+                locations = Location.get_locations_by_ids(
+                    record_store.get("favorites", user_id, cls._load_favorite_ids))
+            else:
+                rows = (
+                    db.session.query(Location.id, Location.city, Location.latitude, Location.longitude)
+                    .join(cls, cls.location_id == Location.id)
+                    .filter(cls.user_id == user_id)
+                    .order_by(cls.id)
+                    .all()
+                )
+                locations = [row._asdict() for row in rows]
+
+            if not locations:
+                logger.warning("No favorites found for user ID %d", user_id)
+                raise ValueError("Favorites list is empty")
+
+            return locations
+        except SQLAlchemyError as e:
+            logger.error("Database error while retrieving favorite locations: %s", str(e))
+            raise
+
+    @classmethod
+    def get_location_popularity(cls) -> list[tuple[int, int]]:
+        """
+        Retrieves every favorited location with the number of users favoriting it.
+
+        Returns:
+            list: (location_id, user_count) tuples, most popular first.
+        """
+        try:
+            rows = (
+                db.session.query(cls.location_id, func.count(func.distinct(cls.user_id)).label("users"))
+                .group_by(cls.location_id)
+                .order_by(func.count(func.distinct(cls.user_id)).desc(), cls.location_id)
+                .all()
+            )
+            return [(location_id, users) for location_id, users in rows]
+        except SQLAlchemyError as e:
+            logger.error("Database error while computing favorite popularity: %s", str(e))
+            raise
+
     @classmethod
     def add_favorite(cls, user_id: int, location_id: int) -> None:
         """
@@ -59,21 +133,139 @@ class FavoritesModel(db.Model):
         try:
             logger.info("Adding location ID %d to favorites for user ID %d", location_id, user_id)
 
-            # Check if the favorite already exists
-            existing_favorite = cls.query.filter_by(user_id=user_id, location_id=location_id).first()
-            if existing_favorite:
-                logger.warning("Favorite already exists for user ID %d and location ID %d", user_id, location_id)
-                raise ValueError("Favorite already exists")
-
+            # The unique constraint rejects duplicates, including concurrent inserts of the same favorite
             new_favorite = cls(user_id=user_id, location_id=location_id)
             db.session.add(new_favorite)
             db.session.commit()
             logger.info("Favorite added successfully")
+        except IntegrityError:
+            db.session.rollback()
+            if cls.query.filter_by(user_id=user_id, location_id=location_id).first() is None:
+                logger.error("Integrity error while adding favorite for user ID %d and location ID %d",
+                             user_id, location_id)
+                raise
+            logger.warning("Favorite already exists for user ID %d and location ID %d", user_id, location_id)
+            raise ValueError("Favorite already exists")
         except SQLAlchemyError as e:
             db.session.rollback()
             logger.error("Database error while adding favorite: %s", str(e))
             raise
 
+    @classmethod
+    def _change_favorites(cls, user_id: int, location_ids: list[int], plan) -> dict:
+        """
+        Applies a bulk change to a user's favorites in one transaction.
+
+        Args:
+            user_id (int): The ID of the user.
+            location_ids (list[int]): The location IDs the operation was given.
+            plan (Callable): Called with the current location IDs (ordered by
+                when they were added) and returns the IDs to add and to remove.
+
+        Raises:
+            ValueError: If too many IDs are given or a location to add does not exist.
+
+        Returns:
+            dict: The "added" and "removed" location IDs and the resulting "favorites".
+        """
+        if len(location_ids) > MAX_BULK_FAVORITES:
+            raise ValueError(f"Too many locations: {len(location_ids)}. At most {MAX_BULK_FAVORITES} are allowed.")
+        try:
+            existing = [row.location_id for row in
+                        db.session.query(cls.location_id).filter(cls.user_id == user_id).order_by(cls.id)]
+            to_add, to_remove = plan(existing)
+
+            if to_add:
+                found = {row.id for row in db.session.query(Location.id).filter(Location.id.in_(to_add))}
+                missing = [location_id for location_id in to_add if location_id not in found]
+                if missing:
+                    raise ValueError(f"Locations not found: {missing}")
+            if to_remove:
+                cls.query.filter(cls.user_id == user_id, cls.location_id.in_(to_remove)) \
+                    .delete(synchronize_session=False)
+            if to_add:
+                db.session.execute(insert(cls), [{"user_id": user_id, "location_id": location_id}
+                                                 for location_id in to_add])
+            removed = set(to_remove)
+            favorites = [location_id for location_id in existing if location_id not in removed] + to_add
+            # Bulk statements fire no mapper events, so the stored list is dropped on commit here
+            track_invalidation(db.session(), "favorites", user_id)
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent change added one of the same favorites first
+            db.session.rollback()
+            logger.warning("Concurrent favorites change for user ID %d", user_id)
+            raise ValueError("Favorites changed concurrently; please retry")
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error("Database error while changing favorites: %s", str(e))
+            raise
+
+        logger.info("Favorites for user ID %d: %d added, %d removed, %d total",
+                    user_id, len(to_add), len(to_remove), len(favorites))
+        return {"added": to_add, "removed": to_remove, "favorites": favorites}
+
+    @classmethod
+    def add_favorites(cls, user_id: int, location_ids: list[int]) -> dict:
+        """
+        Adds many locations to the user's favorites; ones already favorited are skipped.
+
+        Args:
+            user_id (int): The ID of the user.
+            location_ids (list[int]): The IDs of the locations to be added.
+
+        Raises:
+            ValueError: If a location does not exist.
+
+        Returns:
+            dict: The "added" and "removed" location IDs and the resulting "favorites".
+        """
+        def plan(existing):
+            current = set(existing)
+            return [location_id for location_id in dict.fromkeys(location_ids) if location_id not in current], []
+
+        return cls._change_favorites(user_id, location_ids, plan)
+
+    @classmethod
+    def remove_favorites(cls, user_id: int, location_ids: list[int]) -> dict:
+        """
+        Removes many locations from the user's favorites; ones not favorited are skipped.
+
+        Args:
+            user_id (int): The ID of the user.
+            location_ids (list[int]): The IDs of the locations to be removed.
+
+        Returns:
+            dict: The "added" and "removed" location IDs and the resulting "favorites".
+        """
+        def plan(existing):
+            requested = set(location_ids)
+            return [], [location_id for location_id in existing if location_id in requested]
+
+        return cls._change_favorites(user_id, location_ids, plan)
+
+    @classmethod
+    def replace_favorites(cls, user_id: int, location_ids: list[int]) -> dict:
+        """
+        Makes the user's favorites exactly the given locations, touching only the difference.
+
+        Args:
+            user_id (int): The ID of the user.
+            location_ids (list[int]): The IDs of the locations to keep or add.
+
+        Raises:
+            ValueError: If a location does not exist.
+
+        Returns:
+            dict: The "added" and "removed" location IDs and the resulting "favorites".
+        """
+        def plan(existing):
+            desired, current = set(location_ids), set(existing)
+            to_add = [location_id for location_id in dict.fromkeys(location_ids) if location_id not in current]
+            return to_add, [location_id for location_id in existing if location_id not in desired]
+
+        return cls._change_favorites(user_id, location_ids, plan)
+
     @classmethod
     def remove_favorite(cls, user_id: int, location_id: int) -> None:
         """
@@ -101,3 +293,6 @@ class FavoritesModel(db.Model):
             db.session.rollback()
             logger.error("Database error while removing favorite: %s", str(e))
             raise
+
+
+register_write_through(FavoritesModel, "favorites", key=lambda favorite: favorite.user_id)
@@ -0,0 +1,76 @@
+import logging
+import time
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from weather_app.utils.db import db
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class ServiceLease(db.Model):
+    """
+    A named lease on a singleton background service, e.g. the refresh planner.
+
+    Workers sharing the database run such a service only while they hold its
+    lease (``owner`` until ``lease_until``), so it runs in one process at a
+    time and is taken over by another once its holder stops renewing it.
+    """
+
+    __tablename__ = 'service_leases'
+
+    name = db.Column(db.String(64), primary_key=True)
+    owner = db.Column(db.String(64))      # process holding the lease
+    lease_until = db.Column(db.Integer)   # Unix seconds; another process may claim the lease after this
+
+    @classmethod
+    def claim(cls, name: str, owner: str, lease_seconds: int) -> bool:
+        """
+        Takes or renews a lease.
+
+        The lease is taken in a single conditional UPDATE (or the INSERT of
+        its row, the first time), so of several processes claiming it only
+        one succeeds. A process can claim a lease it already holds, or one
+        that has expired or been released.
+
+        Returns:
+            bool: True if the lease is now held by ``owner``.
+        """
+        now = int(time.time())
+        values = {cls.owner: owner, cls.lease_until: now + lease_seconds}
+        try:
+            claimed = cls.query.filter(
+                cls.name == name,
+                or_(cls.owner.is_(None), cls.owner == owner, cls.lease_until < now),
+            ).update(values, synchronize_session=False)
+            if not claimed and db.session.query(cls.name).filter(cls.name == name).first() is None:
+                db.session.add(cls(name=name, owner=owner, lease_until=now + lease_seconds))
+                db.session.flush()
+                claimed = 1
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()  # another process created the lease first
+            return False
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error("Database error while claiming lease %s: %s", name, str(e))
+            raise
+        return claimed == 1
+
+    @classmethod
+    def release(cls, name: str, owner: str) -> None:
+        """
+        Gives up a lease ``owner`` holds, so another process can take it at once.
+        """
+        try:
+            cls.query.filter(cls.name == name, cls.owner == owner).update(
+                {cls.owner: None, cls.lease_until: None}, synchronize_session=False)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error("Database error while releasing lease %s: %s", name, str(e))
+            raise
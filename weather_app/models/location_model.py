@@ -1,18 +1,60 @@
 from dataclasses import dataclass, asdict
+import json
 import logging
+import os
+import time
+from typing import Iterator
+from sqlalchemy import Row, or_
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import validates
+from sqlalchemy.orm import make_transient_to_detached, validates
+from weather_app.models.observation_model import HistoricalObservation
 from weather_app.utils.db import db
-from weather_app.utils.api_utils import fetch_air_quality_data, fetch_forecast, fetch_historical_data
+from weather_app.utils.api_utils import (
+    fetch_air_quality_data, fetch_air_quality_data_async, fetch_forecast, fetch_forecast_async, fetch_historical_data,
+    get_grid_cell
+)
+from weather_app.utils.grid import GridCell, SpatialGrid
+from weather_app.utils.location_cache import location_cache
 from weather_app.utils.logger import configure_logger
+from weather_app.utils.record_store import record_store, register_write_through
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
+# Upper bound on upstream timemachine calls a single history lookup may make
+MAX_HISTORICAL_FETCH_HOURS = int(os.getenv("MAX_HISTORICAL_FETCH_HOURS", "168"))
+
+# Largest page a location listing may return
+MAX_PAGE_SIZE = 1000
+
+
+def check_coordinate(key: str, value: float) -> float:
+    """
+    Checks a latitude or longitude value.
+
+    Args:
+        key (str): "latitude" or "longitude".
+        value (float): The value to check.
+
+    Returns:
+        float: The value, unchanged.
+
+    Raises:
+        ValueError: If the value is out of range.
+    """
+    if key == 'latitude' and not (-90 <= value <= 90):
+        raise ValueError(f"Invalid latitude: {value}. Must be between -90 and 90.")
+    if key == 'longitude' and not (-180 <= value <= 180):
+        raise ValueError(f"Invalid longitude: {value}. Must be between -180 and 180.")
+    return value
+
 
 @dataclass
 class Location(db.Model):
     __tablename__ = 'locations'
+    __table_args__ = (
+        db.Index('ix_locations_lat_lon', 'latitude', 'longitude'),  # bounding-box lookups, e.g. get_ids_in_cell
+    )
 
     id: int = db.Column(db.Integer, primary_key=True)
     city: str = db.Column(db.String(80), nullable=False)
@@ -24,11 +66,7 @@ class Location(db.Model):
         """
         Validates latitude and longitude values.
         """
-        if key == 'latitude' and not (-90 <= value <= 90):
-            raise ValueError(f"Invalid latitude: {value}. Must be between -90 and 90.")
-        if key == 'longitude' and not (-180 <= value <= 180):
-            raise ValueError(f"Invalid longitude: {value}. Must be between -180 and 180.")
-        return value
+        return check_coordinate(key, value)
 
     @classmethod
     def create_location(cls, city: str, latitude: float, longitude: float) -> 'Location':
@@ -76,6 +114,170 @@ class Location(db.Model):
             raise ValueError(f"Location {location_id} not found.")
         return location
 
+    @classmethod
+    def get_cached(cls, location_id: int) -> 'Location':
+        """
+        Retrieves a location by its ID through the location cache.
+
+        The result is a detached copy shared with other requests: read it, but
+        do not modify it or add it to a session.
+
+        Raises:
+            ValueError: If the location does not exist.
+        """
+        return location_cache.get(location_id, cls._load_detached)
+
+    @classmethod
+    def _load_detached(cls, location_id: int) -> 'Location':
+        location = cls(**record_store.get("location", location_id, cls._load_record))
+        make_transient_to_detached(location)
+        return location
+
+    @classmethod
+    def _load_record(cls, location_id: int) -> dict:
+        row = db.session.query(cls.id, cls.city, cls.latitude, cls.longitude).filter(cls.id == location_id).first()
+        if row is None:
+            logger.error("Location with ID %s not found", location_id)
+            raise ValueError(f"Location {location_id} not found.")
+        return row._asdict()
+
+    @classmethod
+    def get_ids_in_cell(cls, grid: SpatialGrid, cell_id: str) -> list[int]:
+        """
+        Retrieves the IDs of locations that snap to a grid cell.
+
+        Args:
+            grid (SpatialGrid): The grid the cell belongs to.
+            cell_id (str): The cell identifier.
+
+        Returns:
+            list[int]: The matching location IDs.
+        """
+        min_lat, min_lon, max_lat, max_lon = grid.bounds(cell_id)
+        rows = (
+            db.session.query(cls.id, cls.latitude, cls.longitude)
+            .filter(cls.latitude.between(min_lat, max_lat))
+            .filter(cls.longitude.between(min_lon, max_lon))
+            .all()
+        )
+        # The bounds are inclusive, so drop locations on an edge that belong to the neighbouring cell
+        return [row.id for row in rows if grid.cell(row.latitude, row.longitude).id == cell_id]
+
+    @classmethod
+    def get_locations_by_ids(cls, location_ids: list[int]) -> list[dict]:
+        """
+        Retrieves many locations with at most one query, through the record store.
+
+        Args:
+            location_ids (list[int]): The IDs to look up.
+
+        Returns:
+            list[dict]: The locations that exist, in the order of their first appearance in ``location_ids``.
+        """
+        location_ids = list(dict.fromkeys(location_ids))
+        found = record_store.get_many("location", location_ids, cls._load_records)
+        return [found[location_id] for location_id in location_ids if location_id in found]
+
+    @classmethod
+    def _load_records(cls, location_ids: list[int]) -> dict[int, dict]:
+        rows = (
+            db.session.query(cls.id, cls.city, cls.latitude, cls.longitude)
+            .filter(cls.id.in_(location_ids))
+            .all()
+        )
+        return {row.id: row._asdict() for row in rows}
+
+    @classmethod
+    def get_all_coordinates(cls) -> list[tuple[float, float]]:
+        """
+        Retrieves the (latitude, longitude) of every location.
+        """
+        return [(row.latitude, row.longitude) for row in db.session.query(cls.latitude, cls.longitude).all()]
+
+    @classmethod
+    def _listing_filters(cls, city_prefix: str | None, bbox: tuple[float, float, float, float] | None) -> list:
+        filters = []
+        if city_prefix:
+            filters.append(cls.city.startswith(city_prefix, autoescape=True))
+        if bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            check_coordinate('latitude', min_lat)
+            check_coordinate('latitude', max_lat)
+            check_coordinate('longitude', min_lon)
+            check_coordinate('longitude', max_lon)
+            if min_lat > max_lat:
+                raise ValueError(f"Invalid bounding box: min latitude {min_lat} is above max latitude {max_lat}.")
+            filters.append(cls.latitude.between(min_lat, max_lat))
+            if min_lon <= max_lon:
+                filters.append(cls.longitude.between(min_lon, max_lon))
+            else:
+                # The box crosses the antimeridian
+                filters.append(or_(cls.longitude >= min_lon, cls.longitude <= max_lon))
+        return filters
+
+    @classmethod
+    def list_locations(cls, after_id: int | None = None, limit: int = 100, city_prefix: str | None = None,
+                       bbox: tuple[float, float, float, float] | None = None) -> tuple[list[dict], int | None]:
+        """
+        Retrieves one page of locations ordered by ID.
+
+        Pages are keyset-paginated: pass the returned cursor as ``after_id`` to
+        get the next page. Each page is a single indexed range scan, however deep
+        into the table it is.
+
+        Args:
+            after_id (int | None): Cursor from the previous page; None for the first page.
+            limit (int): Page size, at most MAX_PAGE_SIZE.
+            city_prefix (str | None): Only locations whose city starts with this text.
+            bbox (tuple | None): (min_lat, min_lon, max_lat, max_lon); min_lon > max_lon
+                selects a box crossing the antimeridian.
+
+        Returns:
+            tuple[list[dict], int | None]: The locations and the cursor of the next page, or None on the last page.
+
+        Raises:
+            ValueError: If the limit or bounding box is invalid.
+        """
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"Invalid limit: {limit}. Must be between 1 and {MAX_PAGE_SIZE}.")
+        query = db.session.query(cls.id, cls.city, cls.latitude, cls.longitude)
+        query = query.filter(*cls._listing_filters(city_prefix, bbox))
+        if after_id is not None:
+            query = query.filter(cls.id > after_id)
+        # One extra row tells whether another page follows
+        rows = query.order_by(cls.id).limit(limit + 1).all()
+        next_cursor = rows[limit - 1].id if len(rows) > limit else None
+        return [row._asdict() for row in rows[:limit]], next_cursor
+
+    @classmethod
+    def iter_locations(cls, chunk_size: int = MAX_PAGE_SIZE, city_prefix: str | None = None,
+                       bbox: tuple[float, float, float, float] | None = None) -> Iterator[Row]:
+        """
+        Yields every matching location ordered by ID, reading ``chunk_size`` rows per query.
+
+        Rows are plain (id, city, latitude, longitude) tuples rather than ORM
+        instances, so memory stays constant however many locations there are.
+
+        Args:
+            chunk_size (int): Rows per query.
+            city_prefix (str | None): Only locations whose city starts with this text.
+            bbox (tuple | None): (min_lat, min_lon, max_lat, max_lon), as for ``list_locations``.
+
+        Yields:
+            Row: id, city, latitude and longitude of one location.
+        """
+        filters = cls._listing_filters(city_prefix, bbox)
+        last_id = None
+        while True:
+            query = db.session.query(cls.id, cls.city, cls.latitude, cls.longitude).filter(*filters)
+            if last_id is not None:
+                query = query.filter(cls.id > last_id)
+            rows = query.order_by(cls.id).limit(chunk_size).all()
+            yield from rows
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1].id
+
     @classmethod
     def get_all_locations(cls) -> list[dict]:
         """
@@ -85,7 +287,15 @@ class Location(db.Model):
         locations = cls.query.all()
         return [asdict(location) for location in locations]
     
-    @classmethod
+    def get_grid_cell(self) -> GridCell:
+        """
+        Returns the grid cell whose weather is served for this location.
+
+        Returns:
+            GridCell: The cell identifier and the coordinates actually fetched.
+        """
+        return get_grid_cell(self.latitude, self.longitude)
+
     def get_weather(self) -> dict:
         """
         Fetches weather forecast for this location using its latitude and longitude.
@@ -100,6 +310,91 @@ class Location(db.Model):
             logger.error("Error fetching forecast for location %s: %s", self.city, str(e))
             raise
 
+    async def get_weather_async(self) -> dict:
+        """
+        Asyncio version of ``get_weather``.
+
+        Returns:
+            dict: Weather forecast data.
+        """
+        try:
+            return await fetch_forecast_async(self.latitude, self.longitude)
+        except Exception as e:
+            logger.error("Error fetching forecast for location %s: %s", self.city, str(e))
+            raise
+
+    def get_air_quality(self) -> dict:
+        """
+        Fetches current air quality for this location using its latitude and longitude.
+
+        Returns:
+            dict: Air quality data including AQI and pollutants.
+        """
+        try:
+            return fetch_air_quality_data(self.latitude, self.longitude)
+        except Exception as e:
+            logger.error("Error fetching air quality for location %s: %s", self.city, str(e))
+            raise
+
+    async def get_air_quality_async(self) -> dict:
+        """
+        Asyncio version of ``get_air_quality``.
+
+        Returns:
+            dict: Air quality data including AQI and pollutants.
+        """
+        try:
+            return await fetch_air_quality_data_async(self.latitude, self.longitude)
+        except Exception as e:
+            logger.error("Error fetching air quality for location %s: %s", self.city, str(e))
+            raise
+
+    def get_historical(self, start: int, end: int) -> list[dict]:
+        """
+        Retrieves hourly historical weather for this location between two timestamps.
+
+        Hours already in the local store are served from it; only missing
+        hours are fetched upstream, and those are stored before returning.
+
+        Args:
+            start (int): Inclusive start, Unix seconds.
+            end (int): Exclusive end, Unix seconds. Clamped to the current time.
+
+        Returns:
+            list[dict]: Hourly observations (OneCall timemachine data points), oldest first.
+
+        Raises:
+            ValueError: If the range is invalid or needs more than MAX_HISTORICAL_FETCH_HOURS upstream calls.
+        """
+        end = min(end, int(time.time()))
+        if start >= end:
+            raise ValueError(f"Invalid time range: start {start} must be before end {end}.")
+
+        stored = HistoricalObservation.get_range(self.id, start, end)
+        stored_hours = {row.ts - row.ts % 3600 for row in stored}
+        first_hour = start - start % 3600
+        missing = [hour for hour in range(first_hour, end, 3600) if hour not in stored_hours]
+        if len(missing) > MAX_HISTORICAL_FETCH_HOURS:
+            raise ValueError(
+                f"Range needs {len(missing)} upstream calls; at most {MAX_HISTORICAL_FETCH_HOURS} are allowed per request."
+            )
+
+        fetched = []
+        for hour in missing:
+            try:
+                payload = fetch_historical_data(self.latitude, self.longitude, hour)
+            except Exception as e:
+                logger.error("Error fetching history for location %s at %d: %s", self.city, hour, str(e))
+                raise
+            fetched.extend(HistoricalObservation.rows_from_timemachine(self.id, payload))
+        if fetched:
+            HistoricalObservation.bulk_insert(fetched)
+            logger.info("Fetched %d missing hours of history for location %s", len(missing), self.city)
+
+        observations = {row.ts: row.get_payload() for row in stored}
+        observations.update({row["ts"]: json.loads(row["payload"]) for row in fetched if start <= row["ts"] < end})
+        return [observations[ts] for ts in sorted(observations)]
+
     def to_dict(self) -> dict:
         """
         Converts the Location instance into a dictionary.
@@ -110,3 +405,6 @@ class Location(db.Model):
             "latitude": self.latitude,
             "longitude": self.longitude
         }
+
+
+register_write_through(Location, "location", key=lambda location: location.id)
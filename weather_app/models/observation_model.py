@@ -0,0 +1,216 @@
+import json
+import logging
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from weather_app.utils.db import db
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Rows per INSERT statement when bulk loading
+INSERT_BATCH_SIZE = 500
+
+
+def insert_ignoring_duplicates(model, rows: list[dict], batch_size: int = INSERT_BATCH_SIZE) -> None:
+    """
+    Bulk inserts rows in batches, skipping rows that collide with a unique index.
+
+    Does not commit; callers own the transaction.
+
+    Args:
+        model (db.Model): The model whose table is written.
+        rows (list[dict]): Column values per row.
+        batch_size (int): Rows per INSERT statement.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        insert = sqlite_insert
+    elif dialect == "postgresql":
+        insert = postgresql_insert
+    else:
+        raise ValueError(f"Unsupported database dialect for bulk insert: {dialect}")
+
+    for start in range(0, len(rows), batch_size):
+        statement = insert(model.__table__).values(rows[start:start + batch_size]).on_conflict_do_nothing()
+        db.session.execute(statement)
+
+
+class _PayloadMixin:
+    """
+    Shared payload column and bulk loading for stored upstream payloads.
+    """
+
+    id = db.Column(db.Integer, primary_key=True)
+    ts = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # raw JSON payload
+
+    def get_payload(self) -> dict:
+        """
+        Decodes the stored JSON payload.
+        """
+        return json.loads(self.payload)
+
+    @classmethod
+    def bulk_insert(cls, rows: list[dict]) -> None:
+        """
+        Inserts many rows in batched statements within a single transaction.
+        Rows that already exist for the same key and ts are skipped.
+
+        Args:
+            rows (list[dict]): Column values per row.
+        """
+        if not rows:
+            return
+        try:
+            insert_ignoring_duplicates(cls, rows)
+            db.session.commit()
+            logger.info("Stored %d %s rows", len(rows), cls.__tablename__)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error("Database error while storing %s rows: %s", cls.__tablename__, str(e))
+            raise
+
+
+class _ObservationMixin(_PayloadMixin):
+    """
+    Time series keyed by (location_id, ts), for data fetched per location.
+
+    ``ts`` is a Unix timestamp in seconds: the observation time.
+    """
+
+    location_id = db.Column(db.Integer, db.ForeignKey('locations.id', ondelete='CASCADE'), nullable=False)
+
+    @classmethod
+    def get_range(cls, location_id: int, start: int, end: int) -> list:
+        """
+        Retrieves a location's rows with start <= ts < end, oldest first.
+
+        Args:
+            location_id (int): The location ID.
+            start (int): Inclusive start, Unix seconds.
+            end (int): Exclusive end, Unix seconds.
+
+        Returns:
+            list: The matching rows.
+        """
+        return (
+            cls.query
+            .filter(cls.location_id == location_id, cls.ts >= start, cls.ts < end)
+            .order_by(cls.ts)
+            .all()
+        )
+
+    @classmethod
+    def get_latest(cls, location_id: int):
+        """
+        Retrieves a location's most recent row, or None.
+        """
+        return cls.query.filter_by(location_id=location_id).order_by(cls.ts.desc()).first()
+
+
+class _CellObservationMixin(_PayloadMixin):
+    """
+    Time series keyed by (cell_id, ts), for data fetched once per weather grid
+    cell and shared by every location in it.
+
+    ``ts`` is a Unix timestamp in seconds: the fetch time.
+    """
+
+    cell_id = db.Column(db.String(64), nullable=False)
+
+    @classmethod
+    def get_range(cls, cell_id: str, start: int, end: int) -> list:
+        """
+        Retrieves a grid cell's rows with start <= ts < end, oldest first.
+        """
+        return cls.query.filter(cls.cell_id == cell_id, cls.ts >= start, cls.ts < end).order_by(cls.ts).all()
+
+    @classmethod
+    def get_latest(cls, cell_id: str):
+        """
+        Retrieves a grid cell's most recent row, or None.
+        """
+        return cls.query.filter_by(cell_id=cell_id).order_by(cls.ts.desc()).first()
+
+
+class ForecastSnapshot(_CellObservationMixin, db.Model):
+    __tablename__ = 'cell_forecast_snapshots'
+    __table_args__ = (
+        db.Index('ix_cell_forecast_snapshots_cell_ts', 'cell_id', 'ts', unique=True),
+    )
+
+    @staticmethod
+    def row(cell_id: str, ts: int, payload: dict) -> dict:
+        """
+        Builds a row from a forecast payload.
+        """
+        return {"cell_id": cell_id, "ts": ts, "payload": json.dumps(payload)}
+
+
+class AirQualityObservation(_CellObservationMixin, db.Model):
+    __tablename__ = 'cell_air_quality_observations'
+    __table_args__ = (
+        db.Index('ix_cell_air_quality_observations_cell_ts', 'cell_id', 'ts', unique=True),
+    )
+
+    aqi = db.Column(db.Integer)
+
+    @staticmethod
+    def row(cell_id: str, ts: int, payload: dict) -> dict:
+        """
+        Builds a row from a parsed air quality payload ({"aqi", "pollutants"}).
+        """
+        return {"cell_id": cell_id, "ts": ts, "aqi": payload.get("aqi"), "payload": json.dumps(payload)}
+
+
+class HistoricalObservation(_ObservationMixin, db.Model):
+    __tablename__ = 'historical_observations'
+    __table_args__ = (
+        db.Index('ix_historical_observations_location_ts', 'location_id', 'ts', unique=True),
+    )
+
+    temp = db.Column(db.Float)
+    feels_like = db.Column(db.Float)
+    humidity = db.Column(db.Float)
+    pressure = db.Column(db.Float)
+    wind_speed = db.Column(db.Float)
+    clouds = db.Column(db.Float)
+    precipitation = db.Column(db.Float)  # rain plus snow over the hour, mm
+
+    @staticmethod
+    def rows_from_timemachine(location_id: int, payload: dict) -> list[dict]:
+        """
+        Builds one row per data point of a OneCall timemachine response.
+
+        Args:
+            location_id (int): The location the payload belongs to.
+            payload (dict): The timemachine response.
+
+        Returns:
+            list[dict]: Column values per observation.
+        """
+        rows = []
+        for point in payload.get("data", []):
+            if "dt" not in point:
+                continue
+            rain = (point.get("rain") or {}).get("1h", 0.0)
+            snow = (point.get("snow") or {}).get("1h", 0.0)
+            rows.append({
+                "location_id": location_id,
+                "ts": int(point["dt"]),
+                "temp": point.get("temp"),
+                "feels_like": point.get("feels_like"),
+                "humidity": point.get("humidity"),
+                "pressure": point.get("pressure"),
+                "wind_speed": point.get("wind_speed"),
+                "clouds": point.get("clouds"),
+                "precipitation": rain + snow,
+                "payload": json.dumps(point),
+            })
+        return rows
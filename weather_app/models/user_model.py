@@ -6,6 +6,7 @@ from sqlalchemy.exc import IntegrityError
 
 from weather_app.utils.db import db
 from weather_app.utils.logger import configure_logger
+from weather_app.utils.record_store import record_store, register_write_through
 
 
 logger = logging.getLogger(__name__)
@@ -77,6 +78,7 @@ class Users(db.Model):
         Raises:
             ValueError: If the user does not exist.
         """
+        # Credentials are always read from the database, never from the shared record store
         user = cls.query.filter_by(username=username).first()
         if not user:
             logger.info("User %s not found", username)
@@ -88,8 +90,32 @@ class Users(db.Model):
         # Compare the hashed password with the stored password
         return hashed_password == user.password
 
-    
-    
+    @classmethod
+    def get_record(cls, username: str) -> dict:
+        """
+        Retrieve a user's id and username through the record store.
+
+        Args:
+            username (str): The username of the user.
+
+        Returns:
+            dict: The user record.
+
+        Raises:
+            ValueError: If the user does not exist.
+        """
+        return record_store.get("user", username, cls._load_record)
+
+    @classmethod
+    def _load_record(cls, username: str) -> dict:
+        user = cls.query.filter_by(username=username).first()
+        if not user:
+            logger.info("User %s not found", username)
+            raise ValueError(f"User {username} not found")
+        return cls.to_record(user)
+
+    def to_record(self) -> dict:
+        return {"id": self.id, "username": self.username}
 
     @classmethod
     def delete_user(cls, username: str) -> None:
@@ -130,11 +156,7 @@ class Users(db.Model):
         Raises:
             ValueError: If the user does not exist.
         """
-        user = cls.query.filter_by(username=username).first()
-        if not user:
-            logger.info("User %s not found", username)
-            raise ValueError(f"User {username} not found")
-        return user.id
+        return cls.get_record(username)["id"]
 
     @classmethod
     def update_password(cls, username: str, new_password: str) -> None:
@@ -157,4 +179,7 @@ class Users(db.Model):
         user.salt = salt
         user.password = hashed_password
         db.session.commit()
-        logger.info("Password updated successfully for user: %s", username)
\ No newline at end of file
+        logger.info("Password updated successfully for user: %s", username)
+
+
+register_write_through(Users, "user", key=lambda user: user.username)
@@ -1,7 +1,20 @@
+import asyncio
+import concurrent.futures
+import time
+import aiohttp
 import requests
 import os
 import logging
+from weather_app.utils.async_upstream_client import get_async_upstream_client, is_in_flight_async
+from weather_app.utils.cache import TieredCache, TTLCache
+from weather_app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from weather_app.utils.forecast_frame import ForecastFrame
+from weather_app.utils.grid import GridCell, SpatialGrid
 from weather_app.utils.logger import configure_logger
+from weather_app.utils.quota import QuotaExceededError, QuotaGovernor, SharedQuotaCounters, current_priority
+from weather_app.utils.shared_cache import open_shared_store
+from weather_app.utils.single_flight import SingleFlight
+from weather_app.utils.upstream_client import get_upstream_client
 
 # Configure logger for this module
 logger = logging.getLogger(__name__)
@@ -14,10 +27,397 @@ BASE_URL_WEATHER = "http://api.openweathermap.org/data/3.0/onecall"
 # API Key from environment variables
 API_KEY = os.getenv("API_KEY")
 
+# Sections of the OneCall response left out of forecasts by default
+DEFAULT_FORECAST_EXCLUDE = "current,minutely,hourly,alerts"
+
+# Coordinates are snapped to cells of this grid before fetching, so that nearby
+# locations share one upstream call and one cache entry. GRID_PRECISION is the
+# cell size in degrees ("degrees" mode) or the geohash length ("geohash" mode).
+GRID_MODE = os.getenv("GRID_MODE", "degrees")
+GRID_PRECISION = float(os.getenv("GRID_PRECISION")) if os.getenv("GRID_PRECISION") else None
+
+grid = SpatialGrid(GRID_MODE, GRID_PRECISION)
+
+# Cache settings
+FORECAST_CACHE_TTL = float(os.getenv("FORECAST_CACHE_TTL", "1800"))
+AIR_QUALITY_CACHE_TTL = float(os.getenv("AIR_QUALITY_CACHE_TTL", "900"))
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "2048"))
+# Expired entries are kept this much longer so they can be served while a refresh is in flight
+CACHE_STALE_TTL = float(os.getenv("CACHE_STALE_TTL", "3600"))
+# Store cached forecasts as array-backed ForecastFrames rather than nested dicts
+FORECAST_COMPACT_CACHE = os.getenv("FORECAST_COMPACT_CACHE", "true").lower() == "true"
+
+# Per-process caches (L1), backed by a store shared between workers (L2) once configure_shared_cache attaches one
+forecast_cache = TieredCache("forecast", ttl=FORECAST_CACHE_TTL, max_size=CACHE_MAX_SIZE, stale_ttl=CACHE_STALE_TTL,
+                             encode=lambda value: _cached_payload(value), decode=lambda value: _compact_forecast(value))
+air_quality_cache = TieredCache("air_quality", ttl=AIR_QUALITY_CACHE_TTL, max_size=CACHE_MAX_SIZE,
+                                stale_ttl=CACHE_STALE_TTL)
+
+# Concurrent identical upstream requests share a single call
+upstream_flights = SingleFlight("upstream")
+
+# One circuit breaker per upstream endpoint, so a failing endpoint does not block the others
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RECOVERY_TIMEOUT = float(os.getenv("CIRCUIT_RECOVERY_TIMEOUT", "30"))
+
+circuit_breakers = {
+    endpoint: CircuitBreaker(endpoint, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RECOVERY_TIMEOUT)
+    for endpoint in ("forecast", "air_quality", "historical")
+}
+
+# Shared by all fetchers; limits are set from the app config by configure_quota
+quota_governor = QuotaGovernor()
+
+# Threads on which async fetches wait for quota. Dedicated and bounded, so callers blocked on the
+# quota cannot exhaust the async loop's default executor, which aiohttp also needs (DNS lookups).
+QUOTA_WAIT_WORKERS = int(os.getenv("QUOTA_WAIT_WORKERS", "16"))
+quota_wait_executor = concurrent.futures.ThreadPoolExecutor(max_workers=QUOTA_WAIT_WORKERS,
+                                                            thread_name_prefix="quota-wait")
+
+# Callables notified of every payload fetched from upstream, e.g. to persist it
+_upstream_listeners = []
+
+
+def add_upstream_listener(listener) -> None:
+    """
+    Registers a callable notified after every successful upstream fetch.
+
+    The listener is called as ``listener(kind, latitude, longitude, payload)``
+    where kind is "forecast", "air_quality" or "historical" and the coordinates
+    are the centre of the grid cell that was fetched. It runs on the
+    fetching thread, so it must be quick and must not raise.
+
+    Args:
+        listener (Callable): The callable to register.
+    """
+    if listener not in _upstream_listeners:
+        _upstream_listeners.append(listener)
+
+
+def remove_upstream_listener(listener) -> None:
+    """
+    Unregisters a listener added with ``add_upstream_listener``.
+    """
+    if listener in _upstream_listeners:
+        _upstream_listeners.remove(listener)
+
+
+def _notify_listeners(kind: str, latitude: float, longitude: float, payload: dict) -> None:
+    for listener in list(_upstream_listeners):
+        try:
+            listener(kind, latitude, longitude, payload)
+        except Exception as e:
+            logger.error("Upstream listener %r failed: %s", listener, str(e))
+
+
+def _snap(latitude: float, longitude: float, *params) -> tuple[float, float, tuple]:
+    """
+    Snaps coordinates to their grid cell.
+
+    Returns:
+        tuple: The cell centre latitude and longitude, and a cache key made of
+            the cell ID and any extra request parameters.
+    """
+    cell = grid.cell(latitude, longitude)
+    return cell.latitude, cell.longitude, (cell.id,) + params
+
+
+def _normalize_exclude(exclude: str) -> str:
+    """
+    Normalizes an exclude list so that equivalent orderings share a cache key.
+    """
+    return ",".join(sorted(part.strip() for part in exclude.split(",") if part.strip()))
+
+
+def _air_quality_url(latitude: float, longitude: float) -> str:
+    return f"{BASE_URL_AIR_QUALITY}?lat={latitude}&lon={longitude}&appid={API_KEY}"
+
+
+def _historical_url(latitude: float, longitude: float, dt: int | None = None) -> str:
+    # Without a timestamp the endpoint is assumed to default to the current hour
+    url = f"{BASE_URL_WEATHER}/timemachine?lat={latitude}&lon={longitude}&appid={API_KEY}"
+    return url if dt is None else f"{url}&dt={dt}"
+
+
+def _forecast_url(latitude: float, longitude: float, exclude: str) -> str:
+    return f"{BASE_URL_WEATHER}?lat={latitude}&lon={longitude}&exclude={exclude}&appid={API_KEY}"
+
+
+def _parse_air_quality(data: dict) -> dict:
+    """
+    Extracts the AQI and pollutant concentrations from an air pollution response.
+    """
+    aqi = data["list"][0]["main"]["aqi"]
+    pollutants = data["list"][0]["components"]
+    return {"aqi": aqi, "pollutants": pollutants}
+
+
+def _compact_forecast(payload: dict):
+    """
+    Converts a forecast payload to the form kept in the cache.
+    """
+    return ForecastFrame.from_payload(payload) if FORECAST_COMPACT_CACHE else payload
+
+
+def _cached_payload(value):
+    """
+    Converts a cached value back to the response payload.
+    """
+    return value.to_dict() if isinstance(value, ForecastFrame) else value
+
+
+def _is_upstream_failure(error: BaseException) -> bool:
+    """
+    Decides whether an upstream error indicates an unhealthy upstream.
+
+    Rate limiting, server errors, timeouts and connection errors count; other
+    client errors (a bad request or key) mean upstream answered normally.
+    """
+    status = getattr(error, "status", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    return status is None or status == 429 or status >= 500
+
+
+def _upstream_json(url: str, endpoint: str) -> dict:
+    """
+    Fetches a URL with the shared sync client, taking a quota token for
+    every attempt (retries are billed too), through the endpoint's circuit breaker.
+    """
+    breaker = circuit_breakers[endpoint]
+    breaker.before_call()
+    try:
+        data = get_upstream_client().get_json(url, endpoint=endpoint, on_attempt=quota_governor.acquire)
+    except QuotaExceededError:
+        breaker.release()
+        raise
+    except Exception as e:
+        if _is_upstream_failure(e):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    breaker.record_success()
+    return data
+
+
+async def _upstream_json_async(url: str, endpoint: str, priority: int) -> dict:
+    """
+    Fetches a URL with the shared async client, taking a quota token for
+    every attempt (retries are billed too), through the endpoint's circuit breaker.
+
+    Attempts run on the async client's loop, so the caller's priority is
+    passed in explicitly and waiting for quota happens on a thread of
+    ``quota_wait_executor``. The caller's deadline starts when the attempt
+    asks for quota, so time spent queued for a free thread counts against it.
+    """
+    async def acquire():
+        give_up_at = time.monotonic() + quota_governor.deadlines[priority]
+        await asyncio.get_running_loop().run_in_executor(
+            quota_wait_executor, lambda: quota_governor.acquire(priority, max(0.0, give_up_at - time.monotonic())))
+
+    breaker = circuit_breakers[endpoint]
+    breaker.before_call()
+    try:
+        data = await get_async_upstream_client().get_json(url, endpoint=endpoint, on_attempt=acquire)
+    except QuotaExceededError:
+        breaker.release()
+        raise
+    except Exception as e:
+        if _is_upstream_failure(e):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    breaker.record_success()
+    return data
+
+
+def _with_stale_fallback(error: CircuitOpenError, cache: TTLCache, key: tuple) -> CircuitOpenError:
+    """
+    Attaches the last known good payload for a key to a circuit-open error, if one exists.
+    """
+    stale = cache.get_stale(key)
+    if stale is not None:
+        error.stale_payload, error.age = _cached_payload(stale[0]), stale[1]
+        logger.warning("Circuit %s is open; last known good %s payload is %.0fs old", error.endpoint, cache.name,
+                       error.age)
+    return error
+
+
+def _stale_while_refreshing(cache: TTLCache, key: tuple, flight_key: tuple):
+    """
+    Returns the stale cached value for a key if another caller is already refreshing it.
+
+    Returns:
+        Any: The stale value, or None if the caller should fetch itself.
+    """
+    if not (upstream_flights.in_flight(flight_key) or is_in_flight_async(flight_key)):
+        return None
+    stale = cache.get_stale(key)
+    if stale is None:
+        return None
+    logger.debug("Serving stale %s entry for %s (age %.0fs) while refresh is in flight", cache.name, key, stale[1])
+    return _cached_payload(stale[0])
+
+
+def invalidate_weather_cache(latitude: float | None = None, longitude: float | None = None) -> int:
+    """
+    Drops cached forecast and air quality entries.
+
+    Args:
+        latitude (float | None): Latitude of the location to invalidate. If omitted
+            along with longitude, every entry is dropped.
+        longitude (float | None): Longitude of the location to invalidate.
+
+    Returns:
+        int: The number of entries removed.
+    """
+    if latitude is None and longitude is None:
+        removed = len(forecast_cache) + len(air_quality_cache)
+        forecast_cache.clear()
+        air_quality_cache.clear()
+        logger.info("Cleared all weather cache entries")
+        return removed
+
+    cell_id = grid.cell(latitude, longitude).id
+    matches = lambda key: key[0] == cell_id
+    removed = forecast_cache.invalidate_where(matches) + air_quality_cache.invalidate_where(matches)
+    logger.info("Invalidated %d weather cache entries for grid cell %s", removed, cell_id)
+    return removed
+
+
+def configure_grid(config) -> None:
+    """
+    Applies the grid settings (GRID_MODE, GRID_PRECISION) from a Flask config.
+
+    Cached entries are keyed by cell, so the caches are cleared if the grid changes.
+
+    Args:
+        config (Mapping): The app config.
+    """
+    mode = config.get("GRID_MODE", GRID_MODE)
+    precision = config.get("GRID_PRECISION", GRID_PRECISION)
+    previous = (grid.mode, grid.precision)
+    grid.configure(mode, precision)
+    if (grid.mode, grid.precision) != previous:
+        invalidate_weather_cache()
+        logger.info("Weather grid set to %s with precision %s", grid.mode, grid.precision)
+
+
+def get_grid_cell(latitude: float, longitude: float) -> GridCell:
+    """
+    Returns the grid cell whose weather is served for a point.
+
+    Args:
+        latitude (float): Latitude of the point.
+        longitude (float): Longitude of the point.
+
+    Returns:
+        GridCell: The cell identifier and the coordinates actually fetched.
+    """
+    return grid.cell(latitude, longitude)
+
+
+def get_coalescing_stats() -> dict:
+    """
+    Returns counters for upstream request coalescing.
+
+    Returns:
+        dict: Executions, coalesced calls, errors and calls in flight.
+    """
+    return upstream_flights.get_stats()
+
+
+def configure_quota(config) -> None:
+    """
+    Applies the upstream quota settings from a Flask config.
+
+    Reads OPENWEATHER_CALLS_PER_MINUTE, OPENWEATHER_CALLS_PER_DAY,
+    QUOTA_INTERACTIVE_DEADLINE, QUOTA_BACKGROUND_DEADLINE and QUOTA_SHARED_URL
+    (a Redis URL or ``sqlite:///path``; defaults to WEATHER_CACHE_SHARED_URL).
+    With a shared store the quota is counted across all workers; without one,
+    in this process only.
+
+    Args:
+        config (Mapping): The app config.
+    """
+    url = config.get("QUOTA_SHARED_URL") or config.get("WEATHER_CACHE_SHARED_URL")
+    quota_governor.configure(
+        per_minute=config.get("OPENWEATHER_CALLS_PER_MINUTE", 60),
+        per_day=config.get("OPENWEATHER_CALLS_PER_DAY", 1000),
+        interactive_deadline=config.get("QUOTA_INTERACTIVE_DEADLINE", 2.0),
+        background_deadline=config.get("QUOTA_BACKGROUND_DEADLINE", 30.0),
+        counters=SharedQuotaCounters(open_shared_store(url)) if url else None,
+    )
+
+
+def configure_shared_cache(config) -> None:
+    """
+    Attaches the shared tier of the forecast and air quality caches from a Flask config.
+
+    Reads WEATHER_CACHE_SHARED_URL: a Redis URL, ``sqlite:///path`` for a
+    file on local disk, or unset for per-process caching only.
+
+    Args:
+        config (Mapping): The app config.
+    """
+    url = config.get("WEATHER_CACHE_SHARED_URL")
+    store = open_shared_store(url) if url else None
+    forecast_cache.attach_shared(store)
+    air_quality_cache.attach_shared(store)
+    if store is not None:
+        logger.info("Weather caches shared through %s", type(store).__name__)
+
+
+def get_quota_stats() -> dict:
+    """
+    Returns the remaining upstream budget and quota queue depth.
+
+    Returns:
+        dict: Limits, remaining tokens, queue depth and grant/rejection counters.
+    """
+    return quota_governor.get_stats()
+
+
+def get_circuit_stats() -> dict:
+    """
+    Returns the state of each upstream circuit breaker.
+
+    Returns:
+        dict: Breaker state and counters keyed by endpoint.
+    """
+    return {endpoint: breaker.get_stats() for endpoint, breaker in circuit_breakers.items()}
+
+
+def get_cache_stats() -> dict:
+    """
+    Returns hit/miss/eviction counters for the weather caches.
+
+    Returns:
+        dict: Statistics keyed by cache name; L1 counters at the top level and L2 counters under ``shared``.
+    """
+    return {
+        "forecast": forecast_cache.get_stats(),
+        "air_quality": air_quality_cache.get_stats(),
+    }
+
+
 def fetch_air_quality_data(latitude: float, longitude: float) -> dict:
     """
     Fetches current air quality data for a given location.
 
+    Results are cached for AIR_QUALITY_CACHE_TTL seconds per grid cell, and
+    concurrent misses for the same cell share one upstream request. While a
+    refresh is in flight, the expired entry is served instead of waiting on it.
+
     Args:
         latitude (float): Latitude of the location.
         longitude (float): Longitude of the location.
@@ -26,31 +426,75 @@ def fetch_air_quality_data(latitude: float, longitude: float) -> dict:
         dict: Air quality data including AQI and pollutants.
 
     Raises:
+        CircuitOpenError: If the air quality circuit is open; carries the last known good payload if any.
+        QuotaExceededError: If no upstream quota is available before the caller's deadline.
         Exception: If the API call fails.
     """
-    url = f"{BASE_URL_AIR_QUALITY}?lat={latitude}&lon={longitude}&appid={API_KEY}"
-    logger.info("Fetching air quality data from URL: %s", url)
+    latitude, longitude, key = _snap(latitude, longitude)
+    cached = air_quality_cache.get(key)
+    if cached is not None:
+        logger.debug("Air quality cache hit for %s", key)
+        return cached
+
+    stale = _stale_while_refreshing(air_quality_cache, key, ("air_quality",) + key)
+    if stale is not None:
+        return stale
 
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        return _load_air_quality(latitude, longitude, key)
+    except CircuitOpenError as e:
+        raise _with_stale_fallback(e, air_quality_cache, key)
+
+def refresh_air_quality_data(latitude: float, longitude: float) -> dict:
+    """
+    Fetches air quality data upstream and replaces the cached entry, even if it is still fresh.
+
+    Args:
+        latitude (float): Latitude of the location.
+        longitude (float): Longitude of the location.
+
+    Returns:
+        dict: Air quality data including AQI and pollutants.
+
+    Raises:
+        Exception: If the API call fails.
+    """
+    latitude, longitude, key = _snap(latitude, longitude)
+    return _load_air_quality(latitude, longitude, key, force=True)
+
+def _load_air_quality(latitude: float, longitude: float, key: tuple, force: bool = False) -> dict:
+    """
+    Fetches air quality data upstream through the coalescing layer and caches it.
+    """
+    def request():
+        # Another caller may have filled the cache since our lookup
+        cached = None if force else air_quality_cache.peek(key)
+        if cached is not None:
+            return cached
+
+        url = _air_quality_url(latitude, longitude)
+        logger.info("Fetching air quality data from URL: %s", url)
+
+        try:
+            data = _upstream_json(url, "air_quality")
+            result = _parse_air_quality(data)
+            air_quality_cache.set(key, result)
+            _notify_listeners("air_quality", latitude, longitude, result)
+            return result
+        except requests.RequestException as e:
+            logger.error("Error fetching air quality data: %s", str(e))
+            raise Exception("Failed to fetch air quality data.") from e
 
-        # Extract relevant fields
-        aqi = data["list"][0]["main"]["aqi"]
-        pollutants = data["list"][0]["components"]
-        return {"aqi": aqi, "pollutants": pollutants}
-    except requests.RequestException as e:
-        logger.error("Error fetching air quality data: %s", str(e))
-        raise Exception("Failed to fetch air quality data.") from e
+    return upstream_flights.do(("air_quality",) + key, request)
 
-def fetch_historical_data(latitude: float, longitude: float) -> dict:
+def fetch_historical_data(latitude: float, longitude: float, dt: int | None = None) -> dict:
     """
     Fetches historical weather data for a given location.
 
     Args:
         latitude (float): Latitude of the location.
         longitude (float): Longitude of the location.
+        dt (int | None): Unix timestamp of the hour to fetch.
 
     Returns:
         dict: Historical weather data including temperature, AQI, etc.
@@ -58,39 +502,244 @@ def fetch_historical_data(latitude: float, longitude: float) -> dict:
     Raises:
         Exception: If the API call fails.
     """
-    # The historical data endpoint might require a timestamp; here, it's assumed to be part of the API.
-    url = f"{BASE_URL_WEATHER}/timemachine?lat={latitude}&lon={longitude}&appid={API_KEY}"
-    logger.info("Fetching historical weather data from URL: %s", url)
+    latitude, longitude, key = _snap(latitude, longitude, dt)
 
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        logger.error("Error fetching historical weather data: %s", str(e))
-        raise Exception("Failed to fetch historical weather data.") from e
+    def request():
+        url = _historical_url(latitude, longitude, dt)
+        logger.info("Fetching historical weather data from URL: %s", url)
+
+        try:
+            result = _upstream_json(url, "historical")
+            _notify_listeners("historical", latitude, longitude, result)
+            return result
+        except requests.RequestException as e:
+            logger.error("Error fetching historical weather data: %s", str(e))
+            raise Exception("Failed to fetch historical weather data.") from e
+
+    return upstream_flights.do(("historical",) + key, request)
 
-def fetch_forecast(latitude: float, longitude: float) -> dict:
+def fetch_forecast(latitude: float, longitude: float, exclude: str = DEFAULT_FORECAST_EXCLUDE) -> dict:
     """
     Fetches weather forecast for a given location.
 
+    Results are cached for FORECAST_CACHE_TTL seconds per grid cell and exclude list,
+    and concurrent misses for the same key share one upstream request. While a refresh
+    is in flight, the expired entry is served instead of waiting on it.
+    Cached forecasts are held as compact ForecastFrames when FORECAST_COMPACT_CACHE is set.
+
     Args:
         latitude (float): Latitude of the location.
         longitude (float): Longitude of the location.
+        exclude (str): Comma-separated OneCall sections to leave out of the response.
 
     Returns:
         dict: Forecast data including temperature, precipitation, etc.
 
     Raises:
+        CircuitOpenError: If the forecast circuit is open; carries the last known good payload if any.
+        QuotaExceededError: If no upstream quota is available before the caller's deadline.
         Exception: If the API call fails.
     """
-    url = f"{BASE_URL_WEATHER}?lat={latitude}&lon={longitude}&exclude=current,minutely,hourly,alerts&appid={API_KEY}"
-    logger.info("Fetching weather forecast data from URL: %s", url)
+    exclude = _normalize_exclude(exclude)
+    latitude, longitude, key = _snap(latitude, longitude, exclude)
+    cached = forecast_cache.get(key)
+    if cached is not None:
+        logger.debug("Forecast cache hit for %s", key)
+        return _cached_payload(cached)
+
+    stale = _stale_while_refreshing(forecast_cache, key, ("forecast",) + key)
+    if stale is not None:
+        return stale
+
+    try:
+        return _load_forecast(latitude, longitude, exclude, key)
+    except CircuitOpenError as e:
+        raise _with_stale_fallback(e, forecast_cache, key)
+
+def refresh_forecast(latitude: float, longitude: float, exclude: str = DEFAULT_FORECAST_EXCLUDE) -> dict:
+    """
+    Fetches a forecast upstream and replaces the cached entry, even if it is still fresh.
+
+    Args:
+        latitude (float): Latitude of the location.
+        longitude (float): Longitude of the location.
+        exclude (str): Comma-separated OneCall sections to leave out of the response.
+
+    Returns:
+        dict: Forecast data including temperature, precipitation, etc.
+
+    Raises:
+        Exception: If the API call fails.
+    """
+    exclude = _normalize_exclude(exclude)
+    latitude, longitude, key = _snap(latitude, longitude, exclude)
+    return _load_forecast(latitude, longitude, exclude, key, force=True)
+
+def _load_forecast(latitude: float, longitude: float, exclude: str, key: tuple, force: bool = False) -> dict:
+    """
+    Fetches a forecast upstream through the coalescing layer and caches it.
+    """
+    def request():
+        # Another caller may have filled the cache since our lookup
+        cached = None if force else forecast_cache.peek(key)
+        if cached is not None:
+            return _cached_payload(cached)
+
+        url = _forecast_url(latitude, longitude, exclude)
+        logger.info("Fetching weather forecast data from URL: %s", url)
+
+        try:
+            result = _upstream_json(url, "forecast")
+            forecast_cache.set(key, _compact_forecast(result))
+            _notify_listeners("forecast", latitude, longitude, result)
+            return result
+        except requests.RequestException as e:
+            logger.error("Error fetching weather forecast data: %s", str(e))
+            raise Exception("Failed to fetch weather forecast data.") from e
+
+    return upstream_flights.do(("forecast",) + key, request)
+
+
+async def fetch_air_quality_data_async(latitude: float, longitude: float) -> dict:
+    """
+    Asyncio version of ``fetch_air_quality_data``.
+
+    Shares the air quality cache with the sync fetcher and runs the upstream
+    call on the shared async connection pool.
+
+    Args:
+        latitude (float): Latitude of the location.
+        longitude (float): Longitude of the location.
+
+    Returns:
+        dict: Air quality data including AQI and pollutants.
+
+    Raises:
+        CircuitOpenError: If the air quality circuit is open; carries the last known good payload if any.
+        QuotaExceededError: If no upstream quota is available before the caller's deadline.
+        Exception: If the API call fails.
+    """
+    latitude, longitude, key = _snap(latitude, longitude)
+    cached = air_quality_cache.get(key)
+    if cached is not None:
+        logger.debug("Air quality cache hit for %s", key)
+        return cached
+
+    stale = _stale_while_refreshing(air_quality_cache, key, ("air_quality",) + key)
+    if stale is not None:
+        return stale
+
+    client = get_async_upstream_client()
+    priority = current_priority()
+
+    async def request():
+        cached = air_quality_cache.peek(key)
+        if cached is not None:
+            return cached
+
+        url = _air_quality_url(latitude, longitude)
+        logger.info("Fetching air quality data from URL: %s", url)
+
+        try:
+            data = await _upstream_json_async(url, "air_quality", priority)
+            result = _parse_air_quality(data)
+            air_quality_cache.set(key, result)
+            _notify_listeners("air_quality", latitude, longitude, result)
+            return result
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error("Error fetching air quality data: %s", str(e))
+            raise Exception("Failed to fetch air quality data.") from e
+
+    try:
+        return await client.coalesce(("air_quality",) + key, request)
+    except CircuitOpenError as e:
+        raise _with_stale_fallback(e, air_quality_cache, key)
+
+async def fetch_historical_data_async(latitude: float, longitude: float, dt: int | None = None) -> dict:
+    """
+    Asyncio version of ``fetch_historical_data``.
+
+    Args:
+        latitude (float): Latitude of the location.
+        longitude (float): Longitude of the location.
+        dt (int | None): Unix timestamp of the hour to fetch.
+
+    Returns:
+        dict: Historical weather data including temperature, AQI, etc.
+
+    Raises:
+        Exception: If the API call fails.
+    """
+    latitude, longitude, key = _snap(latitude, longitude, dt)
+    client = get_async_upstream_client()
+    priority = current_priority()
+
+    async def request():
+        url = _historical_url(latitude, longitude, dt)
+        logger.info("Fetching historical weather data from URL: %s", url)
+
+        try:
+            result = await _upstream_json_async(url, "historical", priority)
+            _notify_listeners("historical", latitude, longitude, result)
+            return result
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error("Error fetching historical weather data: %s", str(e))
+            raise Exception("Failed to fetch historical weather data.") from e
+
+    return await client.coalesce(("historical",) + key, request)
+
+async def fetch_forecast_async(latitude: float, longitude: float, exclude: str = DEFAULT_FORECAST_EXCLUDE) -> dict:
+    """
+    Asyncio version of ``fetch_forecast``.
+
+    Shares the forecast cache with the sync fetcher and runs the upstream call
+    on the shared async connection pool.
+
+    Args:
+        latitude (float): Latitude of the location.
+        longitude (float): Longitude of the location.
+        exclude (str): Comma-separated OneCall sections to leave out of the response.
+
+    Returns:
+        dict: Forecast data including temperature, precipitation, etc.
+
+    Raises:
+        CircuitOpenError: If the forecast circuit is open; carries the last known good payload if any.
+        QuotaExceededError: If no upstream quota is available before the caller's deadline.
+        Exception: If the API call fails.
+    """
+    exclude = _normalize_exclude(exclude)
+    latitude, longitude, key = _snap(latitude, longitude, exclude)
+    cached = forecast_cache.get(key)
+    if cached is not None:
+        logger.debug("Forecast cache hit for %s", key)
+        return _cached_payload(cached)
+
+    stale = _stale_while_refreshing(forecast_cache, key, ("forecast",) + key)
+    if stale is not None:
+        return stale
+
+    client = get_async_upstream_client()
+    priority = current_priority()
+
+    async def request():
+        cached = forecast_cache.peek(key)
+        if cached is not None:
+            return _cached_payload(cached)
+
+        url = _forecast_url(latitude, longitude, exclude)
+        logger.info("Fetching weather forecast data from URL: %s", url)
+
+        try:
+            result = await _upstream_json_async(url, "forecast", priority)
+            forecast_cache.set(key, _compact_forecast(result))
+            _notify_listeners("forecast", latitude, longitude, result)
+            return result
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error("Error fetching weather forecast data: %s", str(e))
+            raise Exception("Failed to fetch weather forecast data.") from e
 
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        logger.error("Error fetching weather forecast data: %s", str(e))
-        raise Exception("Failed to fetch weather forecast data.") from e
+        return await client.coalesce(("forecast",) + key, request)
+    except CircuitOpenError as e:
+        raise _with_stale_fallback(e, forecast_cache, key)
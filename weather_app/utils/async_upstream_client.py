@@ -0,0 +1,282 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Hashable
+
+import aiohttp
+
+from weather_app.utils.logger import configure_logger
+from weather_app.utils.upstream_client import RETRY_STATUS_CODES, CallTimings, backoff_delay
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class UpstreamStatusError(aiohttp.ClientError):
+    """
+    Raised when the upstream API answers with an error status.
+    """
+
+    def __init__(self, status: int):
+        super().__init__(f"Upstream returned HTTP {status}")
+        self.status = status
+
+
+class AsyncUpstreamClient:
+    """
+    Asyncio HTTP client for the OpenWeather API.
+
+    Flask runs every async view in its own short-lived event loop, and an
+    ``aiohttp`` connection pool cannot be shared between loops. The client
+    therefore owns a dedicated background event loop holding one pooled
+    ``aiohttp.ClientSession``; coroutines from any caller loop are scheduled on
+    it and awaited without blocking the caller's loop. Because every upstream
+    call runs on that loop, identical concurrent calls are coalesced there
+    regardless of which request loop issued them.
+    """
+
+    def __init__(self, pool_size: int = 100, connect_timeout: float = 3.05, read_timeout: float = 10.0,
+                 max_retries: int = 2, backoff_base: float = 0.25, backoff_max: float = 4.0):
+        """
+        Args:
+            pool_size (int): Maximum number of simultaneous upstream connections.
+            connect_timeout (float): Seconds to wait for a TCP connection.
+            read_timeout (float): Seconds to wait for the response.
+            max_retries (int): Number of retries after the first attempt on 429/5xx or connection errors.
+            backoff_base (float): Base delay in seconds for exponential backoff.
+            backoff_max (float): Upper bound for a single backoff delay in seconds.
+        """
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timings = CallTimings()
+
+        self._session = None
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        self._coalesced = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="async-upstream", daemon=True)
+        self._thread.start()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Returns the pooled session, creating it on the background loop on first use.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size)
+            timeout = aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    async def _fetch_once(self, url: str) -> tuple[int, dict, dict | None]:
+        """
+        Performs a single GET request.
+
+        Returns:
+            tuple: The status code, response headers and decoded JSON body (None for error statuses).
+        """
+        session = await self._get_session()
+        async with session.get(url) as response:
+            if response.status >= 400:
+                return response.status, dict(response.headers), None
+            return response.status, dict(response.headers), await response.json(content_type=None)
+
+    async def _get_json_on_loop(self, url: str, endpoint: str,
+                                on_attempt: Callable[[], Awaitable] | None = None) -> dict:
+        """
+        Performs a GET request with retries. Must run on the background loop.
+        """
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            if on_attempt is not None:
+                await on_attempt()
+            try:
+                status, headers, data = await self._fetch_once(url)
+                if status in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    delay = backoff_delay(attempt, self.backoff_base, self.backoff_max, headers.get("Retry-After"))
+                    logger.warning("Upstream %s returned %d, retrying in %.2fs", endpoint, status, delay)
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                if status >= 400:
+                    raise UpstreamStatusError(status)
+                self.timings.record(endpoint, time.perf_counter() - start, True, attempt)
+                return data
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt < self.max_retries:
+                    delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                    logger.warning("Upstream %s connection error (%s), retrying in %.2fs", endpoint, str(e), delay)
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                self.timings.record(endpoint, time.perf_counter() - start, False, attempt)
+                raise
+            except aiohttp.ClientError:
+                self.timings.record(endpoint, time.perf_counter() - start, False, attempt)
+                raise
+
+    async def run(self, coroutine: Awaitable):
+        """
+        Runs a coroutine on the background loop and awaits its result from the caller's loop.
+
+        Args:
+            coroutine (Awaitable): The coroutine to run.
+
+        Returns:
+            Any: The coroutine's result.
+        """
+        if asyncio.get_running_loop() is self._loop:
+            return await coroutine
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, self._loop))
+
+    async def get_json(self, url: str, endpoint: str = "default",
+                       on_attempt: Callable[[], Awaitable] | None = None) -> dict:
+        """
+        Performs a GET request on the shared pool and returns the decoded JSON body.
+
+        Args:
+            url (str): The full URL to request.
+            endpoint (str): A short name used to group timing statistics.
+            on_attempt (Callable | None): Awaited on the background loop before
+                every attempt, retries included; its exceptions propagate.
+
+        Returns:
+            dict: The decoded JSON response.
+
+        Raises:
+            aiohttp.ClientError: If the request still fails after all retries.
+            asyncio.TimeoutError: If the final attempt timed out.
+        """
+        return await self.run(self._get_json_on_loop(url, endpoint, on_attempt))
+
+    async def coalesce(self, key: Hashable, factory: Callable[[], Awaitable]):
+        """
+        Runs ``factory()`` on the background loop unless a call for ``key`` is
+        already in flight, in which case awaits that call's outcome instead.
+
+        Args:
+            key (Hashable): Identifies equivalent calls.
+            factory (Callable): Zero-argument function returning the coroutine to run.
+
+        Returns:
+            Any: The result of the (possibly shared) call.
+        """
+        with self._flights_lock:
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = asyncio.run_coroutine_threadsafe(factory(), self._loop)
+                self._flights[key] = future
+            else:
+                self._coalesced += 1
+        if leader:
+            # Registered outside the lock: the callback runs immediately if the call already finished
+            future.add_done_callback(lambda _: self._forget(key, future))
+        # A waiter that gives up (deadline, disconnect) must not cancel the call the others share
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def _forget(self, key: Hashable, future: concurrent.futures.Future) -> None:
+        with self._flights_lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+
+    def in_flight(self, key: Hashable) -> bool:
+        """
+        Checks whether a coalesced call for ``key`` is currently running.
+
+        Args:
+            key (Hashable): The call key.
+
+        Returns:
+            bool: True if a call is in flight.
+        """
+        with self._flights_lock:
+            return key in self._flights
+
+    def get_stats(self) -> dict:
+        """
+        Returns per-endpoint timings and coalescing counters.
+
+        Returns:
+            dict: Timings keyed by endpoint plus coalescing counters.
+        """
+        with self._flights_lock:
+            coalescing = {"coalesced": self._coalesced, "in_flight": len(self._flights)}
+        return {"endpoints": self.timings.snapshot(), "coalescing": coalescing}
+
+    def close(self) -> None:
+        """
+        Closes the pooled session and stops the background loop.
+        """
+        async def shutdown():
+            if self._session is not None:
+                await self._session.close()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_async_upstream_client() -> AsyncUpstreamClient:
+    """
+    Returns the process-wide async upstream client, creating it on first use.
+
+    Settings are read from the environment: ASYNC_UPSTREAM_POOL_SIZE plus the
+    UPSTREAM_* timeout and retry settings shared with the sync client.
+
+    Returns:
+        AsyncUpstreamClient: The shared client.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = AsyncUpstreamClient(
+                    pool_size=int(os.getenv("ASYNC_UPSTREAM_POOL_SIZE", "100")),
+                    connect_timeout=float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "3.05")),
+                    read_timeout=float(os.getenv("UPSTREAM_READ_TIMEOUT", "10")),
+                    max_retries=int(os.getenv("UPSTREAM_MAX_RETRIES", "2")),
+                    backoff_base=float(os.getenv("UPSTREAM_BACKOFF_BASE", "0.25")),
+                )
+    return _client
+
+
+def is_in_flight_async(key: Hashable) -> bool:
+    """
+    Checks whether the shared async client is running a coalesced call for ``key``.
+
+    Unlike ``get_async_upstream_client`` this never starts the client.
+
+    Args:
+        key (Hashable): The call key.
+
+    Returns:
+        bool: True if a call is in flight.
+    """
+    client = _client
+    return client is not None and client.in_flight(key)
+
+
+def reset_async_upstream_client() -> None:
+    """
+    Shuts down and discards the shared async client.
+    """
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
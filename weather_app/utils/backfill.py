@@ -0,0 +1,434 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from weather_app.models.backfill_model import (
+    ACTIVE_STATUSES, CANCELLED, COMPLETED, FAILED, HOUR, PENDING, RUNNING, BackfillJob, BackfillTask
+)
+from weather_app.models.location_model import Location
+from weather_app.models.observation_model import HistoricalObservation, insert_ignoring_duplicates
+from weather_app.utils.api_utils import fetch_historical_data
+from weather_app.utils.circuit_breaker import CircuitOpenError
+from weather_app.utils.db import db
+from weather_app.utils.logger import configure_logger
+from weather_app.utils.quota import QuotaExceededError, background_priority
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class _JobRun:
+    """
+    In-process state of a job being executed: cancellation and throughput counters.
+    """
+
+    def __init__(self, job_id: int, tasks: int):
+        self.job_id = job_id
+        self.outstanding = tasks
+        self.stop = threading.Event()  # tasks stop after their current hour once set
+        self.cancelled = False         # set by an explicit cancel, as opposed to a shutdown
+        self.done = threading.Event()
+        self.started_at = time.monotonic()
+        self.hours = 0
+        self.fetched = 0
+
+
+class BackfillRunner:
+    """
+    Executes historical backfill jobs on a bounded thread pool.
+
+    Each location of a job is one task, and tasks from all jobs share the
+    pool. A task walks its hours from the stored cursor, skips hours already
+    in the local store, and fetches the rest at background quota priority.
+    When the quota or a circuit breaker holds calls back, the task waits
+    instead of failing. Rows are written every ``batch_hours`` hours in the
+    same transaction that advances the cursor, so after a crash a resumed job
+    continues from the last written batch.
+
+    Several processes may run a backfill runner on the same database. Each
+    executes a job only after claiming its lease (see ``BackfillJob.claim``);
+    once started, a heartbeat thread renews the leases of its jobs and claims
+    jobs whose runner stopped renewing theirs.
+    """
+
+    def __init__(self, app, workers: int = 4, batch_hours: int = 24, max_attempts: int = 3, retry_wait: float = 5.0,
+                 lease_seconds: int = 60):
+        """
+        Args:
+            app (Flask): The application, used for database access.
+            workers (int): Maximum tasks executed concurrently.
+            batch_hours (int): Hours processed between writes.
+            max_attempts (int): Attempts per hour before a task is marked failed.
+            retry_wait (float): Seconds to wait when the upstream quota is exhausted.
+            lease_seconds (int): How long a job stays claimed without a heartbeat.
+        """
+        if workers <= 0:
+            raise ValueError(f"Invalid worker count: {workers}. Must be positive.")
+        self.app = app
+        self.workers = workers
+        self.batch_hours = batch_hours
+        self.max_attempts = max_attempts
+        self.retry_wait = retry_wait
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill")
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()  # one claim at a time, so a job is never started twice in this process
+        self._runs = {}  # job_id -> _JobRun
+        self._stop = threading.Event()
+        self._heartbeat_thread = None
+
+    def submit(self, location_ids: list[int], start: int, end: int) -> BackfillJob:
+        """
+        Creates a job and starts executing it. Must be called within an app context.
+
+        Args:
+            location_ids (list[int]): The locations to backfill.
+            start (int): Inclusive start, Unix seconds.
+            end (int): Exclusive end, Unix seconds.
+
+        Returns:
+            BackfillJob: The new job.
+
+        Raises:
+            ValueError: If the locations or range are invalid.
+        """
+        job = BackfillJob.create_job(location_ids, start, end)
+        self._start(job.id)
+        return job
+
+    def resume(self) -> int:
+        """
+        Restarts every job left pending or running that no other runner holds,
+        e.g. jobs of a previous process.
+
+        Returns:
+            int: The number of jobs resumed.
+        """
+        with self.app.app_context():
+            job_ids = BackfillJob.get_active_job_ids()
+        resumed = sum(self._start(job_id) for job_id in job_ids)
+        if resumed:
+            logger.info("Resumed %d backfill jobs", resumed)
+        return resumed
+
+    def _start(self, job_id: int) -> bool:
+        """
+        Claims a job and submits its unfinished tasks.
+
+        Returns:
+            bool: True if the job was started, False if it is already running
+                in this process or another runner holds it.
+        """
+        with self._start_lock:
+            with self._lock:
+                current = self._runs.get(job_id)
+            if current is not None and not current.done.is_set():
+                return False
+            with self.app.app_context():
+                if not BackfillJob.claim(job_id, self.owner, self.lease_seconds):
+                    return False
+                task_ids = [task.id for task in BackfillTask.get_unfinished(job_id)]
+            run = _JobRun(job_id, len(task_ids))
+            with self._lock:
+                self._runs[job_id] = run
+
+        if not task_ids:
+            self._finish(run)
+            return True
+        for task_id in task_ids:
+            self._pool.submit(self._run_task, run, task_id)
+        return True
+
+    def _heartbeat(self) -> None:
+        """
+        Renews the leases of this runner's jobs and resumes orphaned jobs until stopped.
+
+        A job whose lease was lost, e.g. after a pause longer than the lease,
+        is stopped here; the runner that claimed it continues from its cursor.
+        Jobs cancelled by another process are stopped here too, including
+        tasks that are waiting for quota rather than between batches.
+        """
+        while not self._stop.wait(self.lease_seconds / 3):
+            with self._lock:
+                running = [job_id for job_id, run in self._runs.items() if not run.done.is_set()]
+            try:
+                with self.app.app_context():
+                    held = BackfillJob.renew_leases(running, self.owner, self.lease_seconds)
+                for job_id in set(running) - held:
+                    with self._lock:
+                        run = self._runs[job_id]
+                    if not self._check_cancelled(run) and not run.stop.is_set():
+                        logger.warning("Backfill job %d is no longer held by this runner; stopping it", job_id)
+                        run.stop.set()
+                self.resume()
+            except Exception as e:
+                logger.error("Backfill heartbeat failed: %s", str(e))
+
+    def start(self) -> None:
+        """
+        Resumes unfinished jobs and starts the heartbeat thread.
+        """
+        if self._heartbeat_thread is not None:
+            return
+        self._stop.clear()
+        self.resume()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat, name="backfill-heartbeat", daemon=True)
+        self._heartbeat_thread.start()
+
+    def _fetch(self, run: _JobRun, location: Location, hour: int) -> dict | None:
+        """
+        Fetches one hour, waiting out quota exhaustion and open circuits.
+
+        Returns:
+            dict | None: The payload, or None if the job was cancelled while waiting.
+
+        Raises:
+            Exception: If the fetch failed ``max_attempts`` times.
+        """
+        attempts = 0
+        while not run.stop.is_set():
+            try:
+                with background_priority():
+                    payload = fetch_historical_data(location.latitude, location.longitude, hour)
+                with self._lock:
+                    run.fetched += 1
+                return payload
+            except QuotaExceededError:
+                wait = self.retry_wait
+            except CircuitOpenError as e:
+                wait = max(e.retry_after, 1.0)
+            except Exception:
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    raise
+                wait = 2 ** attempts
+            run.stop.wait(wait)
+        return None
+
+    def _write(self, task: BackfillTask, rows: list[dict], cursor: int, fetched: int) -> None:
+        """
+        Stores a batch of rows and advances the task cursor in one transaction.
+        """
+        try:
+            insert_ignoring_duplicates(HistoricalObservation, rows)
+            task.cursor = cursor
+            task.fetched += fetched
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _check_cancelled(self, run: _JobRun) -> bool:
+        """
+        Re-reads the job status and stops the run if the job was cancelled, possibly by another process.
+        Must be called within an app context.
+
+        Returns:
+            bool: True if the job is cancelled.
+        """
+        if run.cancelled:
+            return True
+        if BackfillJob.get_status(run.job_id) != CANCELLED:
+            return False
+        logger.info("Backfill job %d was cancelled; stopping its tasks", run.job_id)
+        run.cancelled = True
+        run.stop.set()
+        return True
+
+    def _run_task(self, run: _JobRun, task_id: int) -> None:
+        try:
+            with self.app.app_context():
+                task = db.session.get(BackfillTask, task_id)
+                job = task.job
+                location = db.session.get(Location, task.location_id)
+                if location is None:
+                    task.status, task.error = FAILED, "Location no longer exists."
+                    db.session.commit()
+                    return
+                task.status = RUNNING
+                db.session.commit()
+
+                stored = {ts - ts % HOUR for ts, in db.session.query(HistoricalObservation.ts).filter(
+                    HistoricalObservation.location_id == location.id,
+                    HistoricalObservation.ts >= task.cursor,
+                    HistoricalObservation.ts < job.end_ts,
+                )}
+                rows, fetched, pending_hours = [], 0, 0
+                hour = task.cursor
+                try:
+                    while hour < job.end_ts and not run.stop.is_set():
+                        if hour not in stored:
+                            payload = self._fetch(run, location, hour)
+                            if payload is None:
+                                break
+                            rows.extend(HistoricalObservation.rows_from_timemachine(location.id, payload))
+                            fetched += 1
+                        hour += HOUR
+                        pending_hours += 1
+                        with self._lock:
+                            run.hours += 1
+                        if pending_hours >= self.batch_hours:
+                            self._write(task, rows, hour, fetched)
+                            rows, fetched, pending_hours = [], 0, 0
+                            self._check_cancelled(run)
+                    self._write(task, rows, hour, fetched)
+                    task.status = COMPLETED if hour >= job.end_ts else PENDING
+                except Exception as e:
+                    logger.error("Backfill of location %d in job %d failed at %d: %s",
+                                 location.id, run.job_id, hour, str(e))
+                    task.status, task.error = FAILED, str(e)
+                db.session.commit()
+        except Exception as e:
+            logger.error("Backfill task %d of job %d failed: %s", task_id, run.job_id, str(e))
+        finally:
+            with self._lock:
+                run.outstanding -= 1
+                finished = run.outstanding == 0
+            if finished:
+                self._finish(run)
+
+    def _finish(self, run: _JobRun) -> None:
+        """
+        Records the final job status once all of its tasks have stopped.
+
+        The job is only moved out of RUNNING while this runner holds its lease,
+        so a cancel recorded meanwhile, by any process, is kept.
+        """
+        try:
+            with self.app.app_context():
+                tasks = BackfillJob.get_job(run.job_id).get_progress()["tasks"]
+                if run.cancelled:
+                    outcome = None  # cancel() already recorded it
+                elif run.stop.is_set():
+                    # Shut down mid-run: leave the job running so that it is resumed on the next start
+                    logger.info("Backfill job %d stopped; it will resume on restart", run.job_id)
+                    outcome = None
+                elif tasks[FAILED] and not tasks[COMPLETED]:
+                    outcome = (FAILED, "Every location failed.")
+                elif tasks[FAILED]:
+                    outcome = (COMPLETED, f"{tasks[FAILED]} locations failed.")
+                else:
+                    outcome = (COMPLETED, None)
+                if outcome and not BackfillJob.transition(run.job_id, outcome[0], (RUNNING,), error=outcome[1],
+                                                          owner=self.owner):
+                    logger.info("Backfill job %d is no longer running here; keeping its %s status",
+                                run.job_id, BackfillJob.get_status(run.job_id))
+        except Exception as e:
+            logger.error("Could not record the outcome of backfill job %d: %s", run.job_id, str(e))
+        finally:
+            run.done.set()
+
+    def cancel(self, job_id: int) -> None:
+        """
+        Cancels a job. Running tasks stop after their current hour; written batches are kept.
+        Must be called within an app context.
+
+        The cancel is recorded in the database at once. Tasks running in this
+        process are stopped directly; tasks of a job running in another process
+        see the status after their current batch, or at that runner's next heartbeat.
+
+        Raises:
+            ValueError: If the job does not exist or has already finished.
+        """
+        job = BackfillJob.get_job(job_id)
+        if not BackfillJob.transition(job_id, CANCELLED, from_statuses=ACTIVE_STATUSES):
+            raise ValueError(f"Backfill job {job_id} is already {BackfillJob.get_status(job_id) or job.status}.")
+        with self._lock:
+            run = self._runs.get(job_id)
+        if run is not None and not run.done.is_set():
+            run.cancelled = True
+            run.stop.set()
+
+    def wait(self, job_id: int, timeout: float | None = None) -> bool:
+        """
+        Waits for a job started by this runner to stop.
+
+        Returns:
+            bool: True if the job stopped within the timeout.
+        """
+        with self._lock:
+            run = self._runs.get(job_id)
+        return run is None or run.done.wait(timeout)
+
+    def get_status(self, job_id: int) -> dict:
+        """
+        Reports a job's status, progress, throughput and estimated time remaining.
+        Must be called within an app context.
+
+        Returns:
+            dict: The job, its progress, and for jobs running in this process the
+                hours and upstream calls per second and the ETA in seconds.
+
+        Raises:
+            ValueError: If the job does not exist.
+        """
+        job = BackfillJob.get_job(job_id)
+        status = job.to_dict()
+        status.update(job.get_progress())
+
+        with self._lock:
+            run = self._runs.get(job_id)
+            hours, fetched = (run.hours, run.fetched) if run else (0, 0)
+        elapsed = time.monotonic() - run.started_at if run else 0.0
+        hours_per_second = hours / elapsed if elapsed > 0 else 0.0
+        remaining = status["hours_total"] - status["hours_done"]
+        status.update({
+            "percent_done": round(100 * status["hours_done"] / status["hours_total"], 1) if status["hours_total"] else 100.0,
+            "hours_per_second": round(hours_per_second, 3),
+            "upstream_calls_per_second": round(fetched / elapsed, 3) if elapsed > 0 else 0.0,
+            "eta_seconds": round(remaining / hours_per_second) if job.status == RUNNING and hours_per_second else None,
+        })
+        return status
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops in-flight tasks after their current hour and shuts the pool down.
+        Their jobs stay running in the database and are resumed by the next runner;
+        once the tasks have stopped, their leases are released so that can happen at once.
+        """
+        self._stop.set()
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.join()
+            self._heartbeat_thread = None
+        with self._lock:
+            runs = list(self._runs.values())
+        for run in runs:
+            run.stop.set()
+        self._pool.shutdown(wait=wait)
+        if wait:
+            try:
+                with self.app.app_context():
+                    BackfillJob.release_leases(self.owner)
+            except Exception as e:
+                logger.error("Could not release backfill leases: %s", str(e))
+
+
+def start_backfill_runner(app) -> BackfillRunner:
+    """
+    Creates a backfill runner configured from the app config, resumes unfinished
+    jobs no other runner holds and starts renewing its leases.
+
+    Uses BACKFILL_WORKERS, BACKFILL_BATCH_HOURS and BACKFILL_LEASE_SECONDS. The
+    runner is stored in ``app.extensions['backfill_runner']``.
+
+    Args:
+        app (Flask): The application.
+
+    Returns:
+        BackfillRunner: The running backfill runner.
+    """
+    runner = BackfillRunner(
+        app,
+        workers=app.config.get("BACKFILL_WORKERS", 4),
+        batch_hours=app.config.get("BACKFILL_BATCH_HOURS", 24),
+        lease_seconds=app.config.get("BACKFILL_LEASE_SECONDS", 60),
+    )
+    app.extensions["backfill_runner"] = runner
+    runner.start()
+    return runner
@@ -0,0 +1,385 @@
+from collections import OrderedDict
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with per-entry expiry and LRU eviction.
+
+    Entries expire ``ttl`` seconds after they are stored. Expired entries are
+    kept for a further ``stale_ttl`` seconds so callers can fall back to them
+    with ``get_stale`` while a refresh is in progress. When the cache holds
+    ``max_size`` entries, the least recently used one is evicted to make room.
+    Hit, miss, expiry and eviction counters are kept for monitoring.
+    """
+
+    def __init__(self, name: str, ttl: float, max_size: int = 1024, stale_ttl: float = 0):
+        """
+        Args:
+            name (str): Name used in logs and statistics.
+            ttl (float): Default time-to-live of an entry, in seconds.
+            max_size (int): Maximum number of entries before LRU eviction.
+            stale_ttl (float): Seconds an expired entry remains available to ``get_stale``.
+        """
+        if max_size <= 0:
+            raise ValueError(f"Invalid cache size: {max_size}. Must be positive.")
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()  # key -> (value, stored_at, expires_at)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._expirations = 0
+        self._evictions = 0
+        self._stale_hits = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the cached value for a key if it is present and not expired.
+
+        Args:
+            key (Hashable): The cache key.
+            default (Any): Value returned on a miss.
+
+        Returns:
+            Any: The cached value, or ``default``.
+        """
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self._misses += 1
+                return default
+            value, _, expires_at = entry
+            now = time.monotonic()
+            if expires_at <= now:
+                if expires_at + self.stale_ttl <= now:
+                    del self._entries[key]
+                    self._expirations += 1
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the cached value for a key without touching counters or LRU order.
+
+        Args:
+            key (Hashable): The cache key.
+            default (Any): Value returned if the key is absent or expired.
+
+        Returns:
+            Any: The cached value, or ``default``.
+        """
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING or entry[2] <= time.monotonic():
+                return default
+            return entry[0]
+
+    def get_stale(self, key: Hashable) -> tuple[Any, float] | None:
+        """
+        Returns an entry that may have expired but is still within its stale window.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            tuple | None: The value and its age in seconds, or None if no usable entry exists.
+        """
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return None
+            value, stored_at, expires_at = entry
+            now = time.monotonic()
+            if expires_at + self.stale_ttl <= now:
+                return None
+            self._stale_hits += 1
+            return value, now - stored_at
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None, age: float = 0.0) -> None:
+        """
+        Stores a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to store.
+            ttl (float | None): Time-to-live in seconds; defaults to the cache TTL.
+            age (float): Seconds since the value was fetched, if it was cached elsewhere first.
+        """
+        now = time.monotonic()
+        stored_at = now - age
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._entries[key] = (value, stored_at, expires_at)
+            while len(self._entries) > self.max_size:
+                evicted_key, _ = self._entries.popitem(last=False)
+                self._evictions += 1
+                logger.debug("Cache %s evicted key %s", self.name, evicted_key)
+
+    def invalidate(self, key: Hashable) -> bool:
+        """
+        Removes a single entry.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            bool: True if an entry was removed.
+        """
+        with self._lock:
+            return self._entries.pop(key, _MISSING) is not _MISSING
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Removes every entry whose key matches a predicate.
+
+        Args:
+            predicate (Callable): Called with each key; entries for which it returns True are removed.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        """
+        Removes all entries. Counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_stats(self) -> dict:
+        """
+        Returns a snapshot of the cache counters.
+
+        Returns:
+            dict: Size, capacity, TTL and hit/miss/expiration/eviction counts.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "expirations": self._expirations,
+                "evictions": self._evictions,
+                "stale_hits": self._stale_hits,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+            }
+
+
+class TieredCache(TTLCache):
+    """
+    Two-tier cache: this process's ``TTLCache`` (L1) in front of a store
+    shared by every worker (L2), such as ``RedisSharedStore``.
+
+    Writes go to both tiers. A lookup that misses L1 tries L2 and, on a hit,
+    copies the entry into L1 for the rest of its life, so a value fetched by
+    one worker is served by all of them and no tier keeps an entry longer
+    than the one it came from. Expiry times are wall-clock in L2 so that
+    workers agree on them. L2 entries are kept for ``stale_ttl`` past expiry
+    for ``get_stale``.
+
+    Values are stored in L2 as JSON after ``encode`` and rebuilt with
+    ``decode``. L2 errors are logged and counted; the cache then behaves as
+    L1 alone. Without a shared store it is exactly a ``TTLCache``.
+    """
+
+    def __init__(self, name: str, ttl: float, max_size: int = 1024, stale_ttl: float = 0,
+                 encode: Callable[[Any], Any] | None = None, decode: Callable[[Any], Any] | None = None):
+        """
+        Args:
+            name (str): Name used in logs, statistics and L2 keys.
+            ttl (float): Default time-to-live of an entry, in seconds.
+            max_size (int): Maximum number of L1 entries before LRU eviction.
+            stale_ttl (float): Seconds an expired entry remains available to ``get_stale``.
+            encode (Callable | None): Converts a value to something JSON-serializable.
+            decode (Callable | None): Rebuilds a value from its encoded form.
+        """
+        super().__init__(name, ttl, max_size=max_size, stale_ttl=stale_ttl)
+        self._encode = encode or (lambda value: value)
+        self._decode = decode or (lambda value: value)
+        self.shared = None
+        self._shared_hits = 0
+        self._shared_misses = 0
+        self._shared_errors = 0
+
+    def attach_shared(self, store) -> None:
+        """
+        Replaces the L2 store; None leaves only L1.
+        """
+        self.shared = store
+
+    def _shared_key(self, key: Hashable) -> str:
+        return f"{self.name}:{json.dumps(key)}"
+
+    def _count_shared(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _shared_failed(self, action: str, error: Exception) -> None:
+        self._count_shared("_shared_errors")
+        logger.error("Shared cache %s failed for %s: %s", action, self.name, str(error))
+
+    def _read_shared(self, key: Hashable) -> tuple[Any, float, float] | None:
+        """
+        Returns the encoded value, stored_at and expires_at (wall-clock) of an L2 entry.
+        """
+        if self.shared is None:
+            return None
+        try:
+            text = self.shared.get(self._shared_key(key))
+            if text is None:
+                return None
+            encoded, stored_at, expires_at = json.loads(text)
+            return encoded, stored_at, expires_at
+        except Exception as e:
+            self._shared_failed("read", e)
+            return None
+
+    def _fill_from_shared(self, key: Hashable, count: bool) -> Any:
+        """
+        Copies a fresh L2 entry into L1 with its remaining lifetime and returns it.
+        """
+        entry = self._read_shared(key)
+        now = time.time()
+        if entry is None or entry[2] <= now:
+            if count and self.shared is not None:
+                self._count_shared("_shared_misses")
+            return _MISSING
+        encoded, stored_at, expires_at = entry
+        value = self._decode(encoded)
+        super().set(key, value, ttl=expires_at - now, age=max(0.0, now - stored_at))
+        if count:
+            self._count_shared("_shared_hits")
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = super().get(key, _MISSING)
+        if value is _MISSING:
+            value = self._fill_from_shared(key, count=True)
+        return default if value is _MISSING else value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        value = super().peek(key, _MISSING)
+        if value is _MISSING:
+            value = self._fill_from_shared(key, count=False)
+        return default if value is _MISSING else value
+
+    def get_stale(self, key: Hashable) -> tuple[Any, float] | None:
+        stale = super().get_stale(key)
+        if stale is not None:
+            return stale
+        entry = self._read_shared(key)
+        now = time.time()
+        if entry is None or entry[2] + self.stale_ttl <= now:
+            return None
+        encoded, stored_at, _ = entry
+        with self._lock:
+            self._stale_hits += 1
+        return self._decode(encoded), now - stored_at
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None, age: float = 0.0) -> None:
+        super().set(key, value, ttl=ttl, age=age)
+        if self.shared is None:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        try:
+            text = json.dumps([self._encode(value), now - age, now + ttl])
+            self.shared.set(self._shared_key(key), text, ttl + self.stale_ttl)
+        except Exception as e:
+            self._shared_failed("write", e)
+
+    def invalidate(self, key: Hashable) -> bool:
+        removed = super().invalidate(key)
+        if self.shared is not None:
+            try:
+                removed = self.shared.delete(self._shared_key(key)) > 0 or removed
+            except Exception as e:
+                self._shared_failed("invalidation", e)
+        return removed
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        removed = set()
+
+        def matches(key):
+            if predicate(key):
+                removed.add(key)
+                return True
+            return False
+
+        super().invalidate_where(matches)
+        if self.shared is not None:
+            prefix = f"{self.name}:"
+            try:
+                for name in self.shared.keys(prefix):
+                    key = json.loads(name[len(prefix):])
+                    key = tuple(key) if isinstance(key, list) else key
+                    if predicate(key):
+                        self.shared.delete(name)
+                        removed.add(key)
+            except Exception as e:
+                self._shared_failed("invalidation", e)
+        return len(removed)
+
+    def clear(self) -> None:
+        """
+        Removes all entries from both tiers. Counters are kept.
+        """
+        super().clear()
+        if self.shared is not None:
+            try:
+                self.shared.clear(f"{self.name}:")
+            except Exception as e:
+                self._shared_failed("clear", e)
+
+    def get_stats(self) -> dict:
+        """
+        Returns the L1 counters, plus hit/miss/error counts for L2 under ``shared``.
+        """
+        stats = super().get_stats()
+        if self.shared is None:
+            stats["shared"] = None
+            return stats
+        with self._lock:
+            lookups = self._shared_hits + self._shared_misses
+            stats["shared"] = {
+                "store": type(self.shared).__name__,
+                "hits": self._shared_hits,
+                "misses": self._shared_misses,
+                "errors": self._shared_errors,
+                "hit_ratio": self._shared_hits / lookups if lookups else 0.0,
+            }
+        return stats
@@ -0,0 +1,189 @@
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling upstream while a circuit is open.
+
+    When a last known good payload is available, ``stale_payload`` holds it and
+    ``age`` its age in seconds, so callers can serve it instead of failing.
+    """
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Upstream {endpoint} is unavailable; retry in {retry_after:.0f}s.")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        self.stale_payload = None
+        self.age = None
+
+
+class CircuitBreaker:
+    """
+    Thread-safe closed/open/half-open circuit breaker for one upstream endpoint.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail immediately with ``CircuitOpenError``. Once ``recovery_timeout``
+    seconds have passed the circuit is half-open: a single probe call is let
+    through, closing the circuit on success or re-opening it on failure.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        """
+        Args:
+            name (str): The endpoint name, used in logs, errors and statistics.
+            failure_threshold (int): Consecutive failures that open the circuit.
+            recovery_timeout (float): Seconds the circuit stays open before a probe is allowed.
+        """
+        if failure_threshold <= 0:
+            raise ValueError(f"Invalid failure threshold: {failure_threshold}. Must be positive.")
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._total_failures = 0
+        self._total_rejections = 0
+        self._times_opened = 0
+
+    def _current_state(self, now: float) -> str:
+        # Must be called with the lock held
+        if self._state == OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+            logger.info("Circuit %s is half-open", self.name)
+        return self._state
+
+    def before_call(self) -> None:
+        """
+        Checks whether a call may proceed, reserving the probe slot when half-open.
+
+        Raises:
+            CircuitOpenError: If the circuit is open or a half-open probe is already running.
+        """
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self._total_rejections += 1
+            retry_after = max(0.0, self.recovery_timeout - (now - self._opened_at))
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self) -> None:
+        """
+        Records a successful call, closing the circuit.
+        """
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Circuit %s closed", self.name)
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """
+        Records a failed call, opening the circuit if the threshold is reached or a probe failed.
+        """
+        with self._lock:
+            self._failures += 1
+            self._total_failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._times_opened += 1
+                    logger.warning("Circuit %s opened after %d consecutive failures", self.name, self._failures)
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def release(self) -> None:
+        """
+        Releases a reserved half-open probe slot without recording an outcome.
+
+        Used when a call is abandoned (for example cancelled) before upstream answered.
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def call(self, fn: Callable[[], Any], is_failure: Callable[[BaseException], bool] = lambda e: True) -> Any:
+        """
+        Calls ``fn`` through the breaker.
+
+        Args:
+            fn (Callable): Zero-argument function performing the upstream call.
+            is_failure (Callable): Decides whether an exception raised by ``fn`` means
+                upstream is unhealthy. Other exceptions count as a healthy response.
+
+        Returns:
+            Any: The result of ``fn``.
+
+        Raises:
+            CircuitOpenError: If the circuit does not allow the call.
+        """
+        self.before_call()
+        try:
+            result = fn()
+        except Exception as e:
+            if is_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.record_success()
+        return result
+
+    def reset(self) -> None:
+        """
+        Forces the circuit closed and clears the consecutive failure count.
+        """
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def get_stats(self) -> dict:
+        """
+        Returns the breaker state and counters.
+
+        Returns:
+            dict: State, consecutive failures, totals and seconds until a probe is allowed.
+        """
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "total_failures": self._total_failures,
+                "total_rejections": self._total_rejections,
+                "times_opened": self._times_opened,
+                "retry_after": max(0.0, self.recovery_timeout - (now - self._opened_at)) if state == OPEN else 0.0,
+            }
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import os
+
+from weather_app.utils.api_utils import fetch_air_quality_data_async, fetch_forecast_async, get_grid_cell
+from weather_app.utils.circuit_breaker import CircuitOpenError
+from weather_app.utils.logger import configure_logger
+from weather_app.utils.quota import QuotaExceededError
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Upstream fetches a single dashboard may have in flight at once
+DASHBOARD_CONCURRENCY = int(os.getenv("DASHBOARD_CONCURRENCY", "8"))
+# Seconds a dashboard waits for upstream before answering with what it has
+DASHBOARD_DEADLINE = float(os.getenv("DASHBOARD_DEADLINE", "5"))
+
+OK = "ok"
+STALE = "stale"
+TIMEOUT = "timeout"
+RATE_LIMITED = "rate_limited"
+UNAVAILABLE = "unavailable"
+ERROR = "error"
+
+
+def _outcome(task: asyncio.Task) -> dict:
+    """
+    Describes the result of one finished fetch.
+    """
+    error = task.exception()
+    if error is None:
+        return {"status": OK, "data": task.result()}
+    if isinstance(error, CircuitOpenError):
+        if error.stale_payload is not None:
+            return {"status": STALE, "data": error.stale_payload, "age": round(error.age)}
+        return {"status": UNAVAILABLE, "error": str(error)}
+    if isinstance(error, QuotaExceededError):
+        return {"status": RATE_LIMITED, "error": str(error)}
+    return {"status": ERROR, "error": str(error)}
+
+
+FETCHED_FIELDS = ("forecast", "air_quality")
+
+
+async def fetch_for_locations(locations: list[dict], fields=FETCHED_FIELDS, concurrency: int = DASHBOARD_CONCURRENCY,
+                              deadline: float = DASHBOARD_DEADLINE) -> list[dict]:
+    """
+    Fetches forecast and/or air quality for many locations concurrently.
+
+    Locations are grouped by weather grid cell and each cell is fetched once.
+    At most ``concurrency`` fetches run at once. Whatever has not finished
+    when ``deadline`` expires is reported as timed out rather than awaited;
+    the upstream calls themselves keep running and still fill the caches for
+    the next request.
+
+    Args:
+        locations (list[dict]): Locations with id, city, latitude and longitude.
+        fields (Iterable[str]): Any of "forecast" and "air_quality".
+        concurrency (int): Maximum fetches in flight.
+        deadline (float): Seconds to wait for all fetches.
+
+    Returns:
+        list[dict]: One item per location, in order, with the location, its grid
+            cell and, for each field, a ``status`` (ok, stale, timeout,
+            rate_limited, unavailable or error) plus ``data`` or ``error``.
+
+    Raises:
+        ValueError: If a field, the concurrency or the deadline is invalid.
+    """
+    if concurrency <= 0:
+        raise ValueError(f"Invalid concurrency: {concurrency}. Must be positive.")
+    if deadline <= 0:
+        raise ValueError(f"Invalid deadline: {deadline}. Must be positive.")
+    fetchers = {"forecast": fetch_forecast_async, "air_quality": fetch_air_quality_data_async}
+    unknown = [field for field in fields if field not in fetchers]
+    if unknown:
+        raise ValueError(f"Invalid fields: {unknown}. Must be among {', '.join(FETCHED_FIELDS)}.")
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(fetcher, location):
+        async with semaphore:
+            return await fetcher(location["latitude"], location["longitude"])
+
+    cells = [get_grid_cell(location["latitude"], location["longitude"]) for location in locations]
+    first_in_cell = {}
+    for location, cell in zip(locations, cells):
+        first_in_cell.setdefault(cell.id, location)
+    tasks = {
+        (cell_id, field): asyncio.ensure_future(fetch(fetchers[field], location))
+        for cell_id, location in first_in_cell.items()
+        for field in fields
+    }
+    done, pending = await asyncio.wait(tasks.values(), timeout=deadline) if tasks else (set(), set())
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    outcomes = {key: _outcome(task) if task in done else {"status": TIMEOUT} for key, task in tasks.items()}
+    items = []
+    for location, cell in zip(locations, cells):
+        item = {"location": location, "grid_cell": cell._asdict()}
+        for field in fields:
+            item[field] = outcomes[(cell.id, field)]
+        items.append(item)
+
+    if pending:
+        logger.warning("Deadline of %.1fs expired with %d of %d fetches for %d locations unfinished",
+                       deadline, len(pending), len(tasks), len(locations))
+    return items
+
+
+async def build_dashboard(locations: list[dict], concurrency: int = DASHBOARD_CONCURRENCY,
+                          deadline: float = DASHBOARD_DEADLINE) -> list[dict]:
+    """
+    Fetches forecast and air quality for a user's favorite locations; see ``fetch_for_locations``.
+    """
+    return await fetch_for_locations(locations, FETCHED_FIELDS, concurrency, deadline)
+
+
+def is_complete(items: list[dict]) -> bool:
+    """
+    Checks whether every fetched part of every item has data, fresh or stale.
+    """
+    return all(item[field]["status"] in (OK, STALE) for item in items for field in FETCHED_FIELDS if field in item)
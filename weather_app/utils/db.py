@@ -1,3 +1,55 @@
+import logging
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func, inspect, select
+
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+db = SQLAlchemy()
+
+
+def upgrade_schema() -> None:
+    """
+    Adds the columns and indexes of existing tables that the database lacks.
+
+    ``create_all`` only creates missing tables, so columns and indexes added
+    to a model later never reach a database created before them. New columns
+    must be nullable; they are added empty. Before a unique index marked
+    ``info={'deduplicate': True}`` is created, rows repeating its columns are
+    deleted, keeping the one with the lowest primary key. Must be called within an app context.
+    """
+    with db.engine.begin() as connection:
+        inspector = inspect(connection)
+        tables = set(inspector.get_table_names())
+        for table in db.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=db.engine.dialect)
+                    connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+                    logger.info("Added column %s.%s", table.name, column.name)
+            unique = {frozenset(index["column_names"])
+                      for index in inspector.get_indexes(table.name) if index["unique"]}
+            unique.update(frozenset(constraint["column_names"])
+                          for constraint in inspector.get_unique_constraints(table.name))
+            for index in table.indexes:
+                if index.unique and frozenset(column.name for column in index.columns) in unique:
+                    continue  # enforced already, e.g. by the table constraint it replaced
+                if index.unique and index.info.get("deduplicate"):
+                    _delete_duplicates(connection, table, index)
+                index.create(connection, checkfirst=True)
+
 
-db = SQLAlchemy()
\ No newline at end of file
+def _delete_duplicates(connection, table, index) -> None:
+    key = list(table.primary_key.columns)[0]
+    first = select(func.min(key).label("id")).group_by(*index.columns).subquery()
+    removed = connection.execute(table.delete().where(key.not_in(select(first.c.id)))).rowcount
+    if removed:
+        logger.warning("Deleted %d duplicate rows from %s before creating %s", removed, table.name, index.name)
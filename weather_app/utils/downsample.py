@@ -0,0 +1,156 @@
+import logging
+
+import numpy as np
+from sqlalchemy import func
+
+from weather_app.models.observation_model import HistoricalObservation
+from weather_app.utils.db import db
+from weather_app.utils.logger import configure_logger
+from weather_app.utils.weather_stats import load_series
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+HISTORY_FIELDS = ("temp", "feels_like", "humidity", "pressure", "wind_speed", "clouds", "precipitation")
+DOWNSAMPLE_METHODS = ("bucket", "lttb")
+MAX_POINTS_LIMIT = 10000
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each of ``threshold - 2`` equal
+    buckets in between, the point forming the largest triangle with the point
+    kept from the previous bucket and the average of the next bucket. This
+    preserves the visual shape (peaks and troughs) of a series.
+
+    Args:
+        x (np.ndarray): Sorted x values (timestamps).
+        y (np.ndarray): The values.
+        threshold (int): Number of points to keep, at least 3.
+
+    Returns:
+        np.ndarray: Indexes of the kept points, ascending.
+    """
+    n = len(x)
+    if threshold >= n or n <= 2:
+        return np.arange(n)
+    if threshold < 3:
+        raise ValueError(f"Invalid point budget: {threshold}. Must be at least 3.")
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    every = (n - 2) / (threshold - 2)
+    edges = (np.floor(np.arange(threshold - 1) * every) + 1).astype(np.int64)
+    edges[-1] = n - 1
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[i + 1] = previous
+    return kept
+
+
+def _validate(field: str, start: int, end: int, max_points: int) -> None:
+    if field not in HISTORY_FIELDS:
+        raise ValueError(f"Invalid field: {field}. Must be one of {', '.join(HISTORY_FIELDS)}.")
+    if start >= end:
+        raise ValueError(f"Invalid time range: start {start} must be before end {end}.")
+    if not 3 <= max_points <= MAX_POINTS_LIMIT:
+        raise ValueError(f"Invalid max_points: {max_points}. Must be between 3 and {MAX_POINTS_LIMIT}.")
+
+
+def bucket_history(location_id: int, field: str, start: int, end: int, max_points: int) -> dict:
+    """
+    Aggregates a stored series into at most ``max_points`` equal time buckets in the database.
+
+    Only one row per bucket leaves the database, so the response size and most
+    of the cost do not grow with the length of the range.
+
+    Returns:
+        dict: "points" with ts (mean timestamp), mean, min, max and count per
+            non-empty bucket, and "source_points".
+    """
+    _validate(field, start, end, max_points)
+    column = getattr(HistoricalObservation, field)
+    width = -(-(end - start) // max_points)
+    bucket = ((HistoricalObservation.ts - start) // width).label("bucket")
+    rows = (
+        db.session.query(
+            bucket,
+            func.avg(HistoricalObservation.ts),
+            func.avg(column),
+            func.min(column),
+            func.max(column),
+            func.count(column),
+        )
+        .filter(HistoricalObservation.location_id == location_id,
+                HistoricalObservation.ts >= start, HistoricalObservation.ts < end,
+                column.isnot(None))
+        .group_by(bucket)
+        .order_by(bucket)
+        .all()
+    )
+    points = [
+        {"ts": int(ts), "mean": mean, "min": low, "max": high, "count": count}
+        for _, ts, mean, low, high, count in rows
+    ]
+    return {"points": points, "source_points": sum(point["count"] for point in points)}
+
+
+def lttb_history(location_id: int, field: str, start: int, end: int, max_points: int) -> dict:
+    """
+    Downsamples a stored series to at most ``max_points`` original points with LTTB.
+
+    Returns:
+        dict: "points" with ts and value of each kept observation, and "source_points".
+    """
+    _validate(field, start, end, max_points)
+    series = load_series(HistoricalObservation, [field], [location_id], start, end)
+    keep = ~np.isnan(series[field])
+    ts, values = series["ts"][keep], series[field][keep]
+    order = np.argsort(ts, kind="stable")
+    ts, values = ts[order], values[order]
+
+    kept = lttb(ts, values, max_points)
+    points = [{"ts": t, "value": v} for t, v in zip(ts[kept].tolist(), values[kept].tolist())]
+    return {"points": points, "source_points": len(ts)}
+
+
+def get_history(location_id: int, field: str, start: int, end: int, max_points: int, method: str = "bucket") -> dict:
+    """
+    Reads a location's stored history for a range, downsampled to a point budget.
+
+    Args:
+        location_id (int): The location.
+        field (str): One of HISTORY_FIELDS.
+        start (int): Inclusive start, Unix seconds.
+        end (int): Exclusive end, Unix seconds.
+        max_points (int): Maximum points returned.
+        method (str): "bucket" (aggregated in the database) or "lttb" (shape-preserving selection).
+
+    Returns:
+        dict: The points and the number of stored points they summarize.
+
+    Raises:
+        ValueError: If any argument is invalid.
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Invalid method: {method}. Must be one of {', '.join(DOWNSAMPLE_METHODS)}.")
+    result = (bucket_history if method == "bucket" else lttb_history)(location_id, field, start, end, max_points)
+    logger.info("Downsampled %d %s points for location %d to %d with %s",
+                result["source_points"], field, location_id, len(result["points"]), method)
+    return result
@@ -0,0 +1,123 @@
+import csv
+import io
+import json
+import logging
+import os
+from typing import Iterable, Iterator
+
+from sqlalchemy import and_, or_
+
+from weather_app.models.observation_model import HistoricalObservation
+from weather_app.utils.db import db
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Rows fetched per query while streaming an export
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_COLUMNS = (
+    "location_id", "ts", "temp", "feels_like", "humidity", "pressure", "wind_speed", "clouds", "precipitation"
+)
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def iter_history(location_ids: list[int] | None, start: int | None, end: int | None,
+                 batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[tuple]:
+    """
+    Yields stored historical observations ordered by location and time, one batch query at a time.
+
+    Batches are fetched by keyset on the (location_id, ts) index, so each query
+    is short-lived and memory stays bounded by ``batch_size`` whatever the range.
+
+    Args:
+        location_ids (list[int] | None): Locations to export; all if None.
+        start (int | None): Inclusive start, Unix seconds.
+        end (int | None): Exclusive end, Unix seconds.
+        batch_size (int): Rows per query.
+
+    Yields:
+        tuple: Values of EXPORT_COLUMNS for one observation.
+    """
+    columns = [getattr(HistoricalObservation, column) for column in EXPORT_COLUMNS]
+    filters = []
+    if location_ids is not None:
+        filters.append(HistoricalObservation.location_id.in_(location_ids))
+    if start is not None:
+        filters.append(HistoricalObservation.ts >= start)
+    if end is not None:
+        filters.append(HistoricalObservation.ts < end)
+
+    last = None
+    exported = 0
+    while True:
+        query = db.session.query(*columns).filter(*filters)
+        if last is not None:
+            last_location, last_ts = last
+            query = query.filter(or_(
+                HistoricalObservation.location_id > last_location,
+                and_(HistoricalObservation.location_id == last_location, HistoricalObservation.ts > last_ts),
+            ))
+        rows = query.order_by(HistoricalObservation.location_id, HistoricalObservation.ts).limit(batch_size).all()
+        # End the read transaction between batches so long exports do not pin a snapshot
+        db.session.rollback()
+        for row in rows:
+            yield tuple(row)
+        exported += len(rows)
+        if len(rows) < batch_size:
+            break
+        last = (rows[-1].location_id, rows[-1].ts)
+    logger.info("Exported %d historical observations", exported)
+
+
+def ndjson_lines(rows: Iterable[tuple]) -> Iterator[str]:
+    """
+    Formats rows as newline-delimited JSON objects.
+    """
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_COLUMNS, row)), separators=(",", ":")) + "\n"
+
+
+def csv_lines(rows: Iterable[tuple]) -> Iterator[str]:
+    """
+    Formats rows as CSV, starting with a header line.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header only: no rows were written
+        yield buffer.getvalue()
+
+
+def export_history(export_format: str, location_ids: list[int] | None = None, start: int | None = None,
+                   end: int | None = None, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """
+    Streams stored history in the requested format.
+
+    Args:
+        export_format (str): "ndjson" or "csv".
+        location_ids (list[int] | None): Locations to export; all if None.
+        start (int | None): Inclusive start, Unix seconds.
+        end (int | None): Exclusive end, Unix seconds.
+        batch_size (int): Rows per query.
+
+    Returns:
+        Iterator[str]: Chunks of the export; nothing is queried until iteration starts.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid export format: {export_format}. Must be one of {', '.join(EXPORT_FORMATS)}.")
+    rows = iter_history(location_ids, start, end, batch_size)
+    return ndjson_lines(rows) if export_format == "ndjson" else csv_lines(rows)
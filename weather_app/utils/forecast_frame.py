@@ -0,0 +1,299 @@
+from array import array
+import json
+import math
+
+
+# Integer columns use this value for points where the field is absent
+MISSING_INT = -(2 ** 63)
+
+# Columns per OneCall section: (path into the data point, array typecode).
+# "q" columns hold ints, "d" columns floats (NaN when absent). Anything a
+# column cannot hold exactly is kept in the frame's extras instead.
+_COMMON_COLUMNS = (
+    (("dt",), "q"),
+    (("temp",), "d"),
+    (("feels_like",), "d"),
+    (("pressure",), "q"),
+    (("humidity",), "q"),
+    (("dew_point",), "d"),
+    (("uvi",), "d"),
+    (("clouds",), "q"),
+    (("visibility",), "q"),
+    (("wind_speed",), "d"),
+    (("wind_deg",), "q"),
+    (("wind_gust",), "d"),
+    (("rain", "1h"), "d"),
+    (("snow", "1h"), "d"),
+)
+
+SECTION_COLUMNS = {
+    "current": _COMMON_COLUMNS + ((("sunrise",), "q"), (("sunset",), "q")),
+    "hourly": _COMMON_COLUMNS + ((("pop",), "d"),),
+    "minutely": ((("dt",), "q"), (("precipitation",), "d")),
+    "daily": (
+        (("dt",), "q"),
+        (("sunrise",), "q"),
+        (("sunset",), "q"),
+        (("moonrise",), "q"),
+        (("moonset",), "q"),
+        (("moon_phase",), "d"),
+        (("temp", "day"), "d"),
+        (("temp", "min"), "d"),
+        (("temp", "max"), "d"),
+        (("temp", "night"), "d"),
+        (("temp", "eve"), "d"),
+        (("temp", "morn"), "d"),
+        (("feels_like", "day"), "d"),
+        (("feels_like", "night"), "d"),
+        (("feels_like", "eve"), "d"),
+        (("feels_like", "morn"), "d"),
+        (("pressure",), "q"),
+        (("humidity",), "q"),
+        (("dew_point",), "d"),
+        (("wind_speed",), "d"),
+        (("wind_deg",), "q"),
+        (("wind_gust",), "d"),
+        (("clouds",), "q"),
+        (("pop",), "d"),
+        (("rain",), "d"),
+        (("snow",), "d"),
+        (("uvi",), "d"),
+    ),
+}
+
+
+def _fits(value, typecode: str) -> bool:
+    """
+    Returns whether a JSON value can be stored in a column without changing it.
+    """
+    if isinstance(value, bool):
+        return False
+    if typecode == "q":
+        return isinstance(value, int) and MISSING_INT < value < 2 ** 63
+    if isinstance(value, int):
+        return abs(value) <= 2 ** 53  # exact as a float, so it can be cast back
+    return isinstance(value, float) and not math.isnan(value)
+
+
+class _Section:
+    """
+    Column store for one list section of a OneCall payload (or the single ``current`` point).
+    """
+
+    __slots__ = ("length", "columns", "conditions", "ints")
+
+    def __init__(self, length: int, columns: dict, conditions: array, ints: dict):
+        self.length = length
+        self.columns = columns        # path -> array
+        self.conditions = conditions  # per point index into the frame's condition table, -1 if absent
+        self.ints = ints              # path -> indexes of points whose value in a float column was a JSON int
+
+
+class ForecastFrame:
+    """
+    Compact, array-backed form of a OneCall forecast response.
+
+    Each section (``current``, ``minutely``, ``hourly``, ``daily``) is stored as
+    one typed ``array.array`` per field instead of a dict per data point. The
+    ``weather`` condition lists, which repeat heavily, are interned in a single
+    table shared by all sections. Integers stored in float columns are noted
+    and cast back. Fields without a column (for example daily summaries or
+    alerts) are kept as one compact JSON string, so ``to_dict`` always
+    reproduces the original payload, types included.
+    """
+
+    __slots__ = ("lat", "lon", "timezone", "timezone_offset", "_sections", "_conditions", "_extras")
+
+    def __init__(self, lat, lon, timezone, timezone_offset, sections: dict, conditions: tuple, extras: str | None):
+        self.lat = lat
+        self.lon = lon
+        self.timezone = timezone
+        self.timezone_offset = timezone_offset
+        self._sections = sections
+        self._conditions = conditions
+        self._extras = extras
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "ForecastFrame":
+        """
+        Parses a OneCall response.
+
+        Args:
+            payload (dict): The decoded JSON response.
+
+        Returns:
+            ForecastFrame: The compact form of the response.
+        """
+        conditions = []
+        condition_ids = {}
+        extras = {}
+        sections = {}
+
+        for name, columns in SECTION_COLUMNS.items():
+            if name not in payload:
+                continue
+            value = payload[name]
+            single = name == "current"
+            points = [value] if single else value
+            if not isinstance(points, list) or not all(isinstance(point, dict) for point in points):
+                extras[name] = value
+                continue
+
+            arrays = {path: array(typecode) for path, typecode in columns}
+            indexes = array("h")
+            ints = {}
+            leftovers = []
+            for n, point in enumerate(points):
+                rest = dict(point)
+                for path, typecode in columns:
+                    field = _pop_path(rest, path, typecode)
+                    arrays[path].append(field if field is not None else (MISSING_INT if typecode == "q" else math.nan))
+                    if typecode == "d" and isinstance(field, int):
+                        ints.setdefault(path, set()).add(n)
+
+                weather = rest.pop("weather", None)
+                if weather is None:
+                    indexes.append(-1)
+                else:
+                    encoded = json.dumps(weather, sort_keys=True)
+                    if encoded not in condition_ids:
+                        condition_ids[encoded] = len(conditions)
+                        conditions.append(encoded)
+                    indexes.append(condition_ids[encoded])
+                leftovers.append(rest)
+
+            if any(leftovers):
+                extras[name] = leftovers
+            # Drop columns that are absent from every point
+            arrays = {path: values for path, values in arrays.items() if any(_present(v) for v in values)}
+            sections[name] = _Section(len(points), arrays, indexes,
+                                      {path: frozenset(points) for path, points in ints.items()})
+
+        header = ("lat", "lon", "timezone", "timezone_offset")
+        for key, value in payload.items():
+            if key not in header and key not in SECTION_COLUMNS:
+                extras[key] = value
+
+        return cls(
+            payload.get("lat"),
+            payload.get("lon"),
+            payload.get("timezone"),
+            payload.get("timezone_offset"),
+            sections,
+            tuple(conditions),
+            json.dumps(extras, separators=(",", ":")) if extras else None,
+        )
+
+    def __len__(self) -> int:
+        """
+        Returns the total number of data points across all sections.
+        """
+        return sum(section.length for section in self._sections.values())
+
+    def sections(self) -> list[str]:
+        """
+        Returns the names of the sections present in the frame.
+        """
+        return list(self._sections)
+
+    def column(self, section: str, field: str) -> array:
+        """
+        Returns one field of a section as a typed array.
+
+        Args:
+            section (str): The section name, e.g. "hourly".
+            field (str): The field name; nested fields are dotted, e.g. "temp.max".
+
+        Returns:
+            array: The values, with NaN or MISSING_INT where the field is absent.
+
+        Raises:
+            KeyError: If the section or field is not in the frame.
+        """
+        data = self._sections[section]
+        path = tuple(field.split("."))
+        if path in data.columns:
+            return data.columns[path]
+        typecode = dict(SECTION_COLUMNS[section]).get(path)
+        if typecode is None:
+            raise KeyError(f"Unknown field {field!r} for section {section!r}")
+        return array(typecode, [MISSING_INT if typecode == "q" else math.nan] * data.length)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns the approximate size of the stored data in bytes.
+        """
+        total = sum(len(condition) for condition in self._conditions) + len(self._extras or "")
+        for section in self._sections.values():
+            total += section.conditions.itemsize * len(section.conditions)
+            total += sum(values.itemsize * len(values) for values in section.columns.values())
+        return total
+
+    def to_dict(self) -> dict:
+        """
+        Rebuilds the response in the original OneCall shape.
+
+        Returns:
+            dict: A payload equal to the one the frame was parsed from.
+        """
+        extras = json.loads(self._extras) if self._extras else {}
+        conditions = [json.loads(condition) for condition in self._conditions]
+        payload = {}
+        for key in ("lat", "lon", "timezone", "timezone_offset"):
+            value = getattr(self, key)
+            if value is not None:
+                payload[key] = value
+
+        for name, section in self._sections.items():
+            leftovers = extras.pop(name, None) or [{}] * section.length
+            points = []
+            for n in range(section.length):
+                point = dict(leftovers[n])
+                for path, values in section.columns.items():
+                    value = values[n]
+                    if _present(value):
+                        if n in section.ints.get(path, ()):
+                            value = int(value)
+                        target = point
+                        for part in path[:-1]:
+                            target = target.setdefault(part, {})
+                        target[path[-1]] = value
+                index = section.conditions[n]
+                if index >= 0:
+                    point["weather"] = conditions[index]
+                points.append(point)
+            payload[name] = points[0] if name == "current" else points
+
+        payload.update(extras)
+        return payload
+
+
+def _present(value) -> bool:
+    return value != MISSING_INT and not (isinstance(value, float) and math.isnan(value))
+
+
+def _pop_path(point: dict, path: tuple, typecode: str):
+    """
+    Removes and returns a column value from a data point, or None if it cannot be stored.
+
+    Nested dicts emptied by the removal are dropped; they are rebuilt by ``to_dict``.
+    """
+    parent = point
+    for part in path[:-1]:
+        child = parent.get(part)
+        if not isinstance(child, dict):
+            return None
+        if parent is point:
+            # Copy nested dicts before removing from them so the payload is left untouched
+            child = dict(child)
+            point[part] = child
+        parent = child
+
+    value = parent.get(path[-1])
+    if value is None or not _fits(value, typecode):
+        return None
+    del parent[path[-1]]
+    if len(path) > 1 and not parent:
+        del point[path[0]]
+    return value
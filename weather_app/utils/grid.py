@@ -0,0 +1,219 @@
+from collections import Counter, namedtuple
+import math
+
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_DECODE = {char: n for n, char in enumerate(GEOHASH_ALPHABET)}
+
+GRID_MODES = ("degrees", "geohash")
+
+# Default precision per mode: 0.01 degree buckets or 6-character geohashes (both roughly 1 km)
+DEFAULT_PRECISION = {"degrees": 0.01, "geohash": 6}
+
+EARTH_RADIUS_KM = 6371.0
+
+GridCell = namedtuple("GridCell", ["id", "latitude", "longitude"])
+GridCell.__doc__ = "A grid cell: its identifier and the coordinates of its centre."
+
+
+def geohash_encode(latitude: float, longitude: float, length: int) -> str:
+    """
+    Encodes coordinates as a geohash of the given length.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < length:
+        target, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (target[0] + target[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            target[0] = middle
+        else:
+            target[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def geohash_bounds(geohash: str) -> tuple[float, float, float, float]:
+    """
+    Decodes a geohash to its bounding box.
+
+    Returns:
+        tuple: (min_latitude, min_longitude, max_latitude, max_longitude).
+
+    Raises:
+        ValueError: If the geohash contains invalid characters.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        if char not in GEOHASH_DECODE:
+            raise ValueError(f"Invalid geohash: {geohash}")
+        value = GEOHASH_DECODE[char]
+        for shift in range(4, -1, -1):
+            target = lon_range if even else lat_range
+            middle = (target[0] + target[1]) / 2
+            if value >> shift & 1:
+                target[0] = middle
+            else:
+                target[1] = middle
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def wrap_longitude(longitude: float) -> float:
+    """
+    Wraps a longitude into [-180, 180).
+    """
+    return (longitude + 180.0) % 360.0 - 180.0
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Returns the great-circle distance between two points in kilometres.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class SpatialGrid:
+    """
+    Snaps coordinates to grid cells so that nearby locations share upstream fetches.
+
+    In "degrees" mode the precision is the cell size in degrees; in "geohash"
+    mode it is the geohash length. Weather for a cell is always fetched for
+    the cell's centre, so every location in the cell gets the same data.
+    """
+
+    def __init__(self, mode: str = "degrees", precision: float | None = None):
+        """
+        Args:
+            mode (str): "degrees" or "geohash".
+            precision (float | None): Cell size in degrees, or geohash length. Defaults per mode.
+        """
+        self.configure(mode, precision)
+
+    def configure(self, mode: str, precision: float | None = None) -> None:
+        """
+        Replaces the grid mode and precision.
+
+        Raises:
+            ValueError: If the mode or precision is invalid.
+        """
+        if mode not in GRID_MODES:
+            raise ValueError(f"Invalid grid mode: {mode}. Must be one of {', '.join(GRID_MODES)}.")
+        if precision is None:
+            precision = DEFAULT_PRECISION[mode]
+        if mode == "geohash":
+            if int(precision) != precision or not 1 <= precision <= 12:
+                raise ValueError(f"Invalid geohash precision: {precision}. Must be an integer between 1 and 12.")
+            precision = int(precision)
+        elif not 0 < precision <= 10:
+            raise ValueError(f"Invalid cell size: {precision}. Must be between 0 and 10 degrees.")
+        # Assigned together so concurrent readers never see a mixed configuration
+        self._config = (mode, precision)
+
+    @property
+    def mode(self) -> str:
+        return self._config[0]
+
+    @property
+    def precision(self) -> float:
+        return self._config[1]
+
+    def cell(self, latitude: float, longitude: float) -> GridCell:
+        """
+        Returns the cell containing a point.
+
+        Args:
+            latitude (float): Latitude of the point.
+            longitude (float): Longitude of the point.
+
+        Returns:
+            GridCell: The cell identifier and centre.
+        """
+        mode, precision = self._config
+        if mode == "geohash":
+            geohash = geohash_encode(latitude, longitude, precision)
+            min_lat, min_lon, max_lat, max_lon = geohash_bounds(geohash)
+            return GridCell(geohash, round((min_lat + max_lat) / 2, 6), round((min_lon + max_lon) / 2, 6))
+
+        # Round before flooring so values such as 42.36 / 0.01 land in the intended bucket
+        row = math.floor(round(min(90.0, max(-90.0, latitude)) / precision, 9))
+        col = math.floor(round(wrap_longitude(longitude) / precision, 9))
+        # Cells on the poles and the antimeridian extend past them; keep their centres valid coordinates
+        return GridCell(
+            f"{precision:g}:{row}:{col}",
+            round(min(90.0, max(-90.0, (row + 0.5) * precision)), 6),
+            round(wrap_longitude((col + 0.5) * precision), 6),
+        )
+
+    def bounds(self, cell_id: str) -> tuple[float, float, float, float]:
+        """
+        Returns the bounding box of a cell produced by this grid.
+
+        Returns:
+            tuple: (min_latitude, min_longitude, max_latitude, max_longitude).
+
+        Raises:
+            ValueError: If the cell identifier is malformed.
+        """
+        if self.mode == "geohash":
+            return geohash_bounds(cell_id)
+        try:
+            size, row, col = cell_id.split(":")
+            size, row, col = float(size), int(row), int(col)
+        except ValueError:
+            raise ValueError(f"Invalid grid cell: {cell_id}")
+        return row * size, col * size, (row + 1) * size, (col + 1) * size
+
+    def summarize(self, coordinates: list[tuple[float, float]], top: int = 10) -> dict:
+        """
+        Reports how many locations collapse into each cell, and how far they are moved.
+
+        Args:
+            coordinates (list[tuple[float, float]]): (latitude, longitude) of every location.
+            top (int): Number of most populated cells to list.
+
+        Returns:
+            dict: Location and cell counts, the distribution of locations per cell, the
+                busiest cells and the distance from locations to their cell centre in km.
+        """
+        cells = {}
+        counts = Counter()
+        offsets = []
+        for latitude, longitude in coordinates:
+            cell = self.cell(latitude, longitude)
+            cells[cell.id] = cell
+            counts[cell.id] += 1
+            offsets.append(distance_km(latitude, longitude, cell.latitude, cell.longitude))
+
+        return {
+            "mode": self.mode,
+            "precision": self.precision,
+            "locations": len(coordinates),
+            "cells": len(counts),
+            "shared_cells": sum(1 for count in counts.values() if count > 1),
+            "upstream_calls_saved": len(coordinates) - len(counts),
+            "max_locations_per_cell": max(counts.values(), default=0),
+            "locations_per_cell": {size: n for size, n in sorted(Counter(counts.values()).items())},
+            "busiest_cells": [
+                {**cells[cell_id]._asdict(), "locations": count} for cell_id, count in counts.most_common(top)
+            ],
+            "mean_offset_km": round(sum(offsets) / len(offsets), 3) if offsets else 0.0,
+            "max_offset_km": round(max(offsets, default=0.0), 3),
+        }
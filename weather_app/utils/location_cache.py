@@ -0,0 +1,238 @@
+from collections import deque
+import logging
+import os
+import threading
+from typing import Any, Callable, Iterable
+
+from weather_app.utils.cache import TTLCache
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+LOCATION_CACHE_SIZE = int(os.getenv("LOCATION_CACHE_SIZE", "10000"))
+# Bounds how long a worker can serve a location another worker changed when no channel is configured
+LOCATION_CACHE_TTL = float(os.getenv("LOCATION_CACHE_TTL", "3600"))
+# Invalidation messages remembered for in-memory indexes to catch up on; an index further behind is rebuilt
+LOCATION_CHANGE_LOG_SIZE = int(os.getenv("LOCATION_CHANGE_LOG_SIZE", "10000"))
+
+# Messages are comma-separated location IDs, or CLEAR_ALL
+CLEAR_ALL = "*"
+
+
+class LocalInvalidationChannel:
+    """
+    Delivers invalidation messages to every subscriber in this process.
+
+    Used when workers share a process (threads, several apps in tests) and as
+    the reference for other channel implementations, which only need
+    ``publish``, ``subscribe`` and ``close``.
+    """
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def publish(self, message: str) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(message)
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def close(self) -> None:
+        with self._lock:
+            self._subscribers.clear()
+
+
+class RedisInvalidationChannel:
+    """
+    Broadcasts invalidation messages to every worker through Redis pub/sub.
+
+    Requires the optional ``redis`` package. Messages are received on a
+    background thread started by ``subscribe``.
+    """
+
+    def __init__(self, url: str, name: str = "weather_app:location-invalidations"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("A Redis invalidation channel requires the 'redis' package.") from e
+        self.name = name
+        self._client = redis.Redis.from_url(url)
+        self._pubsub = None
+        self._thread = None
+
+    def publish(self, message: str) -> None:
+        self._client.publish(self.name, message)
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        def handle(event):
+            data = event["data"]
+            callback(data.decode() if isinstance(data, bytes) else data)
+
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self.name: handle})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+
+class LocationCache:
+    """
+    Bounded read-through cache of location records keyed by ID.
+
+    Values are detached copies produced by the loader, safe to share between
+    requests and threads. Invalidations are applied locally and, if a channel
+    is attached, published so other workers drop their copies too.
+
+    Messages received from the channel, including this worker's own, are also
+    kept in a numbered log, so that in-memory indexes over the locations
+    table can catch up on changes committed by other workers (see ``changes_since``).
+    """
+
+    def __init__(self, max_size: int = LOCATION_CACHE_SIZE, ttl: float = LOCATION_CACHE_TTL,
+                 log_size: int = LOCATION_CHANGE_LOG_SIZE):
+        self._cache = TTLCache("location", ttl=ttl, max_size=max_size)
+        self._channel = None
+        self._log = deque(maxlen=log_size)  # (sequence, tuple of IDs or CLEAR_ALL)
+        self._sequence = 0
+        self._log_lock = threading.Lock()
+
+    def get(self, location_id: int, loader: Callable[[int], Any]) -> Any:
+        """
+        Returns the cached record for an ID, loading and caching it on a miss.
+
+        Args:
+            location_id (int): The location ID.
+            loader (Callable): Called with the ID on a miss; its exceptions propagate and nothing is cached.
+
+        Returns:
+            Any: The record.
+        """
+        record = self._cache.get(location_id)
+        if record is None:
+            record = loader(location_id)
+            self._cache.set(location_id, record)
+        return record
+
+    def invalidate(self, location_id: int) -> None:
+        """
+        Drops a record here and, through the channel, in every other worker.
+        """
+        self.invalidate_many([location_id])
+
+    def invalidate_many(self, location_ids: Iterable[int]) -> None:
+        """
+        Drops records here and, through the channel in a single message, in every other worker.
+        """
+        location_ids = list(location_ids)
+        if not location_ids:
+            return
+        for location_id in location_ids:
+            self._cache.invalidate(location_id)
+        if self._channel is not None:
+            try:
+                self._channel.publish(",".join(str(location_id) for location_id in location_ids))
+            except Exception as e:
+                # Other workers fall back on the TTL
+                logger.error("Failed to publish invalidation of %d locations: %s", len(location_ids), str(e))
+
+    def _on_message(self, message: str) -> None:
+        if message == CLEAR_ALL:
+            self._cache.clear()
+            change = CLEAR_ALL
+        else:
+            change = tuple(int(location_id) for location_id in message.split(","))
+            for location_id in change:
+                self._cache.invalidate(location_id)
+        with self._log_lock:
+            self._sequence += 1
+            self._log.append((self._sequence, change))
+
+    @property
+    def sequence(self) -> int:
+        """
+        Number of the last message received from the channel.
+        """
+        with self._log_lock:
+            return self._sequence
+
+    def changes_since(self, sequence: int) -> tuple[int, set[int] | None]:
+        """
+        Returns the IDs announced on the channel after a given message.
+
+        Args:
+            sequence (int): The last message already accounted for, from ``sequence``.
+
+        Returns:
+            tuple: The current sequence number, and the IDs changed since; None
+                if the log no longer reaches back that far or everything was
+                invalidated, in which case the caller must reload everything.
+        """
+        with self._log_lock:
+            if sequence > self._sequence or (self._log and self._log[0][0] > sequence + 1):
+                return self._sequence, None
+            location_ids = set()
+            for number, change in reversed(self._log):
+                if number <= sequence:
+                    break
+                if change == CLEAR_ALL:
+                    return self._sequence, None
+                location_ids.update(change)
+            return self._sequence, location_ids
+
+    def attach_channel(self, channel) -> None:
+        """
+        Replaces the cross-worker invalidation channel; None disables it.
+        """
+        if self._channel is not None:
+            self._channel.close()
+        self._channel = channel
+        if channel is not None:
+            channel.subscribe(self._on_message)
+
+    def configure(self, max_size: int, ttl: float) -> None:
+        """
+        Resizes the cache, dropping every entry.
+        """
+        self._cache = TTLCache("location", ttl=ttl, max_size=max_size)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def get_stats(self) -> dict:
+        stats = self._cache.get_stats()
+        stats["channel"] = type(self._channel).__name__ if self._channel is not None else None
+        return stats
+
+
+location_cache = LocationCache()
+
+
+def configure_location_cache(config) -> None:
+    """
+    Applies the location cache settings from a Flask config.
+
+    Reads LOCATION_CACHE_SIZE, LOCATION_CACHE_TTL and LOCATION_CACHE_REDIS_URL
+    (a Redis URL enables cross-worker invalidation). The cache starts empty,
+    since records from another database must not be served.
+
+    Args:
+        config (Mapping): The app config.
+    """
+    location_cache.configure(config.get("LOCATION_CACHE_SIZE", LOCATION_CACHE_SIZE),
+                             config.get("LOCATION_CACHE_TTL", LOCATION_CACHE_TTL))
+    redis_url = config.get("LOCATION_CACHE_REDIS_URL")
+    location_cache.attach_channel(RedisInvalidationChannel(redis_url) if redis_url else None)
@@ -0,0 +1,107 @@
+import logging
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from weather_app.models.location_model import Location
+from weather_app.utils.db import db
+from weather_app.utils.location_cache import location_cache
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Changes are ("add" | "remove", id, city, latitude, longitude); removals carry only the ID
+ADD = "add"
+REMOVE = "remove"
+
+_subscribers = []
+
+
+def on_location_changes(callback: Callable[[list[tuple]], None]) -> Callable[[list[tuple]], None]:
+    """
+    Registers a callback for committed location changes, for in-memory indexes
+    that mirror the locations table. Usable as a decorator.
+
+    The callback runs in the committing thread, inside its app context, with
+    the changes of one transaction in order. Changes that are rolled back are
+    never delivered. Changes committed by other workers are not delivered
+    here; indexes catch up on them with ``load_changes_since``.
+    """
+    _subscribers.append(callback)
+    return callback
+
+
+def _pending(session) -> list:
+    return session.info.setdefault("location_changes", [])
+
+
+def track_inserted_locations(session, rows) -> None:
+    """
+    Queues locations inserted without the ORM unit of work (which fires no
+    mapper events) to be delivered when the session commits.
+
+    Args:
+        session (Session): The session that inserted them.
+        rows (Iterable): (id, city, latitude, longitude) of each inserted location.
+    """
+    _pending(session).extend((ADD, *row) for row in rows)
+
+
+@event.listens_for(Location, "after_insert")
+@event.listens_for(Location, "after_update")
+def _location_saved(mapper, connection, target) -> None:
+    _pending(object_session(target)).append((ADD, target.id, target.city, target.latitude, target.longitude))
+
+
+@event.listens_for(Location, "after_delete")
+def _location_deleted(mapper, connection, target) -> None:
+    _pending(object_session(target)).append((REMOVE, target.id, None, None, None))
+
+
+def load_changes_since(sequence: int) -> tuple[int, list[tuple] | None]:
+    """
+    Re-reads the locations that any worker changed after a point in the
+    location cache's invalidation log, for indexes to apply.
+
+    Args:
+        sequence (int): The log position the index reflects (``location_cache.sequence`` when it was built).
+
+    Returns:
+        tuple: The new log position, and the changes in the ``on_location_changes``
+            format: an add with the current row for each changed location that
+            exists, a removal for each that does not. None if the index must be rebuilt.
+    """
+    sequence, location_ids = location_cache.changes_since(sequence)
+    if not location_ids:
+        return sequence, None if location_ids is None else []
+    rows = {row.id: tuple(row) for row in db.session.query(
+        Location.id, Location.city, Location.latitude, Location.longitude
+    ).filter(Location.id.in_(location_ids))}
+    return sequence, [
+        (ADD, *rows[location_id]) if location_id in rows else (REMOVE, location_id, None, None, None)
+        for location_id in sorted(location_ids)
+    ]
+
+
+@event.listens_for(db.session.session_factory.class_, "after_commit")
+def _deliver_changes(session) -> None:
+    changes = session.info.pop("location_changes", None)
+    if not changes:
+        return
+    for callback in _subscribers:
+        try:
+            callback(changes)
+        except Exception as e:
+            # The transaction is already committed; a failing index must not fail the caller
+            logger.error("Error applying location changes in %s: %s", callback.__qualname__, str(e))
+    # Drops cached copies here and announces the changes to the caches and indexes of other workers
+    location_cache.invalidate_many(dict.fromkeys(location_id for _, location_id, *_ in changes))
+
+
+@event.listens_for(db.session.session_factory.class_, "after_rollback")
+def _discard_changes(session) -> None:
+    session.info.pop("location_changes", None)
@@ -0,0 +1,193 @@
+import csv
+import json
+import logging
+import os
+from typing import Iterable, Iterator
+
+from sqlalchemy import insert, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+
+from weather_app.models.location_model import Location, check_coordinate
+from weather_app.utils.db import db
+from weather_app.utils.location_events import track_inserted_locations
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Rows inserted per transaction during a bulk import
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+
+IMPORT_FORMATS = ("csv", "ndjson")
+CITY_MAX_LENGTH = Location.__table__.c.city.type.length
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[tuple[int, dict | None, str | None]]:
+    """
+    Parses CSV with a header row naming at least city, latitude and longitude.
+
+    Yields:
+        tuple: (row number, record or None, parse error or None). Row 1 is the header.
+    """
+    reader = csv.DictReader(lines)
+    missing = {"city", "latitude", "longitude"} - set(reader.fieldnames or ())
+    if missing:
+        yield 1, None, f"Missing CSV columns: {', '.join(sorted(missing))}"
+        return
+    for record in reader:
+        yield reader.line_num, record, None
+
+
+def parse_ndjson(lines: Iterable[str]) -> Iterator[tuple[int, dict | None, str | None]]:
+    """
+    Parses one JSON object per line; blank lines are skipped.
+
+    Yields:
+        tuple: (line number, record or None, parse error or None).
+    """
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "Invalid record: expected a JSON object."
+            continue
+        yield number, record, None
+
+
+def validate_record(record: dict) -> tuple[str, float, float]:
+    """
+    Validates an imported record with the same rules as ``Location``.
+
+    Returns:
+        tuple[str, float, float]: The city, latitude and longitude.
+
+    Raises:
+        ValueError: If a field is missing or invalid.
+    """
+    city = str(record.get("city") or "").strip()
+    if not city:
+        raise ValueError("City is required.")
+    if len(city) > CITY_MAX_LENGTH:
+        raise ValueError(f"Invalid city: longer than {CITY_MAX_LENGTH} characters.")
+    coordinates = []
+    for key in ("latitude", "longitude"):
+        value = record.get(key)
+        if value is None or value == "":
+            raise ValueError(f"{key.capitalize()} is required.")
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid {key}: {value!r}. Must be a number.")
+        coordinates.append(check_coordinate(key, value))
+    return city, coordinates[0], coordinates[1]
+
+
+def _insert_batch(batch: list[tuple[int, tuple]]) -> tuple[int, list[dict]]:
+    """
+    Inserts one batch of validated rows in a single transaction, skipping rows already stored.
+
+    Returns:
+        tuple[int, list[dict]]: The number inserted and report entries for skipped or failed rows.
+    """
+    keys = [key for _, key in batch]
+    try:
+        existing = set(
+            db.session.query(Location.city, Location.latitude, Location.longitude)
+            .filter(tuple_(Location.city, Location.latitude, Location.longitude).in_(keys))
+            .all()
+        )
+        report = [{"row": row, "status": "duplicate"} for row, key in batch if key in existing]
+        new = [{"city": city, "latitude": latitude, "longitude": longitude}
+               for city, latitude, longitude in keys if (city, latitude, longitude) not in existing]
+        if new:
+            inserted = db.session.execute(
+                insert(Location).returning(Location.id, Location.city, Location.latitude, Location.longitude,
+                                           sort_by_parameter_order=True),
+                new,
+            ).all()
+            track_inserted_locations(db.session(), inserted)
+        db.session.commit()
+        return len(new), report
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error("Database error while importing a batch of %d locations: %s", len(batch), str(e))
+        return 0, [{"row": row, "status": "error", "error": "Database error while inserting batch."}
+                   for row, _ in batch]
+
+
+def import_locations(lines: Iterable[str], import_format: str,
+                     batch_size: int = IMPORT_BATCH_SIZE) -> Iterator[dict]:
+    """
+    Imports locations from CSV or NDJSON lines in batched transactions.
+
+    Rows are validated like ``Location`` rows and deduplicated on (city,
+    latitude, longitude), both within the upload and against stored
+    locations. Input is consumed incrementally, so memory is bounded by the
+    batch size plus the keys seen so far.
+
+    Args:
+        lines (Iterable[str]): The uploaded text, one line at a time.
+        import_format (str): "csv" or "ndjson".
+        batch_size (int): Rows per transaction.
+
+    Yields:
+        dict: A report entry for every row that was not imported (``row``,
+            ``status`` "duplicate" or "error", and ``error``), as soon as it is
+            known, then a final ``{"summary": {...}}`` with the totals.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if import_format not in IMPORT_FORMATS:
+        raise ValueError(f"Invalid import format: {import_format}. Must be one of {', '.join(IMPORT_FORMATS)}.")
+    if batch_size <= 0:
+        raise ValueError(f"Invalid batch size: {batch_size}. Must be positive.")
+    return _import(lines, import_format, batch_size)
+
+
+def _import(lines: Iterable[str], import_format: str, batch_size: int) -> Iterator[dict]:
+    parse = parse_csv if import_format == "csv" else parse_ndjson
+    totals = {"rows": 0, "imported": 0, "duplicates": 0, "errors": 0}
+    seen = set()
+    batch = []
+
+    def flush():
+        inserted, report = _insert_batch(batch)
+        totals["imported"] += inserted
+        for entry in report:
+            totals["duplicates" if entry["status"] == "duplicate" else "errors"] += 1
+        batch.clear()
+        return report
+
+    for row, record, error in parse(lines):
+        totals["rows"] += 1
+        if error is None:
+            try:
+                key = validate_record(record)
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            totals["errors"] += 1
+            yield {"row": row, "status": "error", "error": error}
+            continue
+        if key in seen:
+            totals["duplicates"] += 1
+            yield {"row": row, "status": "duplicate"}
+            continue
+        seen.add(key)
+        batch.append((row, key))
+        if len(batch) >= batch_size:
+            yield from flush()
+    if batch:
+        yield from flush()
+
+    logger.info("Imported %d of %d locations (%d duplicates, %d errors)",
+                totals["imported"], totals["rows"], totals["duplicates"], totals["errors"])
+    yield {"summary": totals}
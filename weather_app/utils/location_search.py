@@ -0,0 +1,199 @@
+import bisect
+import logging
+import re
+import threading
+import unicodedata
+from typing import Iterable
+
+from flask import current_app
+
+from weather_app.models.location_model import Location
+from weather_app.utils.location_cache import location_cache
+from weather_app.utils.location_events import ADD, load_changes_since, on_location_changes
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Upper bound on results a single search may return
+MAX_SEARCH_RESULTS = 50
+
+_SEPARATORS = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text: str) -> str:
+    """
+    Folds text for matching: accents removed, case folded, punctuation and runs of spaces collapsed.
+
+    ``"Saint-Étienne"`` and ``"saint etienne"`` both become ``"saint etienne"``.
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _SEPARATORS.sub(" ", stripped.casefold()).strip()
+
+
+class CityIndex:
+    """
+    In-memory prefix index over city names for type-ahead search.
+
+    Two sorted arrays of (key, id) pairs are kept: one of whole normalized
+    names and one of the name from each later word onwards, so "new yo" and
+    "york" both find "New York". A search is a binary search plus a walk over
+    the matches it returns, so its cost does not depend on the table size.
+    Whole-name matches are ranked before word matches, each alphabetically.
+    """
+
+    def __init__(self):
+        self._names = []   # sorted (normalized name, id)
+        self._words = []   # sorted (normalized name from the second word on, id)
+        self._records = {}  # id -> (city, latitude, longitude)
+        self._lock = threading.RLock()
+        self.sequence = 0  # position in the location cache's invalidation log that the contents reflect
+
+    @staticmethod
+    def _keys(city: str) -> tuple[str, list[str]]:
+        name = normalize(city)
+        words = name.split(" ")
+        return name, [" ".join(words[n:]) for n in range(1, len(words))]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+    def build(self, rows: Iterable[tuple]) -> None:
+        """
+        Replaces the contents with (id, city, latitude, longitude) rows, sorting once.
+        """
+        names, words, records = [], [], {}
+        for location_id, city, latitude, longitude in rows:
+            name, suffixes = self._keys(city)
+            names.append((name, location_id))
+            words.extend((suffix, location_id) for suffix in suffixes)
+            records[location_id] = (city, latitude, longitude)
+        names.sort()
+        words.sort()
+        with self._lock:
+            self._names, self._words, self._records = names, words, records
+
+    def add(self, location_id: int, city: str, latitude: float, longitude: float) -> None:
+        """
+        Adds a location, replacing any previous entry for the same ID.
+        """
+        with self._lock:
+            self.remove(location_id)
+            name, suffixes = self._keys(city)
+            bisect.insort(self._names, (name, location_id))
+            for suffix in suffixes:
+                bisect.insort(self._words, (suffix, location_id))
+            self._records[location_id] = (city, latitude, longitude)
+
+    def remove(self, location_id: int) -> None:
+        """
+        Removes a location if it is indexed.
+        """
+        with self._lock:
+            record = self._records.pop(location_id, None)
+            if record is None:
+                return
+            name, suffixes = self._keys(record[0])
+            for entries, key in [(self._names, name)] + [(self._words, suffix) for suffix in suffixes]:
+                position = bisect.bisect_left(entries, (key, location_id))
+                if position < len(entries) and entries[position] == (key, location_id):
+                    del entries[position]
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """
+        Finds locations whose name, or a word within it, starts with the query.
+
+        Args:
+            query (str): The text typed so far; matched after ``normalize``.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list[dict]: id, city, latitude and longitude of each match, best first.
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        results, seen = [], set()
+        with self._lock:
+            for entries in (self._names, self._words):
+                position = bisect.bisect_left(entries, (prefix,))
+                while position < len(entries) and len(results) < limit:
+                    key, location_id = entries[position]
+                    if not key.startswith(prefix):
+                        break
+                    position += 1
+                    if location_id in seen:
+                        continue
+                    seen.add(location_id)
+                    city, latitude, longitude = self._records[location_id]
+                    results.append({"id": location_id, "city": city, "latitude": latitude, "longitude": longitude})
+        return results
+
+
+def _build(index: CityIndex) -> None:
+    index.sequence = location_cache.sequence  # read first, so changes made during the build are applied again
+    index.build(Location.iter_locations())
+    logger.info("Built city search index with %d locations", len(index))
+
+
+def get_city_index() -> CityIndex:
+    """
+    Returns the city search index for the current app, building it from the locations table on first use.
+
+    The index lives in ``app.extensions['city_index']``. Location changes
+    committed in this process are applied as they commit; changes committed
+    by other workers are re-read from the database here, as announced on the
+    location cache's invalidation channel.
+    """
+    index = current_app.extensions.get("city_index")
+    if index is not None:
+        sequence, changes = load_changes_since(index.sequence)
+        if changes is not None:
+            _apply(index, changes)
+            index.sequence = sequence
+            return index
+    # First use, or too far behind to catch up: build a new index and swap it in
+    index = CityIndex()
+    _build(index)
+    current_app.extensions["city_index"] = index
+    return index
+
+
+def search_locations(query: str, limit: int = 10) -> list[dict]:
+    """
+    Type-ahead search over saved location names.
+
+    Args:
+        query (str): The text typed so far.
+        limit (int): Maximum number of results, at most MAX_SEARCH_RESULTS.
+
+    Returns:
+        list[dict]: The matching locations, best first.
+
+    Raises:
+        ValueError: If the query is empty or the limit is invalid.
+    """
+    if not normalize(query or ""):
+        raise ValueError("A search query is required.")
+    if not 1 <= limit <= MAX_SEARCH_RESULTS:
+        raise ValueError(f"Invalid limit: {limit}. Must be between 1 and {MAX_SEARCH_RESULTS}.")
+    return get_city_index().search(query, limit)
+
+
+def _apply(index: CityIndex, changes: list[tuple]) -> None:
+    for action, location_id, city, latitude, longitude in changes:
+        if action == ADD:
+            index.add(location_id, city, latitude, longitude)
+        else:
+            index.remove(location_id)
+
+
+@on_location_changes
+def _apply_changes(changes: list[tuple]) -> None:
+    index = current_app.extensions.get("city_index")
+    if index is not None:  # otherwise built from the table on first use
+        _apply(index, changes)
@@ -0,0 +1,194 @@
+from collections import deque
+import logging
+import threading
+import time
+
+from weather_app.models.observation_model import AirQualityObservation, ForecastSnapshot
+from weather_app.utils.api_utils import add_upstream_listener, grid, remove_upstream_listener
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class ObservationStore:
+    """
+    Persists every forecast and air quality payload fetched from upstream.
+
+    Registered as an upstream listener, it only buffers payloads on the
+    fetching thread. A background thread periodically writes them with
+    batched inserts, keyed by the grid cell they were fetched for, so a
+    payload is stored once however many saved locations (if any) share its
+    cell, and without looking the locations up. Historical payloads are not
+    written here: every historical fetch is made for a location, and the
+    caller stores its rows under that location (see
+    ``Location.get_historical`` and the backfill runner). A batch that fails
+    to write is put back at the front of the buffer and retried up to
+    ``max_attempts`` times. The buffer is bounded; when it overflows the
+    oldest payloads are dropped.
+    """
+
+    def __init__(self, app, batch_size: int = 500, flush_interval: float = 2.0, max_pending: int = 10000,
+                 max_attempts: int = 3):
+        """
+        Args:
+            app (Flask): The application, used for database access.
+            batch_size (int): Maximum payloads written per flush.
+            flush_interval (float): Seconds between flushes.
+            max_pending (int): Maximum buffered payloads.
+            max_attempts (int): Flushes a payload may fail before it is dropped.
+        """
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._written = 0
+        self._dropped = 0
+        self._errors = 0
+
+    def record(self, kind: str, latitude: float, longitude: float, payload: dict) -> None:
+        """
+        Buffers a fetched payload for writing. Used as the upstream listener.
+        """
+        if kind not in ("forecast", "air_quality"):
+            return
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                self._dropped += 1
+            self._pending.append((kind, latitude, longitude, payload, int(time.time()), 0))
+
+    def _rows(self, batch: list) -> dict:
+        """
+        Resolves a batch of payloads to rows per model.
+        """
+        rows = {ForecastSnapshot: [], AirQualityObservation: []}
+        for kind, latitude, longitude, payload, ts, _ in batch:
+            cell_id = grid.cell(latitude, longitude).id
+            if kind == "forecast":
+                rows[ForecastSnapshot].append(ForecastSnapshot.row(cell_id, ts, payload))
+            else:
+                rows[AirQualityObservation].append(AirQualityObservation.row(cell_id, ts, payload))
+        return rows
+
+    def _requeue(self, batch: list) -> None:
+        """
+        Puts a failed batch back at the front of the buffer, dropping payloads
+        that have failed too often or no longer fit.
+        """
+        retry = [entry[:-1] + (entry[-1] + 1,) for entry in batch if entry[-1] + 1 < self.max_attempts]
+        exhausted = len(batch) - len(retry)
+        with self._lock:
+            overflow = max(0, len(self._pending) + len(retry) - self.max_pending)
+            # The batch is older than anything still buffered, so it is what overflows first
+            self._pending.extendleft(reversed(retry[overflow:]))
+            self._dropped += exhausted + overflow
+        if exhausted or overflow:
+            logger.error("Dropped %d fetched payloads: %d failed %d writes, %d no longer fit the buffer",
+                         exhausted + overflow, exhausted, self.max_attempts, overflow)
+
+    def flush(self) -> int:
+        """
+        Writes up to ``batch_size`` buffered payloads.
+
+        Returns:
+            int: The number of rows written.
+        """
+        with self._lock:
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+        if not batch:
+            return 0
+
+        written = 0
+        try:
+            with self.app.app_context():
+                for model, rows in self._rows(batch).items():
+                    model.bulk_insert(rows)
+                    written += len(rows)
+        except Exception as e:
+            logger.warning("Failed to store %d fetched payloads, will retry: %s", len(batch), str(e))
+            with self._lock:
+                self._errors += 1
+            self._requeue(batch)
+            return 0
+
+        with self._lock:
+            self._written += written
+        return written
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            while self.flush() and not self._stop.is_set():
+                pass
+
+    def start(self) -> None:
+        """
+        Registers the upstream listener and starts the writer thread.
+        """
+        add_upstream_listener(self.record)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="observation-store", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Unregisters the listener, stops the writer thread and writes what is still buffered.
+        """
+        remove_upstream_listener(self.record)
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        while self.flush():
+            pass
+
+    def get_stats(self) -> dict:
+        """
+        Returns buffer and write counters.
+
+        Returns:
+            dict: Pending payloads and counts of rows written, payloads dropped and failed flushes.
+        """
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "written": self._written,
+                "dropped": self._dropped,
+                "errors": self._errors,
+            }
+
+
+_store = None
+
+
+def start_observation_store(app) -> ObservationStore:
+    """
+    Creates and starts the observation store for an app, replacing any previous one.
+
+    Uses OBSERVATION_BATCH_SIZE and OBSERVATION_FLUSH_INTERVAL. The store is
+    kept in ``app.extensions['observation_store']``.
+
+    Args:
+        app (Flask): The application.
+
+    Returns:
+        ObservationStore: The running store.
+    """
+    global _store
+    if _store is not None:
+        _store.stop()
+    _store = ObservationStore(
+        app,
+        batch_size=app.config.get("OBSERVATION_BATCH_SIZE", 500),
+        flush_interval=app.config.get("OBSERVATION_FLUSH_INTERVAL", 2.0),
+    )
+    _store.start()
+    app.extensions["observation_store"] = _store
+    return _store
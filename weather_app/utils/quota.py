@@ -0,0 +1,327 @@
+from contextlib import contextmanager
+import contextvars
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable
+
+from weather_app.utils.logger import configure_logger
+from weather_app.utils.shared_cache import SQLiteSharedStore
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Request priorities; lower values are served first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_priority = contextvars.ContextVar("upstream_priority", default=INTERACTIVE)
+
+
+def current_priority() -> int:
+    """
+    Returns the upstream priority of the current context (INTERACTIVE unless overridden).
+    """
+    return _priority.get()
+
+
+@contextmanager
+def background_priority():
+    """
+    Marks upstream calls made inside the block as background traffic.
+
+    Background calls only get quota once no interactive call is waiting, and
+    are allowed to wait longer for it.
+    """
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class QuotaExceededError(Exception):
+    """
+    Raised when no upstream quota could be obtained before the caller's deadline.
+    """
+
+
+# Fixed quota windows: calendar minutes and UTC calendar days (Unix time has exactly 86400 seconds a day)
+MINUTE = 60
+DAY = 86400
+
+
+class LocalQuotaCounters:
+    """
+    Fixed-window call counters held in this process.
+
+    Only correct for a single process; ``SharedQuotaCounters`` count across workers.
+    Counters take a list of windows, each ``(key, limit, ends_at)``, and
+    count a call in every one of them or in none.
+    """
+
+    def __init__(self):
+        self._used = {}  # key -> (calls, ends_at)
+        self._lock = threading.Lock()
+
+    def take(self, windows: list[tuple[str, int, float]]) -> float | None:
+        """
+        Counts one call in every window if none is full.
+
+        Returns:
+            float | None: None if the call was counted, otherwise when the last full window ends.
+        """
+        with self._lock:
+            full = [ends_at for key, limit, ends_at in windows if self._used.get(key, (0,))[0] >= limit]
+            if full:
+                return max(full)
+            for key, _, ends_at in windows:
+                self._used[key] = (self._used.get(key, (0,))[0] + 1, ends_at)
+            keys = {key for key, _, _ in windows}
+            for key in [key for key in self._used if key not in keys]:
+                del self._used[key]  # windows that have ended
+            return None
+
+    def used(self, keys: list[str]) -> list[int]:
+        with self._lock:
+            return [self._used.get(key, (0,))[0] for key in keys]
+
+
+class SharedQuotaCounters:
+    """
+    Fixed-window call counters in the store shared by every worker, so the
+    plan's quota holds across processes and restarts.
+
+    Works on a ``RedisSharedStore`` (one key per window, taken with
+    WATCH/MULTI and expiring after the window) or a ``SQLiteSharedStore`` (one
+    row per window, taken in an immediate transaction). If the store cannot be
+    reached, calls are counted in this process instead and the error is logged.
+    """
+
+    def __init__(self, store, prefix: str = "weather_app:quota"):
+        """
+        Args:
+            store (RedisSharedStore | SQLiteSharedStore): The shared store.
+            prefix (str): Namespace of the Redis keys.
+        """
+        self.store = store
+        self.prefix = prefix
+        self._fallback = LocalQuotaCounters()
+        self._errors = 0
+        if isinstance(store, SQLiteSharedStore):
+            store.connection().execute("CREATE TABLE IF NOT EXISTS quota_windows "
+                                       "(key TEXT PRIMARY KEY, used INTEGER NOT NULL, ends_at REAL NOT NULL)")
+
+    def _name(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def take(self, windows: list[tuple[str, int, float]]) -> float | None:
+        try:
+            if isinstance(self.store, SQLiteSharedStore):
+                return self._take_sqlite(windows)
+            return self._take_redis(windows)
+        except Exception as e:
+            self._errors += 1
+            logger.error("Shared quota counters unavailable, counting in this process: %s", str(e))
+            return self._fallback.take(windows)
+
+    def _take_redis(self, windows: list[tuple[str, int, float]]) -> float | None:
+        from redis.exceptions import WatchError
+
+        names = [self._name(key) for key, _, _ in windows]
+        with self.store.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(*names)
+                    used = [int(value or 0) for value in pipe.mget(names)]
+                    full = [ends_at for (_, limit, ends_at), calls in zip(windows, used) if calls >= limit]
+                    if full:
+                        pipe.reset()
+                        return max(full)
+                    pipe.multi()
+                    for name, (_, _, ends_at) in zip(names, windows):
+                        pipe.incr(name)
+                        pipe.expireat(name, int(ends_at) + MINUTE)
+                    pipe.execute()
+                    return None
+                except WatchError:
+                    continue  # another worker counted a call in between; check again
+
+    def _take_sqlite(self, windows: list[tuple[str, int, float]]) -> float | None:
+        conn = self.store.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # windows ended before the current minute began
+            conn.execute("DELETE FROM quota_windows WHERE ends_at <= ?",
+                         (min(ends_at for _, _, ends_at in windows) - MINUTE,))
+            full = []
+            for key, limit, ends_at in windows:
+                row = conn.execute("SELECT used FROM quota_windows WHERE key = ?", (key,)).fetchone()
+                if row and row[0] >= limit:
+                    full.append(ends_at)
+            if not full:
+                conn.executemany(
+                    "INSERT INTO quota_windows (key, used, ends_at) VALUES (?, 1, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET used = used + 1",
+                    [(key, ends_at) for key, _, ends_at in windows],
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return max(full) if full else None
+
+    def used(self, keys: list[str]) -> list[int]:
+        try:
+            if isinstance(self.store, SQLiteSharedStore):
+                rows = dict(self.store.connection().execute(
+                    f"SELECT key, used FROM quota_windows WHERE key IN ({', '.join('?' * len(keys))})", keys
+                ).fetchall())
+                return [rows.get(key, 0) for key in keys]
+            return [int(value or 0) for value in self.store.client.mget([self._name(key) for key in keys])]
+        except Exception as e:
+            logger.error("Shared quota counters unavailable: %s", str(e))
+            return self._fallback.used(keys)
+
+
+class QuotaGovernor:
+    """
+    Governor for the upstream per-minute and per-day call quotas.
+
+    Calls are counted in fixed windows, calendar minutes and UTC calendar
+    days, so a day never sees more than ``per_day`` calls. The counters are
+    kept in this process unless shared ones are configured (see
+    ``SharedQuotaCounters``), in which case the limits hold for all workers
+    together and survive restarts. Callers in this process that cannot be
+    counted immediately queue by priority (interactive before background,
+    then first come first served), retry when the full window ends, and give
+    up with ``QuotaExceededError`` once their deadline passes, or straight
+    away if the window ends after it.
+    """
+
+    def __init__(self, per_minute: int = 60, per_day: int = 1000, interactive_deadline: float = 2.0,
+                 background_deadline: float = 30.0, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            per_minute (int): Upstream calls allowed per minute.
+            per_day (int): Upstream calls allowed per day.
+            interactive_deadline (float): Default seconds an interactive caller waits for quota.
+            background_deadline (float): Default seconds a background caller waits for quota.
+            clock (Callable): Returns the current Unix time; replaceable in tests.
+        """
+        self._condition = threading.Condition()
+        self._waiters = []  # heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._clock = clock
+        self.configure(per_minute, per_day, interactive_deadline, background_deadline)
+
+    def configure(self, per_minute: int, per_day: int, interactive_deadline: float = 2.0,
+                  background_deadline: float = 30.0, counters=None) -> None:
+        """
+        Replaces the quota limits, deadlines and counters.
+
+        Args:
+            counters (LocalQuotaCounters | SharedQuotaCounters | None): Where calls
+                are counted; None starts fresh counters in this process.
+
+        Raises:
+            ValueError: If a limit is not positive.
+        """
+        for limit in (per_minute, per_day):
+            if limit <= 0:
+                raise ValueError(f"Invalid quota: {limit}. Must be positive.")
+        with self._condition:
+            self.per_minute = per_minute
+            self.per_day = per_day
+            self.deadlines = {INTERACTIVE: interactive_deadline, BACKGROUND: background_deadline}
+            self.counters = counters if counters is not None else LocalQuotaCounters()
+            self._granted = {INTERACTIVE: 0, BACKGROUND: 0}
+            self._rejected = {INTERACTIVE: 0, BACKGROUND: 0}
+            self._condition.notify_all()
+        logger.info("Upstream quota set to %d/minute and %d/day, counted by %s",
+                    per_minute, per_day, type(self.counters).__name__)
+
+    def _windows(self, now: float) -> list[tuple[str, int, float]]:
+        minute, day = int(now // MINUTE), int(now // DAY)
+        return [(f"minute:{minute}", self.per_minute, (minute + 1) * MINUTE),
+                (f"day:{day}", self.per_day, (day + 1) * DAY)]
+
+    def acquire(self, priority: int | None = None, deadline: float | None = None) -> None:
+        """
+        Counts one upstream call against the quota, waiting behind higher-priority callers if necessary.
+
+        Args:
+            priority (int | None): INTERACTIVE or BACKGROUND; defaults to the current context's priority.
+            deadline (float | None): Maximum seconds to wait; defaults to the priority's configured deadline.
+
+        Raises:
+            QuotaExceededError: If the call cannot be counted before the deadline.
+        """
+        if priority is None:
+            priority = current_priority()
+        if deadline is None:
+            deadline = self.deadlines[priority]
+
+        with self._condition:
+            now = self._clock()
+            give_up_at = now + deadline
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    if self._waiters[0] == entry:
+                        retry_at = self.counters.take(self._windows(now))
+                        if retry_at is None:
+                            self._granted[priority] += 1
+                            return
+                        if retry_at > give_up_at:
+                            break
+                        wait = retry_at - now
+                    elif now >= give_up_at:
+                        break
+                    else:
+                        wait = give_up_at - now
+                    self._condition.wait(min(max(wait, 0.01), max(give_up_at - now, 0.01)))
+                    now = self._clock()
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+
+            self._rejected[priority] += 1
+
+        logger.warning("Upstream quota exhausted for %s call after waiting up to %.1fs",
+                       PRIORITY_NAMES[priority], deadline)
+        raise QuotaExceededError("Upstream call quota exhausted; try again later.")
+
+    def get_stats(self) -> dict:
+        """
+        Returns the remaining budget, queue depth and grant/rejection counters.
+
+        Returns:
+            dict: Quota limits, calls left in the current minute and day, where they
+                are counted, waiting callers and counters per priority.
+        """
+        with self._condition:
+            windows = self._windows(self._clock())
+            used_minute, used_day = self.counters.used([key for key, _, _ in windows])
+            queued = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _ in self._waiters:
+                queued[PRIORITY_NAMES[priority]] += 1
+            return {
+                "per_minute": self.per_minute,
+                "per_day": self.per_day,
+                "remaining_minute": max(0, self.per_minute - used_minute),
+                "remaining_day": max(0, self.per_day - used_day),
+                "counters": type(self.counters).__name__,
+                "queue_depth": len(self._waiters),
+                "queued": queued,
+                "granted": {PRIORITY_NAMES[p]: n for p, n in self._granted.items()},
+                "rejected": {PRIORITY_NAMES[p]: n for p, n in self._rejected.items()},
+            }
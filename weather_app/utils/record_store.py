@@ -0,0 +1,287 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Hashable
+
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from weather_app.utils.db import db
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Seconds a record lives in the shared store; bounds staleness if an invalidation is lost
+RECORD_STORE_TTL = int(os.getenv("RECORD_STORE_TTL", "3600"))
+
+
+class RecordStore:
+    """
+    Read-through cache of database records in a shared Redis-compatible store.
+
+    Records are JSON values under ``<prefix>:<kind>:<key>``, shared by every
+    worker pointing at the same store. Reads try the store and fall back on a
+    loader that queries the database. Changes made through the ORM are
+    tracked by mapper events (see ``register_write_through``) and, when the
+    session commits, delete the keys involved and bump a version kept next to
+    each (``<prefix>:version:<kind>:<key>``); rolled back changes touch
+    nothing. A miss reads the version along with the record, and its fill is
+    a WATCH/MULTI transaction that stores the loaded record only if the key
+    is still absent and the version unchanged. A loader that read the row
+    before a commit therefore never stores it after that commit's
+    invalidation; the record is loaded afresh on the next read.
+
+    Without a client the store is disabled and every read goes to the loader.
+    Errors talking to the store are logged and counted, never raised: reads
+    fall back on the database and invalidations fall back on the TTL.
+    """
+
+    def __init__(self, client=None, prefix: str = "weather_app", ttl: int = RECORD_STORE_TTL):
+        """
+        Args:
+            client (redis.Redis): A Redis-compatible client, or None to disable the store.
+            prefix (str): Namespace of the keys.
+            ttl (int): Seconds each record lives in the store.
+        """
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._discarded = 0
+        self._errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.client is not None
+
+    def key(self, kind: str, key: Hashable) -> str:
+        return f"{self.prefix}:{kind}:{key}"
+
+    def version_key(self, kind: str, key: Hashable) -> str:
+        return f"{self.prefix}:version:{kind}:{key}"
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def _failed(self, action: str, error: Exception) -> None:
+        self._count("_errors")
+        logger.error("Record store %s failed: %s", action, str(error))
+
+    def get(self, kind: str, key: Hashable, loader: Callable[[Hashable], Any]) -> Any:
+        """
+        Returns a stored record, loading it on a miss and storing it unless it changed or was stored meanwhile.
+
+        Args:
+            kind (str): The record type, e.g. "user".
+            key (Hashable): The record key within its type.
+            loader (Callable): Called with the key on a miss; returns a
+                JSON-serializable record. Its exceptions propagate and nothing is stored.
+
+        Returns:
+            Any: The record.
+        """
+        if not self.enabled:
+            return loader(key)
+        name, version = self.key(kind, key), self.version_key(kind, key)
+        try:
+            stored, seen = self.client.mget([name, version])
+        except Exception as e:
+            self._failed(f"read of {name}", e)
+            return loader(key)
+        if stored is not None:
+            self._count("_hits")
+            return json.loads(stored)
+        self._count("_misses")
+        record = loader(key)
+        self._fill([(name, version, seen, json.dumps(record))], name)
+        return record
+
+    def get_many(self, kind: str, keys: list, loader: Callable[[list], dict]) -> dict:
+        """
+        Returns many stored records with one round trip, loading the missing ones in one call.
+
+        Args:
+            kind (str): The record type.
+            keys (list): The record keys.
+            loader (Callable): Called with the missing keys; returns a dict of
+                the records it found, by key. Keys it does not return are left out.
+
+        Returns:
+            dict: The records found, by key.
+        """
+        if not keys:
+            return {}
+        if not self.enabled:
+            return loader(keys)
+        names = [self.key(kind, key) for key in keys]
+        try:
+            stored = self.client.mget(names + [self.version_key(kind, key) for key in keys])
+        except Exception as e:
+            self._failed(f"read of {len(names)} {kind} records", e)
+            return loader(keys)
+        versions = dict(zip(keys, stored[len(keys):]))
+        records = {key: json.loads(value) for key, value in zip(keys, stored) if value is not None}
+        missing = [key for key in keys if key not in records]
+        self._count("_hits", len(records))
+        self._count("_misses", len(missing))
+        if missing:
+            loaded = loader(missing)
+            records.update(loaded)
+            self._fill([(self.key(kind, key), self.version_key(kind, key), versions[key], json.dumps(record))
+                        for key, record in loaded.items()], f"{len(loaded)} {kind} records")
+        return records
+
+    def _fill(self, fills: list[tuple[str, str, bytes | None, str]], description: str) -> None:
+        """
+        Stores loaded records, each given as (key, version key, version seen
+        before loading, value), that are still absent and whose version is
+        unchanged. Watching the keys makes the check and the writes atomic: if
+        any of them changes in between, nothing is stored.
+        """
+        if not fills:
+            return
+        from redis.exceptions import WatchError
+
+        watched = [name for name, version, _, _ in fills] + [version for _, version, _, _ in fills]
+        try:
+            with self.client.pipeline() as pipe:
+                pipe.watch(*watched)
+                current = pipe.mget(watched)
+                versions = current[len(fills):]
+                fresh = [(name, value) for (name, _, seen, value), stored, version in zip(fills, current, versions)
+                         if stored is None and version == seen]
+                if fresh:
+                    pipe.multi()
+                    for name, value in fresh:
+                        pipe.set(name, value, ex=self.ttl)
+                    pipe.execute()
+            self._count("_discarded", len(fills) - len(fresh))
+        except WatchError:
+            # Changed while filling: the records may be stale, leave them to the next read
+            self._count("_discarded", len(fills))
+        except Exception as e:
+            self._failed(f"fill of {description}", e)
+
+    def invalidate(self, keys: list[tuple[str, Hashable]]) -> None:
+        """
+        Deletes records, given as (kind, key) pairs, and bumps their versions
+        so fills loaded before the change are discarded, in one transaction.
+        """
+        if not self.enabled or not keys:
+            return
+        keys = list(dict.fromkeys(keys))
+        names = [self.key(kind, key) for kind, key in keys]
+        try:
+            with self.client.pipeline() as pipe:
+                for kind, key in keys:
+                    version = self.version_key(kind, key)
+                    pipe.incr(version)
+                    pipe.expire(version, self.ttl)  # outlives any fill in progress
+                pipe.delete(*names)
+                pipe.execute()
+            self._count("_invalidations", len(names))
+        except Exception as e:
+            # Readers may be served the old records until they expire
+            self._failed(f"invalidation of {len(names)} records", e)
+
+    def clear(self) -> None:
+        """
+        Deletes every key under the prefix.
+        """
+        if not self.enabled:
+            return
+        try:
+            names = list(self.client.scan_iter(match=f"{self.prefix}:*", count=1000))
+            if names:
+                self.client.delete(*names)
+        except Exception as e:
+            self._failed("clear", e)
+
+    def configure(self, client, prefix: str, ttl: int) -> None:
+        """
+        Replaces the client and settings; None disables the store.
+        """
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else None,
+                "invalidations": self._invalidations,
+                "discarded_fills": self._discarded,
+                "errors": self._errors,
+            }
+
+
+record_store = RecordStore()
+
+
+def configure_record_store(config) -> None:
+    """
+    Applies the record store settings from a Flask config.
+
+    Reads RECORD_STORE_REDIS_URL (unset disables the store),
+    RECORD_STORE_PREFIX and RECORD_STORE_TTL.
+
+    Args:
+        config (Mapping): The app config.
+    """
+    url = config.get("RECORD_STORE_REDIS_URL")
+    client = None
+    if url:
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("A Redis record store requires the 'redis' package.") from e
+        client = redis.Redis.from_url(url)
+    record_store.configure(client, config.get("RECORD_STORE_PREFIX", "weather_app"),
+                           config.get("RECORD_STORE_TTL", RECORD_STORE_TTL))
+
+
+def track_invalidation(session, kind: str, key: Hashable) -> None:
+    """
+    Queues the deletion of a stored record, applied when the session commits.
+
+    Needed for changes made without the ORM unit of work (bulk inserts and
+    deletes), which fire no mapper events.
+    """
+    session.info.setdefault("record_invalidations", []).append((kind, key))
+
+
+def register_write_through(model, kind: str, key: Callable[[Any], Hashable]) -> None:
+    """
+    Keeps stored records of a model's rows in step with the database: each
+    inserted, updated or deleted row deletes the record under ``key(row)``
+    when the session commits, to be loaded afresh on the next read.
+    """
+    def changed(mapper, connection, target):
+        track_invalidation(object_session(target), kind, key(target))
+
+    for identifier in ("after_insert", "after_update", "after_delete"):
+        event.listen(model, identifier, changed)
+
+
+@event.listens_for(db.session.session_factory.class_, "after_commit")
+def _write_through(session) -> None:
+    keys = session.info.pop("record_invalidations", None)
+    if keys:
+        record_store.invalidate(keys)
+
+
+@event.listens_for(db.session.session_factory.class_, "after_rollback")
+def _discard_writes(session) -> None:
+    session.info.pop("record_invalidations", None)
@@ -0,0 +1,270 @@
+import logging
+import os
+import queue
+import random
+import socket
+import threading
+import time
+import uuid
+
+from weather_app.models.favorites_model import FavoritesModel
+from weather_app.models.lease_model import ServiceLease
+from weather_app.models.location_model import Location
+from weather_app.utils.api_utils import (
+    AIR_QUALITY_CACHE_TTL, FORECAST_CACHE_TTL, get_grid_cell, refresh_air_quality_data, refresh_forecast
+)
+from weather_app.utils.logger import configure_logger
+from weather_app.utils.quota import background_priority
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Data types kept warm for favorited locations: name -> (refresh function, cache TTL)
+REFRESH_JOBS = {
+    "forecast": (refresh_forecast, FORECAST_CACHE_TTL),
+    "air_quality": (refresh_air_quality_data, AIR_QUALITY_CACHE_TTL),
+}
+
+# Name of the lease a scheduler must hold to plan refreshes
+PLANNER_LEASE = "refresh-planner"
+
+
+class RefreshScheduler:
+    """
+    Keeps forecasts and air quality for favorited locations warm in the cache.
+
+    A planner thread periodically reads the favorited locations and queues a
+    refresh for each data type shortly before its cache entry would expire.
+    Fetches are cached per grid cell, so locations sharing a cell are
+    refreshed once. Queued refreshes are ordered by popularity (number of
+    favorites of the locations in the cell) and executed by a fixed number
+    of worker threads. Refresh times are jittered so that entries cached
+    together do not all expire together. Refreshes run at background quota
+    priority, behind interactive requests.
+
+    Every worker process may run a scheduler, but only the one holding the
+    planner lease (see ``ServiceLease``) plans; the others stand by and take
+    over once its lease expires. Refreshes therefore warm the other workers
+    only through the shared cache tier (WEATHER_CACHE_SHARED_URL).
+    """
+
+    def __init__(self, app, workers: int = 4, poll_interval: float = 60.0, refresh_ahead: float = 0.8,
+                 jitter: float = 0.1, lease_seconds: int | None = None):
+        """
+        Args:
+            app (Flask): The application, used for database access.
+            workers (int): Number of worker threads performing refreshes.
+            poll_interval (float): Seconds between planning passes.
+            refresh_ahead (float): Fraction of the TTL after which an entry is refreshed.
+            jitter (float): Maximum fraction by which each refresh is randomly brought forward.
+            lease_seconds (int | None): How long the planner lease stays held
+                without a planning pass; defaults to three poll intervals.
+        """
+        if workers <= 0:
+            raise ValueError(f"Invalid worker count: {workers}. Must be positive.")
+        self.app = app
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.refresh_ahead = refresh_ahead
+        self.jitter = jitter
+        self.lease_seconds = lease_seconds or int(3 * poll_interval) + 1
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._leader = False
+
+        self._queue = queue.PriorityQueue()
+        self._lock = threading.Lock()
+        self._queued = set()    # (kind, cell_id) waiting or running
+        self._next_due = {}     # (kind, cell_id) -> monotonic time of next refresh
+        self._sequence = 0
+        self._stop = threading.Event()
+        self._threads = []
+        self._refreshed = 0
+        self._failed = 0
+
+    def _next_delay(self, ttl: float) -> float:
+        """
+        Returns the jittered delay until the next refresh of an entry with the given TTL.
+        """
+        return ttl * self.refresh_ahead * (1 - random.uniform(0, self.jitter))
+
+    def plan(self) -> int:
+        """
+        Queues refreshes for every grid cell with favorited locations whose entries are due.
+
+        Returns:
+            int: The number of refreshes queued.
+        """
+        with self.app.app_context():
+            popularity = FavoritesModel.get_location_popularity()
+            location_ids = [location_id for location_id, _ in popularity]
+            coordinates = {
+                location.id: (location.latitude, location.longitude)
+                for location in Location.query.filter(Location.id.in_(location_ids)).all()
+            } if location_ids else {}
+
+        # cell_id -> [favorites in the cell, latitude, longitude of its most popular location]
+        cells = {}
+        for location_id, users in popularity:
+            if location_id not in coordinates:
+                continue
+            latitude, longitude = coordinates[location_id]
+            cell = cells.setdefault(get_grid_cell(latitude, longitude).id, [0, latitude, longitude])
+            cell[0] += users
+
+        now = time.monotonic()
+        scheduled = 0
+        with self._lock:
+            active = {(kind, cell_id) for cell_id in cells for kind in REFRESH_JOBS}
+            for job_key in list(self._next_due):
+                if job_key not in active:
+                    del self._next_due[job_key]
+
+            for cell_id, (users, latitude, longitude) in cells.items():
+                for kind in REFRESH_JOBS:
+                    job_key = (kind, cell_id)
+                    if job_key in self._queued or self._next_due.get(job_key, 0) > now:
+                        continue
+                    self._queued.add(job_key)
+                    self._sequence += 1
+                    self._queue.put((-users, self._sequence, kind, cell_id, latitude, longitude))
+                    scheduled += 1
+
+        if scheduled:
+            logger.info("Queued %d background refreshes for %d favorited locations in %d grid cells",
+                        scheduled, len(coordinates), len(cells))
+        return scheduled
+
+    def plan_if_leader(self) -> int:
+        """
+        Takes or renews the planner lease and, if held, queues due refreshes.
+
+        Returns:
+            int: The number of refreshes queued; 0 if another process holds the lease.
+        """
+        with self.app.app_context():
+            leader = ServiceLease.claim(PLANNER_LEASE, self.owner, self.lease_seconds)
+        if leader != self._leader:
+            logger.info("Refresh planner lease %s by %s", "taken" if leader else "lost", self.owner)
+        self._leader = leader
+        return self.plan() if leader else 0
+
+    def _run_job(self, kind: str, cell_id: str, latitude: float, longitude: float) -> None:
+        """
+        Refreshes one data type for one grid cell and schedules its next refresh.
+        """
+        refresh, ttl = REFRESH_JOBS[kind]
+        try:
+            with background_priority():
+                refresh(latitude, longitude)
+            delay = self._next_delay(ttl)
+            with self._lock:
+                self._refreshed += 1
+        except Exception as e:
+            logger.warning("Background %s refresh failed for grid cell %s: %s", kind, cell_id, str(e))
+            # Retry on a later planning pass rather than waiting a whole TTL
+            delay = self.poll_interval
+            with self._lock:
+                self._failed += 1
+        finally:
+            with self._lock:
+                self._queued.discard((kind, cell_id))
+                self._next_due[(kind, cell_id)] = time.monotonic() + delay
+
+    def _worker(self) -> None:
+        while not self._stop.is_set():
+            try:
+                _, _, kind, cell_id, latitude, longitude = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._run_job(kind, cell_id, latitude, longitude)
+            finally:
+                self._queue.task_done()
+
+    def _planner(self) -> None:
+        # Stagger the first pass so that several workers starting together do not plan in lockstep
+        if self._stop.wait(random.uniform(0, self.poll_interval * self.jitter)):
+            return
+        while not self._stop.is_set():
+            try:
+                self.plan_if_leader()
+            except Exception as e:
+                logger.error("Background refresh planning failed: %s", str(e))
+            self._stop.wait(self.poll_interval * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def start(self) -> None:
+        """
+        Starts the planner and worker threads.
+        """
+        if self._threads:
+            return
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._planner, name="refresh-planner", daemon=True)]
+        self._threads += [
+            threading.Thread(target=self._worker, name=f"refresh-worker-{n}", daemon=True)
+            for n in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("Background refresh scheduler started with %d workers", self.workers)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stops all threads, waiting up to ``timeout`` seconds for each.
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self._leader:
+            try:
+                with self.app.app_context():
+                    ServiceLease.release(PLANNER_LEASE, self.owner)
+            except Exception as e:
+                logger.error("Could not release the refresh planner lease: %s", str(e))
+            self._leader = False
+        logger.info("Background refresh scheduler stopped")
+
+    def get_stats(self) -> dict:
+        """
+        Returns scheduler counters.
+
+        Returns:
+            dict: Queue depth, tracked entries and refresh success/failure counts.
+        """
+        with self._lock:
+            return {
+                "running": bool(self._threads),
+                "leader": self._leader,
+                "workers": self.workers,
+                "queued": len(self._queued),
+                "tracked": len(self._next_due),
+                "refreshed": self._refreshed,
+                "failed": self._failed,
+            }
+
+
+def start_refresh_scheduler(app) -> RefreshScheduler:
+    """
+    Creates and starts a refresh scheduler configured from the app config.
+
+    Uses REFRESH_WORKERS and REFRESH_POLL_INTERVAL. The scheduler is stored in
+    ``app.extensions['refresh_scheduler']``. It plans only while it holds the
+    planner lease, so starting one in every worker process is safe.
+
+    Args:
+        app (Flask): The application.
+
+    Returns:
+        RefreshScheduler: The running scheduler.
+    """
+    scheduler = RefreshScheduler(
+        app,
+        workers=app.config.get("REFRESH_WORKERS", 4),
+        poll_interval=app.config.get("REFRESH_POLL_INTERVAL", 60.0),
+    )
+    scheduler.start()
+    app.extensions["refresh_scheduler"] = scheduler
+    return scheduler
@@ -0,0 +1,150 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Iterator
+
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Sets between sweeps of expired rows from a SQLite store
+SQLITE_PURGE_INTERVAL = 1000
+# Bytes of a SQLite store each worker maps into memory for reads
+SQLITE_MMAP_SIZE = 64 * 1024 * 1024
+
+
+class RedisSharedStore:
+    """
+    Shared cache tier in a Redis-compatible server, for ``TieredCache``.
+
+    Stores only need ``get``, ``set``, ``delete``, ``keys`` and ``clear``
+    over string keys and values; entries expire on their own after the
+    retention given to ``set``.
+    """
+
+    def __init__(self, client, prefix: str = "weather_app:cache"):
+        """
+        Args:
+            client (redis.Redis): A Redis-compatible client.
+            prefix (str): Namespace of the keys.
+        """
+        self.client = client
+        self.prefix = prefix
+
+    def _name(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get(self, key: str) -> str | None:
+        value = self.client.get(self._name(key))
+        return value.decode() if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str, retain: float) -> None:
+        self.client.set(self._name(key), value, px=max(1, int(retain * 1000)))
+
+    def delete(self, key: str) -> int:
+        return self.client.delete(self._name(key))
+
+    def keys(self, prefix: str) -> Iterator[str]:
+        start = len(self.prefix) + 1
+        for name in self.client.scan_iter(match=f"{self.prefix}:{prefix}*", count=1000):
+            yield (name.decode() if isinstance(name, bytes) else name)[start:]
+
+    def clear(self, prefix: str) -> None:
+        names = list(self.client.scan_iter(match=f"{self.prefix}:{prefix}*", count=1000))
+        if names:
+            self.client.delete(*names)
+
+
+class SQLiteSharedStore:
+    """
+    Shared cache tier in a SQLite file on local disk, for ``TieredCache``.
+
+    For workers on one host without a Redis server. The file uses WAL so
+    readers never block each other or the writer, and is memory-mapped so
+    hot reads are served from the page cache. Each thread opens its own
+    connection.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): The database file; created if missing.
+        """
+        self.path = path
+        self._local = threading.local()
+        self._sets = 0
+        self._lock = threading.Lock()
+        with self.connection() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_entries "
+                         "(key TEXT PRIMARY KEY, value TEXT NOT NULL, retain_until REAL NOT NULL)")
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> str | None:
+        row = self.connection().execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND retain_until > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str, retain: float) -> None:
+        conn = self.connection()
+        now = time.time()
+        conn.execute("INSERT OR REPLACE INTO cache_entries (key, value, retain_until) VALUES (?, ?, ?)",
+                     (key, value, now + retain))
+        with self._lock:
+            self._sets += 1
+            purge = self._sets % SQLITE_PURGE_INTERVAL == 0
+        if purge:
+            removed = conn.execute("DELETE FROM cache_entries WHERE retain_until <= ?", (now,)).rowcount
+            logger.debug("Purged %d expired entries from shared cache %s", removed, self.path)
+
+    def delete(self, key: str) -> int:
+        return self.connection().execute("DELETE FROM cache_entries WHERE key = ?", (key,)).rowcount
+
+    def keys(self, prefix: str) -> list[str]:
+        rows = self.connection().execute(
+            "SELECT key FROM cache_entries WHERE substr(key, 1, ?) = ? AND retain_until > ?",
+            (len(prefix), prefix, time.time()),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def clear(self, prefix: str) -> None:
+        self.connection().execute("DELETE FROM cache_entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+
+def open_shared_store(url: str):
+    """
+    Opens a shared cache tier from a URL.
+
+    Args:
+        url (str): ``redis://``, ``rediss://`` or ``unix://`` for a Redis
+            server (requires the optional ``redis`` package), or
+            ``sqlite:///path/to/file`` for a SQLite file.
+
+    Returns:
+        RedisSharedStore | SQLiteSharedStore: The store.
+
+    Raises:
+        ValueError: If the URL scheme is not supported.
+    """
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("A Redis shared cache requires the 'redis' package.") from e
+        return RedisSharedStore(redis.Redis.from_url(url))
+    if url.startswith("sqlite:///"):
+        return SQLiteSharedStore(url[len("sqlite:///"):])
+    raise ValueError(f"Invalid shared cache URL: {url}. Must start with redis://, rediss://, unix:// or sqlite:///.")
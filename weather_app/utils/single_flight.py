@@ -0,0 +1,120 @@
+import logging
+import threading
+from typing import Any, Callable, Hashable
+
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class _Call:
+    """
+    A single in-flight call that other callers can wait on.
+    """
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single execution.
+
+    The first caller for a key (the leader) runs the function; every caller that
+    arrives while it is running blocks until it finishes and receives the same
+    result, or has the same exception raised.
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name (str): Name used in logs and statistics.
+        """
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._executions = 0
+        self._coalesced = 0
+        self._errors = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Runs ``fn`` unless a call for ``key`` is already in flight, in which case
+        waits for and shares that call's outcome.
+
+        Args:
+            key (Hashable): Identifies equivalent calls.
+            fn (Callable): Zero-argument function performing the work.
+
+        Returns:
+            Any: The result of the (possibly shared) call.
+
+        Raises:
+            Exception: Whatever the shared call raised.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._executions += 1
+                leader = True
+
+        if not leader:
+            logger.debug("Coalescing call for %s on %s", key, self.name)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self, key: Hashable) -> bool:
+        """
+        Checks whether a call for ``key`` is currently running.
+
+        Args:
+            key (Hashable): The call key.
+
+        Returns:
+            bool: True if a call is in flight.
+        """
+        with self._lock:
+            return key in self._calls
+
+    def get_stats(self) -> dict:
+        """
+        Returns a snapshot of the coalescing counters.
+
+        Returns:
+            dict: Number of executions, coalesced calls, errors and calls currently in flight.
+        """
+        with self._lock:
+            return {
+                "name": self.name,
+                "executions": self._executions,
+                "coalesced": self._coalesced,
+                "errors": self._errors,
+                "in_flight": len(self._calls),
+            }
@@ -0,0 +1,234 @@
+from collections import defaultdict
+from dataclasses import asdict
+import heapq
+import logging
+import math
+import threading
+
+from flask import current_app
+
+from weather_app.models.location_model import Location
+from weather_app.utils.grid import EARTH_RADIUS_KM, distance_km
+from weather_app.utils.location_cache import location_cache
+from weather_app.utils.location_events import ADD, load_changes_since, on_location_changes
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Upper bound on results a single nearby lookup may return
+MAX_NEARBY_RESULTS = 100
+
+
+class SpatialIndex:
+    """
+    In-memory nearest-neighbour index over points on the sphere.
+
+    Points are bucketed into a latitude/longitude grid of ``cell_degrees``
+    cells. A query scans rings of cells outward from the query point and stops
+    as soon as no unscanned cell can hold a point closer than the current k-th
+    result (or the search radius), so its cost depends on local density rather
+    than on the total number of points. Distances are haversine kilometres.
+    """
+
+    def __init__(self, cell_degrees: float = 1.0):
+        cols = 360 / cell_degrees if cell_degrees > 0 else 0
+        if not 0 < cell_degrees <= 90 or abs(cols - round(cols)) > 1e-9:
+            raise ValueError(f"Invalid cell size: {cell_degrees}. Must divide 360 and be at most 90 degrees.")
+        self.cell_degrees = cell_degrees
+        self._rows = math.ceil(180 / cell_degrees)
+        self._cols = round(cols)
+        self._cells = defaultdict(dict)  # (row, col) -> {id: (latitude, longitude)}
+        self._points = {}                # id -> (row, col)
+        self._lock = threading.RLock()
+        self.sequence = 0                # position in the location cache's invalidation log that the contents reflect
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        row = min(int((latitude + 90) // self.cell_degrees), self._rows - 1)
+        col = int((longitude + 180) // self.cell_degrees) % self._cols
+        return row, col
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._points)
+
+    def add(self, point_id: int, latitude: float, longitude: float) -> None:
+        """
+        Adds a point, replacing any previous position for the same ID.
+        """
+        with self._lock:
+            self.remove(point_id)
+            cell = self._cell(latitude, longitude)
+            self._cells[cell][point_id] = (latitude, longitude)
+            self._points[point_id] = cell
+
+    def remove(self, point_id: int) -> None:
+        """
+        Removes a point if it is indexed.
+        """
+        with self._lock:
+            cell = self._points.pop(point_id, None)
+            if cell is not None:
+                points = self._cells[cell]
+                points.pop(point_id, None)
+                if not points:
+                    del self._cells[cell]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cells.clear()
+            self._points.clear()
+
+    def _ring(self, row: int, col: int, r: int):
+        """
+        Yields the cells at Chebyshev distance exactly ``r`` from (row, col), wrapping longitude.
+        """
+        if 2 * r + 1 >= self._cols:
+            columns = range(self._cols)
+        else:
+            columns = [(col + n) % self._cols for n in range(-r, r + 1)]
+        # Columns first reached at this distance; none once earlier rings wrapped all the way around
+        sides = set() if 2 * r - 1 >= self._cols else {(col - r) % self._cols, (col + r) % self._cols}
+        for ring_row in range(max(row - r, 0), min(row + r, self._rows - 1) + 1):
+            if abs(ring_row - row) == r:
+                yield from ((ring_row, c) for c in columns)
+            else:
+                yield from ((ring_row, c) for c in sorted(sides))
+
+    def _unscanned_bound(self, latitude: float, r: int) -> float:
+        """
+        Returns a lower bound in km on the distance to any point outside rings 0..r.
+        """
+        reach = math.radians(r * self.cell_degrees)
+        by_latitude = reach
+        by_longitude = math.asin(min(1.0, math.cos(math.radians(latitude)) * math.sin(min(reach, math.pi / 2))))
+        return EARTH_RADIUS_KM * min(by_latitude, by_longitude)
+
+    def nearest(self, latitude: float, longitude: float, k: int = 10,
+                radius_km: float | None = None) -> list[tuple[int, float]]:
+        """
+        Finds the k points nearest to a position.
+
+        Args:
+            latitude (float): Latitude of the query point.
+            longitude (float): Longitude of the query point.
+            k (int): Maximum number of results.
+            radius_km (float | None): Only return points within this distance.
+
+        Returns:
+            list[tuple[int, float]]: (id, distance in km) pairs, nearest first.
+        """
+        if k < 1:
+            raise ValueError(f"Invalid k: {k}. Must be at least 1.")
+        row, col = self._cell(latitude, longitude)
+        best = []  # max-heap of (-distance, id), at most k entries
+        seen = 0
+        max_ring = max(self._rows, self._cols // 2 + 1)
+        with self._lock:
+            for r in range(max_ring + 1):
+                for cell in self._ring(row, col, r):
+                    points = self._cells.get(cell)
+                    if not points:
+                        continue
+                    seen += len(points)
+                    for point_id, (lat, lon) in points.items():
+                        distance = distance_km(latitude, longitude, lat, lon)
+                        if radius_km is not None and distance > radius_km:
+                            continue
+                        if len(best) < k:
+                            heapq.heappush(best, (-distance, point_id))
+                        elif distance < -best[0][0]:
+                            heapq.heapreplace(best, (-distance, point_id))
+
+                if seen == len(self._points):
+                    break
+                bound = self._unscanned_bound(latitude, r)
+                if radius_km is not None and bound > radius_km:
+                    break
+                if len(best) == k and bound >= -best[0][0]:
+                    break
+        return sorted(((point_id, -negative) for negative, point_id in best), key=lambda item: (item[1], item[0]))
+
+
+def _build(index: SpatialIndex) -> None:
+    index.sequence = location_cache.sequence  # read first, so changes made during the build are applied again
+    for location in Location.iter_locations():
+        index.add(location.id, location.latitude, location.longitude)
+    logger.info("Built location index with %d locations", len(index))
+
+
+def get_location_index() -> SpatialIndex:
+    """
+    Returns the spatial index of saved locations for the current app, building it on first use.
+
+    The index lives in ``app.extensions['location_index']``. Location changes
+    committed in this process are applied as they commit; changes committed
+    by other workers are re-read from the database here, as announced on the
+    location cache's invalidation channel.
+    """
+    index = current_app.extensions.get("location_index")
+    if index is not None:
+        sequence, changes = load_changes_since(index.sequence)
+        if changes is not None:
+            _apply(index, changes)
+            index.sequence = sequence
+            return index
+    # First use, or too far behind to catch up: build a new index and swap it in
+    index = SpatialIndex(current_app.config.get("LOCATION_INDEX_CELL_DEGREES", 1.0))
+    _build(index)
+    current_app.extensions["location_index"] = index
+    return index
+
+
+def find_nearby_locations(latitude: float, longitude: float, k: int = 10,
+                          radius_km: float | None = None) -> list[dict]:
+    """
+    Finds the saved locations nearest to a position.
+
+    Args:
+        latitude (float): Latitude of the query point.
+        longitude (float): Longitude of the query point.
+        k (int): Maximum number of locations, at most MAX_NEARBY_RESULTS.
+        radius_km (float | None): Only return locations within this distance.
+
+    Returns:
+        list[dict]: The locations, nearest first, each with its ``distance_km``.
+
+    Raises:
+        ValueError: If the position, k or radius is invalid.
+    """
+    if not -90 <= latitude <= 90:
+        raise ValueError(f"Invalid latitude: {latitude}. Must be between -90 and 90.")
+    if not -180 <= longitude <= 180:
+        raise ValueError(f"Invalid longitude: {longitude}. Must be between -180 and 180.")
+    if not 1 <= k <= MAX_NEARBY_RESULTS:
+        raise ValueError(f"Invalid k: {k}. Must be between 1 and {MAX_NEARBY_RESULTS}.")
+    if radius_km is not None and radius_km < 0:
+        raise ValueError(f"Invalid radius: {radius_km}. Must not be negative.")
+
+    nearest = get_location_index().nearest(latitude, longitude, k, radius_km)
+    if not nearest:
+        return []
+    locations = {location.id: location for location in Location.query.filter(Location.id.in_([i for i, _ in nearest]))}
+    return [
+        {**asdict(locations[location_id]), "distance_km": round(distance, 3)}
+        for location_id, distance in nearest
+        if location_id in locations
+    ]
+
+
+def _apply(index: SpatialIndex, changes: list[tuple]) -> None:
+    for action, location_id, _, latitude, longitude in changes:
+        if action == ADD:
+            index.add(location_id, latitude, longitude)
+        else:
+            index.remove(location_id)
+
+
+@on_location_changes
+def _apply_changes(changes: list[tuple]) -> None:
+    index = current_app.extensions.get("location_index")
+    if index is not None:  # otherwise built from the table on first use
+        _apply(index, changes)
@@ -0,0 +1,237 @@
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Status codes that are worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+def backoff_delay(attempt: int, base: float, maximum: float, retry_after: str | None = None) -> float:
+    """
+    Computes the delay before the next attempt using "full jitter" exponential backoff.
+
+    Args:
+        attempt (int): The zero-based attempt that just failed.
+        base (float): Base delay in seconds.
+        maximum (float): Upper bound for the delay in seconds.
+        retry_after (str | None): Value of a Retry-After header, if the server sent one.
+
+    Returns:
+        float: Seconds to sleep.
+    """
+    if retry_after:
+        try:
+            return min(float(retry_after), maximum)
+        except ValueError:
+            pass
+    ceiling = min(maximum, base * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+class CallTimings:
+    """
+    Thread-safe per-endpoint call counters and timings.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, endpoint: str, elapsed: float, ok: bool, retries: int) -> None:
+        """
+        Records the timing of a completed call for an endpoint.
+
+        Args:
+            endpoint (str): The endpoint name.
+            elapsed (float): Wall time of the call including retries, in seconds.
+            ok (bool): Whether the call succeeded.
+            retries (int): Number of retries performed.
+        """
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {
+                "calls": 0,
+                "errors": 0,
+                "retries": 0,
+                "total_time": 0.0,
+                "max_time": 0.0,
+                "last_time": 0.0,
+            })
+            stats["calls"] += 1
+            stats["retries"] += retries
+            stats["total_time"] += elapsed
+            stats["max_time"] = max(stats["max_time"], elapsed)
+            stats["last_time"] = elapsed
+            if not ok:
+                stats["errors"] += 1
+
+    def snapshot(self) -> dict:
+        """
+        Returns a copy of the statistics with average call times added.
+
+        Returns:
+            dict: Mapping of endpoint name to call counts and timings (seconds).
+        """
+        with self._lock:
+            snapshot = {}
+            for endpoint, stats in self._stats.items():
+                entry = dict(stats)
+                entry["avg_time"] = stats["total_time"] / stats["calls"] if stats["calls"] else 0.0
+                snapshot[endpoint] = entry
+            return snapshot
+
+
+class UpstreamClient:
+    """
+    Thread-safe HTTP client for the OpenWeather API.
+
+    Owns a single pooled, keep-alive ``requests.Session`` so that repeated calls
+    reuse TCP connections, and applies connect/read timeouts and a bounded,
+    jittered retry policy to every request. Per-endpoint call timings are
+    recorded and exposed through ``get_stats``.
+    """
+
+    def __init__(self, pool_size: int = 20, connect_timeout: float = 3.05, read_timeout: float = 10.0,
+                 max_retries: int = 2, backoff_base: float = 0.25, backoff_max: float = 4.0):
+        """
+        Args:
+            pool_size (int): Maximum number of keep-alive connections per host.
+            connect_timeout (float): Seconds to wait for a TCP connection.
+            read_timeout (float): Seconds to wait for the response.
+            max_retries (int): Number of retries after the first attempt on 429/5xx or connection errors.
+            backoff_base (float): Base delay in seconds for exponential backoff.
+            backoff_max (float): Upper bound for a single backoff delay in seconds.
+        """
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._session = requests.Session()
+        # Retries are handled here (with jitter), so the adapter itself never retries
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self.timings = CallTimings()
+
+    def _backoff_delay(self, attempt: int, retry_after: str | None = None) -> float:
+        """
+        Computes the delay before the next attempt.
+        """
+        return backoff_delay(attempt, self.backoff_base, self.backoff_max, retry_after)
+
+    def get_json(self, url: str, endpoint: str = "default", on_attempt: Callable[[], None] | None = None) -> dict:
+        """
+        Performs a GET request and returns the decoded JSON body.
+
+        Args:
+            url (str): The full URL to request.
+            endpoint (str): A short name used to group timing statistics.
+            on_attempt (Callable | None): Called before every attempt, retries
+                included, e.g. to take a quota token; its exceptions propagate.
+
+        Returns:
+            dict: The decoded JSON response.
+
+        Raises:
+            requests.RequestException: If the request still fails after all retries.
+        """
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            if on_attempt is not None:
+                on_attempt()
+            try:
+                response = self._session.get(url, timeout=self.timeout)
+                if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    delay = self._backoff_delay(attempt, response.headers.get("Retry-After"))
+                    logger.warning("Upstream %s returned %d, retrying in %.2fs", endpoint, response.status_code, delay)
+                    response.close()
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                response.raise_for_status()
+                data = response.json()
+                self.timings.record(endpoint, time.perf_counter() - start, True, attempt)
+                return data
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt < self.max_retries:
+                    delay = self._backoff_delay(attempt)
+                    logger.warning("Upstream %s connection error (%s), retrying in %.2fs", endpoint, str(e), delay)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                self.timings.record(endpoint, time.perf_counter() - start, False, attempt)
+                raise
+            except requests.RequestException:
+                self.timings.record(endpoint, time.perf_counter() - start, False, attempt)
+                raise
+
+    def get_stats(self) -> dict:
+        """
+        Returns a snapshot of per-endpoint timing statistics.
+
+        Returns:
+            dict: Mapping of endpoint name to call counts and timings (seconds).
+        """
+        return self.timings.snapshot()
+
+    def close(self) -> None:
+        """
+        Closes all pooled connections.
+        """
+        self._session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_upstream_client() -> UpstreamClient:
+    """
+    Returns the process-wide upstream client, creating it on first use.
+
+    Settings are read from the environment:
+    UPSTREAM_POOL_SIZE, UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_READ_TIMEOUT,
+    UPSTREAM_MAX_RETRIES and UPSTREAM_BACKOFF_BASE.
+
+    Returns:
+        UpstreamClient: The shared client.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = UpstreamClient(
+                    pool_size=int(os.getenv("UPSTREAM_POOL_SIZE", "20")),
+                    connect_timeout=float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "3.05")),
+                    read_timeout=float(os.getenv("UPSTREAM_READ_TIMEOUT", "10")),
+                    max_retries=int(os.getenv("UPSTREAM_MAX_RETRIES", "2")),
+                    backoff_base=float(os.getenv("UPSTREAM_BACKOFF_BASE", "0.25")),
+                )
+    return _client
+
+
+def reset_upstream_client() -> None:
+    """
+    Closes and discards the shared client so the next call builds a fresh one.
+    """
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
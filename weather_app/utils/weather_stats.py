@@ -0,0 +1,245 @@
+import logging
+
+import numpy as np
+
+from weather_app.models.location_model import Location
+from weather_app.models.observation_model import AirQualityObservation, HistoricalObservation
+from weather_app.utils.api_utils import grid
+from weather_app.utils.db import db
+from weather_app.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+DAY = 86400
+# Buckets are aligned to UTC midnight; weeks start on Monday (1970-01-01 was a Thursday)
+GRANULARITIES = {"hour": (3600, 0), "day": (DAY, 0), "week": (7 * DAY, 3 * DAY)}
+
+DEFAULT_PERCENTILES = (50, 90)
+# Upper bound on buckets per location, to keep a single request bounded
+MAX_BUCKETS = 10000
+# Number of buckets averaged by the trailing AQI rolling mean
+DEFAULT_AQI_WINDOW = 7
+
+
+def load_series(model, columns: list[str], location_ids: list[int], start: int, end: int) -> dict[str, np.ndarray]:
+    """
+    Loads stored observations for many locations into arrays with one query.
+
+    Args:
+        model (db.Model): A model keyed by location, such as HistoricalObservation.
+        columns (list[str]): Value columns to load.
+        location_ids (list[int]): The locations to load.
+        start (int): Inclusive start, Unix seconds.
+        end (int): Exclusive end, Unix seconds.
+
+    Returns:
+        dict[str, np.ndarray]: "location_id", "ts" and each column, with NaN for missing values.
+    """
+    rows = (
+        db.session.query(model.location_id, model.ts, *(getattr(model, column) for column in columns))
+        .filter(model.location_id.in_(location_ids), model.ts >= start, model.ts < end)
+        .all()
+    )
+    table = np.array(rows, dtype=np.float64).reshape(len(rows), 2 + len(columns))
+    series = {"location_id": table[:, 0].astype(np.int64), "ts": table[:, 1].astype(np.int64)}
+    for n, column in enumerate(columns):
+        series[column] = table[:, 2 + n]
+    return series
+
+
+def load_cell_series(model, columns: list[str], location_ids: list[int], start: int,
+                     end: int) -> dict[str, np.ndarray]:
+    """
+    Loads observations stored per grid cell, such as AirQualityObservation,
+    as series per location: each row is repeated for every location in its cell.
+
+    Arguments and result are as for ``load_series``.
+    """
+    locations_in_cell = {}
+    for location in Location.get_locations_by_ids(location_ids):
+        cell_id = grid.cell(location["latitude"], location["longitude"]).id
+        locations_in_cell.setdefault(cell_id, []).append(location["id"])
+    rows = (
+        db.session.query(model.cell_id, model.ts, *(getattr(model, column) for column in columns))
+        .filter(model.cell_id.in_(list(locations_in_cell)), model.ts >= start, model.ts < end)
+        .all()
+    ) if locations_in_cell else []
+    expanded = [(location_id, *row[1:]) for row in rows for location_id in locations_in_cell[row.cell_id]]
+    table = np.array(expanded, dtype=np.float64).reshape(len(expanded), 2 + len(columns))
+    series = {"location_id": table[:, 0].astype(np.int64), "ts": table[:, 1].astype(np.int64)}
+    for n, column in enumerate(columns):
+        series[column] = table[:, 2 + n]
+    return series
+
+
+def _group_reduce(groups: np.ndarray, values: np.ndarray, size: int, percentiles) -> dict[str, np.ndarray]:
+    """
+    Computes count, min, max, mean and percentiles of values per group, ignoring NaN.
+
+    Args:
+        groups (np.ndarray): Group index of each value, in [0, size).
+        values (np.ndarray): The values.
+        size (int): Number of groups.
+        percentiles (Iterable[float]): Percentiles to compute, in [0, 100].
+
+    Returns:
+        dict[str, np.ndarray]: One array of length ``size`` per statistic; NaN for empty groups.
+    """
+    keep = ~np.isnan(values)
+    groups, values = groups[keep], values[keep]
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order]
+
+    counts = np.bincount(groups, minlength=size)
+    result = {"count": counts}
+    nonempty = counts > 0
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    for name in ("min", "max", "mean"):
+        result[name] = np.full(size, np.nan)
+    if values.size:
+        result["min"][nonempty] = values[starts[nonempty]]
+        result["max"][nonempty] = values[starts[nonempty] + counts[nonempty] - 1]
+        result["mean"][nonempty] = np.bincount(groups, weights=values, minlength=size)[nonempty] / counts[nonempty]
+
+    for q in percentiles:
+        column = np.full(size, np.nan)
+        if values.size:
+            # Linear interpolation between the closest ranks, as np.percentile does
+            position = starts[nonempty] + (counts[nonempty] - 1) * (q / 100)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.ceil(position).astype(np.int64)
+            column[nonempty] = values[lower] + (values[upper] - values[lower]) * (position - lower)
+        result[f"p{q:g}"] = column
+    return result
+
+
+def _rolling_mean(sums: np.ndarray, counts: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing rolling mean over the last ``window`` buckets of each row, weighted by observation count.
+
+    Args:
+        sums (np.ndarray): Per-bucket sums, shape (locations, buckets).
+        counts (np.ndarray): Per-bucket observation counts, same shape.
+        window (int): Buckets per window.
+
+    Returns:
+        np.ndarray: The rolling means; NaN where the window holds no observations.
+    """
+    def trailing_sum(values):
+        cumulative = np.cumsum(values, axis=1, dtype=np.float64)
+        shifted = np.zeros_like(cumulative)
+        shifted[:, window:] = cumulative[:, :-window]
+        return cumulative - shifted
+
+    total, n = trailing_sum(sums), trailing_sum(counts)
+    return np.where(n > 0, total / np.maximum(n, 1), np.nan)
+
+
+def compute_stats(location_ids: list[int], start: int, end: int, granularity: str = "day",
+                  percentiles=DEFAULT_PERCENTILES, aqi_window: int = DEFAULT_AQI_WINDOW) -> dict:
+    """
+    Aggregates stored history and air quality for many locations at once.
+
+    Temperature min/max/mean/percentiles and precipitation totals come from
+    stored historical observations, AQI means from stored air quality
+    observations. All locations are loaded with one query per table and
+    reduced together.
+
+    Args:
+        location_ids (list[int]): The locations to aggregate.
+        start (int): Inclusive start, Unix seconds.
+        end (int): Exclusive end, Unix seconds.
+        granularity (str): "hour", "day" or "week". Buckets are aligned to UTC.
+        percentiles (Iterable[float]): Temperature percentiles to compute.
+        aqi_window (int): Buckets averaged by the trailing AQI rolling mean.
+
+    Returns:
+        dict: ``{"buckets": array of bucket start times, "locations": {location_id: {statistic: array}}}``.
+
+    Raises:
+        ValueError: If the granularity, range or percentiles are invalid.
+    """
+    if any(not 0 <= q <= 100 for q in percentiles):
+        raise ValueError(f"Invalid percentiles: {list(percentiles)}. Must be between 0 and 100.")
+    if aqi_window <= 0:
+        raise ValueError(f"Invalid AQI window: {aqi_window}. Must be positive.")
+    size, offset = GRANULARITIES.get(granularity, (None, None))
+    if size is None:
+        raise ValueError(f"Invalid granularity: {granularity}. Must be one of {', '.join(GRANULARITIES)}.")
+    if start >= end:
+        raise ValueError(f"Invalid time range: start {start} must be before end {end}.")
+    if not location_ids:
+        raise ValueError("At least one location ID is required.")
+
+    first = (start + offset) // size * size - offset
+    n_buckets = -(-(end - first) // size)
+    if n_buckets > MAX_BUCKETS:
+        raise ValueError(f"Range spans {n_buckets} {granularity} buckets; at most {MAX_BUCKETS} are allowed.")
+    buckets = first + size * np.arange(n_buckets, dtype=np.int64)
+    location_ids = list(dict.fromkeys(location_ids))
+    n_locations = len(location_ids)
+    ids = np.array(location_ids, dtype=np.int64)
+    order = np.argsort(ids)
+
+    def group_of(series):
+        # Row of each observation's location, then its bucket within that row
+        rows = order[np.searchsorted(ids[order], series["location_id"])]
+        return rows * n_buckets + (series["ts"] - first) // size
+
+    weather = load_series(HistoricalObservation, ["temp", "precipitation"], location_ids, start, end)
+    groups = group_of(weather)
+    total = n_locations * n_buckets
+    temperature = _group_reduce(groups, weather["temp"], total, percentiles)
+    precipitation = np.bincount(groups, weights=np.nan_to_num(weather["precipitation"]), minlength=total)
+    precipitation_counts = np.bincount(groups[~np.isnan(weather["precipitation"])], minlength=total)
+
+    air = load_cell_series(AirQualityObservation, ["aqi"], location_ids, start, end)
+    air_groups = group_of(air)
+    has_aqi = ~np.isnan(air["aqi"])
+    aqi_counts = np.bincount(air_groups[has_aqi], minlength=total)
+    aqi_sums = np.bincount(air_groups[has_aqi], weights=air["aqi"][has_aqi], minlength=total)
+    aqi_mean = np.where(aqi_counts > 0, aqi_sums / np.maximum(aqi_counts, 1), np.nan)
+    aqi_rolling = _rolling_mean(aqi_sums.reshape(n_locations, n_buckets),
+                                aqi_counts.reshape(n_locations, n_buckets), aqi_window)
+
+    shape = (n_locations, n_buckets)
+    statistics = {
+        "observations": temperature["count"].reshape(shape),
+        "temp_min": temperature["min"].reshape(shape),
+        "temp_max": temperature["max"].reshape(shape),
+        "temp_mean": temperature["mean"].reshape(shape),
+        **{f"temp_{name}": temperature[name].reshape(shape) for name in temperature if name.startswith("p")},
+        "precipitation_total": np.where(precipitation_counts > 0, precipitation, np.nan).reshape(shape),
+        "aqi_mean": aqi_mean.reshape(shape),
+        "aqi_rolling_mean": aqi_rolling,
+    }
+    logger.info("Computed %s stats for %d locations over %d buckets from %d observations",
+                granularity, n_locations, n_buckets, len(weather["ts"]) + len(air["ts"]))
+    return {
+        "buckets": buckets,
+        "locations": {
+            location_id: {name: values[row] for name, values in statistics.items()}
+            for row, location_id in enumerate(location_ids)
+        },
+    }
+
+
+def to_records(buckets: np.ndarray, statistics: dict[str, np.ndarray]) -> list[dict]:
+    """
+    Converts one location's statistic arrays to JSON-ready rows, one per bucket.
+
+    NaN (no data in the bucket) becomes None.
+    """
+    columns = {name: values.tolist() for name, values in statistics.items()}
+    records = []
+    for n, bucket in enumerate(buckets.tolist()):
+        record = {"start": bucket}
+        for name, values in columns.items():
+            value = values[n]
+            record[name] = None if isinstance(value, float) and value != value else value
+        records.append(record)
+    return records